@@ -0,0 +1,106 @@
+"""จับคู่ cue ของสองภาษาจากช่วงเวลาที่ทับกัน (แทนการจับคู่ด้วย start ที่ตรงกันเป๊ะ)
+
+ทั้งสองฝั่งต้องเรียงตามเวลาเริ่ม (ผลจาก vtt_parser เรียงอยู่แล้ว) แล้วเดิน two-pointer
+ครั้งเดียว O(n + m) ถ้าฝั่งหนึ่งแบ่งประโยคเป็นหลาย cue ในช่วงเวลาของอีกฝั่ง จะรวม
+cue เหล่านั้นเป็นคู่เดียว (many-to-one / many-to-many) โดยรวมได้ไม่เกิน max_merge cue ต่อฝั่ง
+กันไม่ให้ caption ที่เหลื่อมกันครึ่งต่อครึ่งต่อกันเป็นกลุ่มยาวทั้งวิดีโอ ถ้าชนเพดานแล้วยังมี cue ถัดไป
+ที่อยู่ในช่วงของอีกฝั่ง กลุ่มนั้นถูกทิ้ง (ถ้าตัดที่เพดานคำแปลจะขาดท้ายเป็นคู่ที่ผิด)
+
+overlap ratio = ช่วงที่ทับกัน / ความยาวของ cue ที่สั้นกว่า โดย tolerance_ms จะถูกบวกเข้าไป
+ในช่วงที่ทับกันเพื่อรับขอบเวลาที่เหลื่อมกันเล็กน้อยระหว่าง caption สองชุด
+"""
+from collections import namedtuple
+
+AlignedPair = namedtuple('AlignedPair', ['start_ms', 'end_ms', 'src', 'tgt', 'n_src', 'n_tgt'])
+
+
+def overlap_ratio(s1, e1, s2, e2, tolerance_ms=0):
+    ov = min(e1, e2) - max(s1, s2) + tolerance_ms
+    if ov <= 0:
+        return 0.0
+    return min(1.0, ov / max(1, min(e1 - s1, e2 - s2)))
+
+
+def _covered(s, e, span_s, span_e, min_overlap, tolerance_ms):
+    # cue [s, e) อยู่ในช่วงของกลุ่มฝั่งตรงข้ามมากพอไหม (เทียบกับความยาวของ cue เอง)
+    ov = min(e, span_e) - max(s, span_s) + tolerance_ms
+    return ov > 0 and ov >= min_overlap * max(1, e - s)
+
+
+def align_overlap(subs1, subs2, min_overlap=0.5, tolerance_ms=200, merge=True, max_merge=3):
+    """subs1/subs2: sequence ของ (start_ms, end_ms, text) เรียงตาม start_ms
+
+    คืน list ของ AlignedPair (n_src / n_tgt คือจำนวน cue ที่ถูกรวมในคู่นั้น)
+    """
+    a = subs1 if isinstance(subs1, list) else list(subs1)
+    b = subs2 if isinstance(subs2, list) else list(subs2)
+    n, m = len(a), len(b)
+    pairs = []
+    i = j = 0
+    while i < n and j < m:
+        s1, e1 = a[i][0], a[i][1]
+        s2, e2 = b[j][0], b[j][1]
+        if e1 + tolerance_ms <= s2:
+            i += 1
+            continue
+        if e2 + tolerance_ms <= s1:
+            j += 1
+            continue
+        if not merge:
+            if overlap_ratio(s1, e1, s2, e2, tolerance_ms) >= min_overlap:
+                pairs.append(AlignedPair(min(s1, s2), max(e1, e2), a[i][2], b[j][2], 1, 1))
+                i += 1
+                j += 1
+            elif e1 <= e2:
+                i += 1
+            else:
+                j += 1
+            continue
+        # เริ่มกลุ่มเมื่อ cue หนึ่งอยู่ในช่วงของอีกฝั่งมากพอ ไม่งั้นทิ้งตัวที่จบก่อน
+        if not (_covered(s1, e1, s2, e2, min_overlap, tolerance_ms)
+                or _covered(s2, e2, s1, e1, min_overlap, tolerance_ms)):
+            if e1 <= e2:
+                i += 1
+            else:
+                j += 1
+            continue
+        # ขยายกลุ่มสลับกันสองฝั่งจนกว่าจะไม่มี cue ถัดไปที่อยู่ในช่วงของอีกฝั่ง
+        gi, gj = i + 1, j + 1
+        span1_s, span1_e = s1, e1
+        span2_s, span2_e = s2, e2
+        grown = True
+        while grown:
+            grown = False
+            while gi < n and gi - i < max_merge and _covered(a[gi][0], a[gi][1], span2_s, span2_e, min_overlap, tolerance_ms):
+                span1_e = max(span1_e, a[gi][1])
+                gi += 1
+                grown = True
+            while gj < m and gj - j < max_merge and _covered(b[gj][0], b[gj][1], span1_s, span1_e, min_overlap, tolerance_ms):
+                span2_e = max(span2_e, b[gj][1])
+                gj += 1
+                grown = True
+        # ชนเพดาน max_merge ทั้งที่ cue ถัดไปยังอยู่ในช่วงของอีกฝั่ง: ข้อความอีกฝั่งยาวกว่าที่รวมได้
+        # ทิ้งกลุ่มของฝั่งที่ยาว (cue ฝั่งที่ชนเพดานที่เหลือจะถูกข้ามเองเพราะไม่ทับกับ cue ถัดไป)
+        if gj < m and gj - j >= max_merge and _covered(b[gj][0], b[gj][1], span1_s, span1_e, min_overlap, tolerance_ms):
+            i = gi
+        elif gi < n and gi - i >= max_merge and _covered(a[gi][0], a[gi][1], span2_s, span2_e, min_overlap, tolerance_ms):
+            j = gj
+        elif overlap_ratio(span1_s, span1_e, span2_s, span2_e, tolerance_ms) >= min_overlap:
+            pairs.append(AlignedPair(min(span1_s, span2_s), max(span1_e, span2_e),
+                                     ' '.join(c[2] for c in a[i:gi]), ' '.join(c[2] for c in b[j:gj]),
+                                     gi - i, gj - j))
+            i, j = gi, gj
+        elif span1_e <= span2_e:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+def pair_yield(pairs, n1, n2):
+    """สัดส่วน cue ที่ได้คู่ (คิดจากฝั่งที่มี cue น้อยกว่า)"""
+    covered1 = sum(p.n_src for p in pairs)
+    covered2 = sum(p.n_tgt for p in pairs)
+    if n1 <= n2:
+        return covered1 / n1 if n1 else 0.0
+    return covered2 / n2 if n2 else 0.0
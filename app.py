@@ -1,89 +1,140 @@
-import yt_dlp
 import os
 import glob
-import re
 import csv
-import pandas as pd
-import json
-import time
 import argparse
+from functools import partial
 
-def download_subtitles(video_urls, sub_langs, output_dir='subtitles'):
-    os.makedirs(output_dir, exist_ok=True)
-    ydl_opts = {
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'subtitleslangs': sub_langs,
-        'skip_download': True,
-        'outtmpl': f'{output_dir}/%(id)s.%(ext)s',
-    }
-    results = []
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        for url in video_urls:
-            print(f"Downloading subtitles for {url}")
-            try:
-                info = ydl.extract_info(url, download=False)
-                vid = info.get('id')
-                found = False
-                for lang in sub_langs:
-                    vtt_path = os.path.join(output_dir, f"{vid}.{lang}.vtt")
-                    if os.path.exists(vtt_path):
-                        print(f"  - Subtitle already exists: {vtt_path}")
-                        found = True
-                        continue  # ข้ามการดาวน์โหลดถ้ามีไฟล์อยู่แล้ว
-                    elif (lang in info.get('subtitles', {}) or lang in info.get('automatic_captions', {})):
-                        print(f"  - Downloading subtitle: {lang}")
-                        ydl.download([url])
-                        found = True
-                    else:
-                        print(f"  - No subtitle found for language: {lang}")
-                results.append({'video_id': vid, 'url': url, 'subtitle_found': found, 'error': None})
-            except Exception as e:
-                print(f"  - Error: {e}")
-                results.append({'video_id': None, 'url': url, 'subtitle_found': False, 'error': str(e)})
-            time.sleep(5)  # ดีเลย์ 5 วินาทีระหว่างแต่ละ request
-    return results
+import metrics
 
-def parse_vtt(vtt_path):
-    entries = []
-    with open(vtt_path, encoding='utf-8') as infile:
-        start, end, text = None, None, ''
-        for line in infile:
-            line = line.strip()
-            if re.match(r'^\d{2}:\d{2}:\d{2}\.\d{3} -->', line):
-                if start and text:
-                    entries.append({'start': start, 'end': end, 'text': text.strip()})
-                times = re.findall(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
-                start, end = times[0], times[1]
-                text = ''
-            elif line and not line.startswith('WEBVTT') and not line.startswith('Kind:') and not line.startswith('Language:'):
-                text += line + ' '
-        if start and text:
-            entries.append({'start': start, 'end': end, 'text': text.strip()})
-    return entries
+from aligner import align_overlap, pair_yield
+from corpus_index import CorpusIndexWriter
+from dataset_writers import CsvRowWriter, JsonArrayWriter, JsonlRowWriter, ShardedParquetWriter
+from downloader import SubtitleDownloader
+from length_buckets import DEFAULT_BOUNDS, format_bounds, parse_bounds
+from manifest import LayoutReader, Manifest
+from metadata_cache import MetadataCache
+from parse_pool import parse_files
+from text_cleaning import DEFAULT_RULES
+from vtt_parser import parse_columns
 
-def export_all_vtt_to_datasets(output_dir='subtitles'):
-    vtt_files = glob.glob(f'{output_dir}/*.vtt')
-    all_entries = []
-    for vtt in vtt_files:
-        entries = parse_vtt(vtt)
-        for e in entries:
-            e['video_id'] = os.path.splitext(os.path.basename(vtt))[0].split('.')[0]
-        all_entries.extend(entries)
-    # CSV
+@metrics.timed('download')
+def download_subtitles(video_urls, sub_langs, output_dir='subtitles', workers=4, rate=1.0, burst=2, ydl_factory=None, refresh=False,
+                       cache_ttl=168.0, cache_size=50000):
+    # ใช้ SubtitleDownloader: หลาย worker, แชร์ rate limit และ backoff เมื่อเจอ HTTP 429
+    # วิดีโอที่ manifest บอกว่าได้ครบทุกภาษาแล้ว (และไฟล์ยังอยู่ครบ) จะไม่ถูกส่งไป yt-dlp อีก
+    # ที่ได้ไม่ครบใช้ metadata ของ extract_info ที่แคชไว้ที่ metadata_cache.json (อายุ cache_ttl ชั่วโมง, 0 = ปิด cache)
+    # ตัดสินว่าต้องเช็คใหม่หรือยัง refresh=True เช็คทุกวิดีโอใหม่โดยไม่ใช้ทั้ง manifest และ cache
+    manifest = Manifest(output_dir)
+    settled = {} if refresh else {url: manifest.settled(url, sub_langs) for url in video_urls}
+    todo = [url for url in video_urls if not settled.get(url)]
+    cache = MetadataCache(f'{output_dir}/metadata_cache.json', cache_ttl * 3600, cache_size) if cache_ttl > 0 else None
+    downloader = SubtitleDownloader(sub_langs, output_dir, workers=workers, rate=rate, burst=burst,
+                                    ydl_factory=ydl_factory, cache=cache, refresh=refresh)
+    fetched = dict(zip(todo, downloader.run(todo)))
+    manifest.record_downloads(fetched.values(), sub_langs)
+    metrics.add(videos=len(video_urls), skipped=len(video_urls) - len(todo),
+                subtitles_downloaded=sum(len(r['downloaded']) for r in fetched.values()),
+                errors=sum(1 for r in fetched.values() if r['error']),
+                retries=sum(r['retries'] for r in fetched.values()),
+                metadata_hits=sum(1 for r in fetched.values() if r.get('metadata') == 'hit'),
+                metadata_misses=sum(1 for r in fetched.values() if r.get('metadata') == 'miss'))
+    if len(todo) < len(video_urls):
+        print(f'Skipped {len(video_urls) - len(todo)} videos already recorded in {manifest.path}')
+    return [fetched.get(url) or settled[url] for url in video_urls]
+
+def cached_videos(sub_langs, output_dir='subtitles', cache_ttl=168.0):
+    # video id ที่ metadata cache บอกว่ามีทุกภาษาใน sub_langs (ตอบจาก metadata_cache.json อย่างเดียว ไม่ยิง network)
+    cache = MetadataCache(f'{output_dir}/metadata_cache.json', cache_ttl * 3600)
+    return cache.videos_with(sub_langs)
+
+def vtt_video_id(vtt_path):
+    return os.path.splitext(os.path.basename(vtt_path))[0].split('.')[0]
+
+def vtt_lang(vtt_path):
+    # {vid}.{lang}.vtt -> lang (ไฟล์ที่ไม่มีภาษาในชื่อได้ 'und')
+    parts = os.path.splitext(os.path.basename(vtt_path))[0].split('.')
+    return parts[-1] if len(parts) > 1 else 'und'
+
+def iter_vtt_rows(vtt_files, manifest, csv_path, unchanged, layout, workers=1, collapse='auto'):
+    # generator: แถวของ source ที่ไม่เปลี่ยนดึงจาก dataset.csv เดิม ที่เหลือ parse ใหม่ (ขนานได้ด้วย workers)
+    old = LayoutReader(csv_path, manifest.layout(csv_path)) if unchanged else None
+    parse = partial(parse_columns, collapse=collapse)
+    parsed = parse_files([v for v in vtt_files if manifest.key(v) not in unchanged], workers, parse)
+    try:
+        for vtt in vtt_files:
+            key = manifest.key(vtt)
+            if key in unchanged:
+                entries = old.take(key)
+                if entries is None:
+                    entries = parse(vtt).rows(vtt_video_id(vtt))
+            else:
+                _, columns = next(parsed)
+                entries = columns.rows(vtt_video_id(vtt))
+            layout.append([key, len(entries)])
+            lang = vtt_lang(vtt)
+            if metrics.enabled():
+                reused = key in unchanged
+                metrics.add(files=1, cues=len(entries), files_reused=int(reused),
+                            bytes_read=0 if reused else os.path.getsize(vtt))
+                metrics.event('cues', video_id=vtt_video_id(vtt), lang=lang, cues=len(entries), reused=reused)
+            for entry in entries:
+                entry['lang'] = lang
+            yield from entries
+    finally:
+        parsed.close()
+        if old:
+            old.close()
+
+@metrics.timed('export')
+def export_all_vtt_to_datasets(output_dir='subtitles', incremental=True, json_array=False, row_group_size=65536, workers=1, collapse='auto',
+                               shard_rows=1000000, taps=()):
+    vtt_files = sorted(glob.glob(f'{output_dir}/*.vtt'))
+    fieldnames = ['video_id', 'start', 'end', 'text']
     csv_path = f'{output_dir}/dataset.csv'
-    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['video_id', 'start', 'end', 'text'])
-        writer.writeheader()
-        writer.writerows(all_entries)
-    # JSON
-    json_path = f'{output_dir}/dataset.json'
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(all_entries, f, ensure_ascii=False, indent=2)
-    # Parquet
-    df = pd.DataFrame(all_entries)
-    df.to_parquet(f'{output_dir}/dataset.parquet', index=False)
-    print('Exported CSV, JSON, and Parquet datasets in', output_dir)
+    json_path = f'{output_dir}/dataset.json' if json_array else f'{output_dir}/dataset.jsonl'
+    parquet_path = f'{output_dir}/dataset_parquet'
+    index_path = f'{output_dir}/corpus_index'
+    params = {'collapse': collapse}
+    parquet_params = dict(params, shard_rows=shard_rows, row_group_size=row_group_size)
+    manifest = Manifest(output_dir)
+    if incremental and manifest.is_fresh([csv_path, json_path, index_path], vtt_files, params) \
+            and manifest.is_fresh([parquet_path], vtt_files, parquet_params):
+        print('Datasets are up to date in', output_dir)
+        metrics.add(up_to_date=1)
+        return
+    unchanged = manifest.unchanged_sources(csv_path, {manifest.key(v): [v] for v in vtt_files}, params) if incremental else set()
+    layout = []
+    # stream ทีละแถวเข้า writer ทุกตัว memory ไม่โตตามจำนวนไฟล์
+    writers = [
+        CsvRowWriter(csv_path, fieldnames),
+        (JsonArrayWriter if json_array else JsonlRowWriter)(json_path, fieldnames),
+        # Parquet: โฟลเดอร์ shard แยกภาษา (lang=xx/part-NNNNN.parquet) schema แบบมี type
+        ShardedParquetWriter(parquet_path, shard_rows=shard_rows, row_group_size=row_group_size),
+        # index ไบนารีสำหรับเปิดด้วย mmap แล้วดึง cue ตามวิดีโอ/เวลา (ดู corpus_index.py)
+        CorpusIndexWriter(index_path),
+    ]
+    # taps: writer เพิ่มเติมที่รับแถวชุดเดียวกัน (pipeline ใช้ต่อ stage ถัดไปโดยไม่ต้องอ่าน dataset.csv ซ้ำ)
+    writers += list(taps)
+    try:
+        for row in iter_vtt_rows(vtt_files, manifest, csv_path, unchanged, layout, workers, collapse):
+            for w in writers:
+                w.write(row)
+    except BaseException:
+        for w in writers:
+            w.close(discard=True)
+        raise
+    for w in writers:
+        w.close()
+    manifest.record_output(csv_path, vtt_files, layout, dict(layout), params=params)
+    manifest.record_output(json_path, vtt_files, params=params)
+    manifest.record_output(parquet_path, vtt_files, params=parquet_params)
+    manifest.record_output(index_path, vtt_files, params=params)
+    reused = len(unchanged & {key for key, _ in layout})
+    if metrics.enabled():
+        metrics.add(rows_written=writers[0].rows,
+                    bytes_written=sum(metrics.path_size(p) for p in (csv_path, json_path, parquet_path, index_path)))
+    print(f'Exported CSV, {"JSON" if json_array else "JSONL"}, Parquet datasets and corpus index in {output_dir} '
+          f'({writers[0].rows} rows, {len(vtt_files) - reused} parsed, {reused} reused)')
 
 def align_subs(subs1, subs2):
     d2 = {s['start']: s for s in subs2}
@@ -94,68 +145,238 @@ def align_subs(subs1, subs2):
             aligned.append((s1['start'], s1['text'], s2['text']))
     return aligned
 
-def export_parallel_dataset(output_dir='subtitles', lang1='en', lang2='th'):
-    output_path = f'{output_dir}/dataset_parallel.csv'
-    with open(output_path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['video_id', 'text_original', 'text_thai'])
-        for vtt2 in glob.glob(f'{output_dir}/*.{lang2}.vtt'):
-            vid = os.path.basename(vtt2).split('.')[0]
-            vtt1 = vtt2.replace(f'.{lang2}.vtt', f'.{lang1}.vtt')
-            if os.path.exists(vtt1):
-                subs2 = parse_vtt(vtt2)
-                subs1 = parse_vtt(vtt1)
-                for _, en, th in align_subs(subs1, subs2):
-                    writer.writerow([vid, en, th])
-    print('Exported parallel dataset to', output_path)
+def align_columns(cols1, cols2, aligner='overlap', min_overlap=0.5, tolerance_ms=200):
+    # คืน (list ของ (text1, text2), สัดส่วน cue ที่ได้คู่)
+    if aligner == 'exact':
+        aligned = align_subs(cols1.entries(), cols2.entries())
+        n = min(len(cols1), len(cols2))
+        return [(t1, t2) for _, t1, t2 in aligned], (len(aligned) / n if n else 0.0)
+    pairs = align_overlap(list(cols1), list(cols2), min_overlap=min_overlap, tolerance_ms=tolerance_ms)
+    return [(p.src, p.tgt) for p in pairs], pair_yield(pairs, len(cols1), len(cols2))
+
+@metrics.timed('parallel')
+def export_parallel_dataset(output_dir='subtitles', lang1='en', lang2='th', incremental=True, workers=1,
+                            aligner='overlap', min_overlap=0.5, tolerance_ms=200, collapse='auto', taps=()):
+    # คู่ภาษาเดียว -> dataset_parallel.csv (column: video_id, text_original, text_thai) ใช้โค้ดเดียวกับ parallel-pairs
+    align_pairs(output_dir, [(lang1, lang2)], lambda src, tgt: f'{output_dir}/dataset_parallel.csv',
+                ['video_id', 'text_original', 'text_thai'], lambda vid, src, tgt, a, b: [vid, a, b],
+                incremental=incremental, workers=workers, aligner=aligner, min_overlap=min_overlap,
+                tolerance_ms=tolerance_ms, collapse=collapse, taps=taps)
+
+def parse_lang_pairs(spec):
+    """'en:th,en:zh-Hans' -> [('en', 'th'), ('en', 'zh-Hans')] หรือ 'all' -> 'all'
+
+    คั่นคู่ด้วย ':' เพราะรหัสภาษาของ YouTube มี '-' ได้ (zh-Hans, pt-BR)
+    """
+    if spec in (None, '', 'all'):
+        return 'all'
+    pairs = []
+    for item in spec.split(','):
+        src, sep, tgt = (part.strip() for part in item.strip().partition(':'))
+        if not sep or not src or not tgt or ':' in tgt or src == tgt:
+            raise ValueError(f'Invalid language pair: {item!r} (expected e.g. en:th)')
+        if (src, tgt) not in pairs:
+            pairs.append((src, tgt))
+    return pairs
+
+def group_vtt_by_video(output_dir):
+    # สแกนโฟลเดอร์ครั้งเดียว: {video_id: {lang: path}}
+    videos = {}
+    for vtt in sorted(glob.glob(f'{output_dir}/*.vtt')):
+        videos.setdefault(vtt_video_id(vtt), {})[vtt_lang(vtt)] = vtt
+    return videos
+
+def parallel_pair_path(output_dir, src, tgt):
+    # รหัสภาษามี '.' ไม่ได้ (ได้มาจากชื่อไฟล์ {vid}.{lang}.vtt) จึงใช้คั่นคู่ในชื่อไฟล์ได้โดยไม่กำกวม
+    return f'{output_dir}/dataset_parallel_{src}.{tgt}.csv'
+
+@metrics.timed('parallel_pairs')
+def export_parallel_pairs(output_dir='subtitles', pairs='all', incremental=True, workers=1,
+                          aligner='overlap', min_overlap=0.5, tolerance_ms=200, collapse='auto'):
+    """สร้าง parallel dataset หลายคู่ภาษาในรอบเดียว -> dataset_parallel_{src}.{tgt}.csv
+
+    pairs: list ของ (src, tgt) หรือ 'all' = ทุกคู่ของภาษาที่มีในโฟลเดอร์ (เรียงตามตัวอักษร src < tgt)
+    column: video_id, src_lang, tgt_lang, src_text, tgt_text
+    """
+    if pairs == 'all':
+        langs = sorted({lang for files in group_vtt_by_video(output_dir).values() for lang in files})
+        pairs = [(a, b) for i, a in enumerate(langs) for b in langs[i + 1:]]
+    align_pairs(output_dir, pairs, partial(parallel_pair_path, output_dir),
+                ['video_id', 'src_lang', 'tgt_lang', 'src_text', 'tgt_text'], lambda vid, src, tgt, a, b: [vid, src, tgt, a, b],
+                incremental=incremental, workers=workers, aligner=aligner, min_overlap=min_overlap,
+                tolerance_ms=tolerance_ms, collapse=collapse)
+
+def align_pairs(output_dir, pairs, pair_path, fieldnames, make_row, incremental=True, workers=1,
+                aligner='overlap', min_overlap=0.5, tolerance_ms=200, collapse='auto', taps=()):
+    """จับคู่ cue ของแต่ละคู่ภาษาแล้วเขียนไฟล์ละคู่ pair_path(src, tgt) แถวละ make_row(vid, src, tgt, text_src, text_tgt)
+
+    แต่ละไฟล์ .vtt ถูก parse ครั้งเดียวแม้จะอยู่ในหลายคู่ (cache ผล parse ไว้ระหว่างทำวิดีโอเดียวกัน)
+    วิดีโอที่ไฟล์ไม่เปลี่ยนดึงแถวจาก output เดิม (ตาม layout ใน manifest) ไม่ต้อง parse ใหม่
+    taps ได้ทุกแถวที่เขียน (เป็น dict ตาม fieldnames) ถ้าทุกคู่ยังใหม่อยู่จะไม่แตะ taps
+    """
+    videos = group_vtt_by_video(output_dir)
+    on_disk = {lang for files in videos.values() for lang in files}
+    missing = sorted({lang for pair in pairs for lang in pair} - on_disk)
+    if missing:
+        print(f'No .vtt files for language(s) {", ".join(missing)} in {output_dir}')
+    params = {'aligner': aligner, 'collapse': collapse}
+    if aligner != 'exact':
+        params.update(min_overlap=min_overlap, tolerance_ms=tolerance_ms)
+    parse = partial(parse_columns, collapse=collapse)
+    manifest = Manifest(output_dir)
+    sources, stale = {}, []
+    for src, tgt in pairs:
+        sources[src, tgt] = {vid: [files[src], files[tgt]] for vid, files in videos.items() if src in files and tgt in files}
+        inputs = [p for paths in sources[src, tgt].values() for p in paths]
+        path = pair_path(src, tgt)
+        if incremental and manifest.is_fresh([path], inputs, params):
+            print(f'Parallel dataset {src}:{tgt} is up to date: {path}')
+            metrics.add(up_to_date=1)
+        else:
+            stale.append((src, tgt))
+    if not stale:
+        return
+    unchanged = {pair: manifest.unchanged_sources(pair_path(*pair), sources[pair], params) if incremental else set()
+                 for pair in stale}
+    # ภาษาที่ต้อง parse ของแต่ละวิดีโอ (รวมทุกคู่ที่ต้องสร้างใหม่) -> parse ตามลำดับเดียวกับที่ใช้
+    need = {}
+    for pair in stale:
+        for vid in sources[pair]:
+            if vid not in unchanged[pair]:
+                need.setdefault(vid, set()).update(pair)
+    order = [(vid, lang) for vid in videos if vid in need for lang in sorted(need[vid])]
+    parsed = parse_files([videos[vid][lang] for vid, lang in order], workers, parse)
+    files, writers, readers, layouts, counts = {}, {}, {}, {}, {}
+    try:
+        for pair in stale:
+            path = pair_path(*pair)
+            files[pair] = open(path + '.tmp', 'w', encoding='utf-8', newline='')
+            writers[pair] = csv.writer(files[pair])
+            writers[pair].writerow(fieldnames)
+            readers[pair] = LayoutReader(path, manifest.layout(path)) if unchanged[pair] else None
+            layouts[pair], counts[pair] = [], [0, 0]
+        for vid in videos:
+            cache = {}
+            for lang in sorted(need.get(vid, ())):
+                _, cache[lang] = next(parsed)
+            for pair in stale:
+                if vid not in sources[pair]:
+                    continue
+                src, tgt = pair
+                rows = readers[pair].take(vid) if vid in unchanged[pair] else None
+                if rows is None:
+                    if src not in cache or tgt not in cache:
+                        # ไฟล์ไม่เปลี่ยนแต่ output เดิมไม่มีแถวของวิดีโอนี้: parse เพิ่มเฉพาะไฟล์ที่ขาด
+                        for lang in pair:
+                            if lang not in cache:
+                                cache[lang] = parse(videos[vid][lang])
+                    cols1, cols2 = cache[src], cache[tgt]
+                    aligned, ratio = align_columns(cols1, cols2, aligner, min_overlap, tolerance_ms)
+                    rows = [make_row(vid, src, tgt, a, b) for a, b in aligned]
+                    print(f'  - {vid} {src}:{tgt}: {len(rows)} pairs from {len(cols1)} / {len(cols2)} cues ({ratio:.0%} aligned)')
+                    counts[pair][0] += 1
+                    if metrics.enabled():
+                        # cue ของฝั่งที่มีน้อยกว่าที่ไม่ได้คู่
+                        unaligned = round((1 - ratio) * min(len(cols1), len(cols2)))
+                        metrics.add(videos_aligned=1, cues_src=len(cols1), cues_tgt=len(cols2), cues_unaligned=unaligned,
+                                    bytes_read=sum(os.path.getsize(p) for p in sources[pair][vid]))
+                        metrics.event('align', video_id=vid, src_lang=src, tgt_lang=tgt, cues_src=len(cols1),
+                                      cues_tgt=len(cols2), pairs=len(rows), cues_unaligned=unaligned, aligned=round(ratio, 4))
+                else:
+                    rows = [[r[k] for k in fieldnames] for r in rows]
+                    counts[pair][1] += 1
+                    metrics.add(videos_reused=1)
+                writers[pair].writerows(rows)
+                layouts[pair].append([vid, len(rows)])
+                for tap in taps:
+                    for row in rows:
+                        tap.write(dict(zip(fieldnames, row)))
+            metrics.add(files_parsed=len(cache))
+    except BaseException:
+        for f in files.values():
+            f.close()
+            os.remove(f.name)
+        for tap in taps:
+            tap.close(discard=True)
+        raise
+    finally:
+        parsed.close()
+        for r in readers.values():
+            if r:
+                r.close()
+    for pair in stale:
+        path = pair_path(*pair)
+        files[pair].close()
+        os.replace(path + '.tmp', path)
+        inputs = [p for paths in sources[pair].values() for p in paths]
+        manifest.record_output(path, inputs, layouts[pair], params=params)
+        rows = sum(n for _, n in layouts[pair])
+        metrics.add(pairs=rows, bytes_written=metrics.path_size(path))
+        print(f'Exported parallel dataset {pair[0]}:{pair[1]} to {path} '
+              f'({rows} pairs, {counts[pair][0]} aligned, {counts[pair][1]} reused)')
+    for tap in taps:
+        tap.close()
+    if len(stale) > 1:
+        print(f'Parsed {len(order)} VTT files once for {len(stale)} language pairs')
 
-def clean_text(text):
-    text = re.sub(r'<.*?>', '', str(text))
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+def run_stages(targets, output_dir='subtitles', incremental=True, **options):
+    # stage ที่อยู่ถัดจาก dataset.csv / dataset_parallel.csv ใช้โค้ดและ manifest ชุดเดียวกับ pipeline
+    # (input = ไฟล์ต้นทางของ chain, params สะสมตาม chain) รันทีละ stage แล้ว export-both จะไม่สร้างซ้ำ และกลับกัน
+    from pipeline import Pipeline
+    return Pipeline(output_dir, incremental=incremental, **options).run(targets, upstream=False)
 
-def export_clean_text(output_dir='subtitles'):
-    df = pd.read_csv(f'{output_dir}/dataset.csv')
-    cleaned = df['text'].map(clean_text)
-    cleaned.to_csv(f'{output_dir}/dataset_text_only.txt', index=False, header=False, encoding='utf-8')
-    print('Exported cleaned text dataset to', f'{output_dir}/dataset_text_only.txt')
+@metrics.timed('clean_text')
+def export_clean_text(output_dir='subtitles', incremental=True, rules=DEFAULT_RULES):
+    # dataset.csv -> dataset_text_only.txt (stage text)
+    return run_stages(['text'], output_dir, incremental, rules=rules)
 
-def export_clean_text_dedup(output_dir='subtitles'):
-    with open(f'{output_dir}/dataset_text_only.txt', encoding='utf-8') as f:
-        lines = [line.strip() for line in f if line.strip()]
-    unique_lines = []
-    prev = None
-    for line in lines:
-        if line != prev:
-            unique_lines.append(line)
-        prev = line
-    with open(f'{output_dir}/dataset_text_only_dedup.txt', 'w', encoding='utf-8') as f:
-        for line in unique_lines:
-            f.write(line + '\n')
-    print('Exported deduplicated text dataset to', f'{output_dir}/dataset_text_only_dedup.txt')
+@metrics.timed('dedup_text')
+def export_clean_text_dedup(output_dir='subtitles', incremental=True, near=False, threshold=0.7, rules=DEFAULT_RULES):
+    # ลบบรรทัดซ้ำทั้งไฟล์ (ไม่ใช่แค่บรรทัดติดกัน) ด้วย hash 64 บิต; near=True ตัดบรรทัดที่เกือบซ้ำด้วย MinHash/LSH (stage text-dedup)
+    return run_stages(['text-dedup'], output_dir, incremental, rules=rules, near=near, threshold=threshold)
 
-def export_parallel_both_directions(input_path='subtitles/dataset_parallel_long.csv', output_path='subtitles/dataset_parallel_both_directions.csv'):
+@metrics.timed('both')
+def export_parallel_both_directions(output_dir='subtitles', incremental=True, near=False, threshold=0.7, rules=DEFAULT_RULES):
     """
-    รวมชุดข้อมูลแปล EN→TH และ TH→EN เป็น training set เดียว (ลบแถวซ้ำ)
+    รวมชุดข้อมูลแปล EN→TH และ TH→EN เป็น training set เดียว (ลบแถวซ้ำ) -> dataset_parallel_both_directions.csv
+    เป็น stage both ของ pipeline: clean และ dedup dataset_parallel.csv ระหว่างทาง แล้วลบคู่ (src, tgt) ซ้ำด้วย hash
     """
-    import pandas as pd
-    df = pd.read_csv(input_path)
-    # เตรียม EN→TH
-    df1 = df[['text_original', 'text_thai']].copy()
-    df1.columns = ['src', 'tgt']
-    # เตรียม TH→EN
-    df2 = df[['text_thai', 'text_original']].copy()
-    df2.columns = ['src', 'tgt']
-    # รวมและลบซ้ำ
-    df_both = pd.concat([df1, df2], ignore_index=True).drop_duplicates()
-    df_both.to_csv(output_path, index=False, encoding='utf-8')
-    print(f'Exported parallel both-directions dataset to {output_path}')
+    return run_stages(['both'], output_dir, incremental, rules=rules, near=near, threshold=threshold)
 
 def main():
     parser = argparse.ArgumentParser(description='OpenSubtitles YouTube Dataset Pipeline')
-    parser.add_argument('task', nargs='?', default='all', choices=['all', 'download', 'export', 'parallel', 'clean', 'dedup', 'export-both'], help='Task to run')
+    parser.add_argument('task', nargs='?', default='all', choices=['all', 'download', 'export', 'parallel', 'parallel-pairs', 'clean', 'dedup', 'export-both', 'cached'], help='Task to run')
+    parser.add_argument('--sub-langs', default='en,th', help='Comma-separated subtitle languages to download, e.g. en,th,ja')
+    parser.add_argument('--pairs', default='all', help="Language pairs for parallel-pairs as src:tgt, e.g. en:th,en:zh-Hans, or 'all' for every pair of languages present")
+    parser.add_argument('--download-workers', type=int, default=4, help='Concurrent subtitle downloads')
+    parser.add_argument('--rate', type=float, default=1.0, help='Max YouTube requests per second (shared by all workers)')
+    parser.add_argument('--refresh', action='store_true', help='Re-check videos already recorded in the manifest')
+    parser.add_argument('--cache-ttl', type=float, default=168.0, help='Hours a cached extract_info result stays valid (0 disables the metadata cache)')
+    parser.add_argument('--cache-size', type=int, default=50000, help='Max videos kept in the metadata cache (least recently used are evicted)')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to parse VTT files in export/parallel')
+    parser.add_argument('--aligner', default='overlap', choices=['overlap', 'exact'], help='Cue pairing for the parallel dataset: time overlap or identical start time')
+    parser.add_argument('--min-overlap', type=float, default=0.5, help='Minimum overlap ratio for --aligner overlap')
+    parser.add_argument('--tolerance-ms', type=int, default=200, help='Boundary jitter tolerated by --aligner overlap')
+    parser.add_argument('--collapse', default='auto', choices=['auto', 'on', 'off'], help='Collapse YouTube rolling auto-caption cues at parse time (auto: only files with word timing tags)')
+    parser.add_argument('--shard-rows', type=int, default=1000000, help='Max rows per Parquet shard in dataset_parquet/')
+    parser.add_argument('--buckets', default=format_bounds(DEFAULT_BOUNDS), help='Length bucket upper bounds per unit for the split stage, e.g. tokens:8,16,32/graphemes:32,64,128 (en is measured in tokens, th in graphemes; units not given keep their defaults; every unit needs the same number of bounds)')
+    parser.add_argument('--bucket-rows', type=int, default=100000, help='Max rows per shuffled training shard in dataset_buckets/')
+    parser.add_argument('--seed', type=int, default=0, help='Shuffle seed for the training shards')
+    parser.add_argument('--json-array', action='store_true', help='Write dataset.json as one indented JSON array instead of dataset.jsonl')
+    parser.add_argument('--near-dup', action='store_true', help='Also drop near-duplicate lines/pairs (MinHash/LSH) in dedup and export-both')
+    parser.add_argument('--near-threshold', type=float, default=0.7, help='Estimated character n-gram Jaccard similarity treated as a near duplicate')
+    parser.add_argument('--targets', help='Comma-separated pipeline stages to materialize for all/export-both (see pipeline.STAGES), e.g. export,split,both')
+    parser.add_argument('--full', action='store_true', help='Rebuild every dataset instead of only new/changed inputs')
+    metrics.add_arguments(parser)
     args = parser.parse_args()
+    if not args.rate > 0:
+        parser.error(f'--rate must be greater than 0 (got {args.rate})')
+    metrics.configure_from_args(args)
+    collapse = {'auto': 'auto', 'on': True, 'off': False}[args.collapse]
+    try:
+        buckets = parse_bounds(args.buckets)
+    except ValueError as e:
+        parser.error(str(e))
 
     video_urls = [
         "https://www.youtube.com/watch?v=tEkYbEkl0No",
@@ -377,26 +598,52 @@ def main():
         "https://www.youtube.com/watch?v=4yohVh4qcas",
         "https://www.youtube.com/watch?v=jA3Pa9E2n-g",
     ]
-    sub_langs = ['en', 'th']
+    sub_langs = [lang.strip() for lang in args.sub_langs.split(',') if lang.strip()]
 
-    if args.task == 'download' or args.task == 'all':
+    if args.task in ('all', 'export-both'):
+        # รันเป็น DAG: stage ที่ต่อกันถูกรวมเป็น stream เดียว และข้าม stage ที่ input ไม่เปลี่ยน
+        # export-both สร้าง dataset_parallel_clean_dedup.csv เองจาก dataset_parallel.csv (ไม่ต้องรันสคริปต์แยก)
+        from pipeline import DEFAULT_TARGETS, Pipeline
+        targets = args.targets.split(',') if args.targets else DEFAULT_TARGETS if args.task == 'all' else ['both']
+        print(f'=== Running pipeline: {", ".join(targets)} ===')
+        pipeline = Pipeline(incremental=not args.full, workers=args.workers, collapse=collapse, json_array=args.json_array,
+                            aligner=args.aligner, min_overlap=args.min_overlap, tolerance_ms=args.tolerance_ms,
+                            near=args.near_dup, threshold=args.near_threshold, shard_rows=args.shard_rows,
+                            buckets=buckets, bucket_rows=args.bucket_rows, seed=args.seed)
+        pipeline.run(targets, video_urls=video_urls if args.task == 'all' else None, sub_langs=sub_langs,
+                     download_workers=args.download_workers, rate=args.rate, refresh=args.refresh,
+                     cache_ttl=args.cache_ttl, cache_size=args.cache_size)
+        return
+    if args.task == 'download':
         print('=== Downloading subtitles ===')
-        download_subtitles(video_urls, sub_langs)
-    if args.task == 'export' or args.task == 'all':
+        download_subtitles(video_urls, sub_langs, workers=args.download_workers, rate=args.rate, refresh=args.refresh,
+                           cache_ttl=args.cache_ttl, cache_size=args.cache_size)
+    if args.task == 'cached':
+        # ใช้ stdout เป็นรายการ id อย่างเดียว จึงไม่พิมพ์หัวข้อ
+        for vid in cached_videos(sub_langs, cache_ttl=args.cache_ttl):
+            print(vid)
+    if args.task == 'export':
         print('=== Exporting all VTT to datasets ===')
-        export_all_vtt_to_datasets()
-    if args.task == 'parallel' or args.task == 'all':
+        export_all_vtt_to_datasets(incremental=not args.full, json_array=args.json_array, workers=args.workers, collapse=collapse,
+                                   shard_rows=args.shard_rows)
+    if args.task == 'parallel':
         print('=== Exporting parallel dataset (en-th) ===')
-        export_parallel_dataset()
-    if args.task == 'clean' or args.task == 'all':
+        export_parallel_dataset(incremental=not args.full, workers=args.workers, aligner=args.aligner,
+                                min_overlap=args.min_overlap, tolerance_ms=args.tolerance_ms, collapse=collapse)
+    if args.task == 'parallel-pairs':
+        print(f'=== Exporting parallel datasets ({args.pairs}) ===')
+        try:
+            pairs = parse_lang_pairs(args.pairs)
+        except ValueError as e:
+            parser.error(str(e))
+        export_parallel_pairs(pairs=pairs, incremental=not args.full, workers=args.workers,
+                              aligner=args.aligner, min_overlap=args.min_overlap, tolerance_ms=args.tolerance_ms, collapse=collapse)
+    if args.task == 'clean':
         print('=== Exporting cleaned text dataset ===')
-        export_clean_text()
-    if args.task == 'dedup' or args.task == 'all':
+        export_clean_text(incremental=not args.full)
+    if args.task == 'dedup':
         print('=== Exporting deduplicated text dataset ===')
-        export_clean_text_dedup()
-    if args.task == 'export-both' or args.task == 'all':
-        print('=== Exporting parallel both-directions dataset ===')
-        export_parallel_both_directions()
+        export_clean_text_dedup(incremental=not args.full, near=args.near_dup, threshold=args.near_threshold)
 
 if __name__ == '__main__':
     main()
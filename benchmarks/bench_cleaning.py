@@ -0,0 +1,89 @@
+"""เทียบการ clean ข้อความทั้งคอลัมน์: Series.map(clean_text) แบบเดิม กับ text_cleaning แบบ vectorized
+
+    python benchmarks/bench_cleaning.py --rows 3000000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synth_corpus import sentence  # noqa: E402
+from text_cleaning import TextCleaner  # noqa: E402
+
+
+def legacy_app_clean_text(text):
+    # clean_text เดิมใน app.py
+    text = re.sub(r'<.*?>', '', str(text))
+    text = re.sub(r'\[.*?\]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_parallel_clean_text(text):
+    # clean_text เดิมใน clean_parallel_dataset.py
+    text = re.sub(r'<\d{2}:\d{2}:\d{2}\.\d{3}>', '', str(text))
+    text = re.sub(r'<c>|</c>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def make_column(rows, seed=0):
+    rng = random.Random(seed)
+    pool = []
+    for i in range(5000):
+        lang = 'th' if i % 2 else 'en'
+        words = sentence(rng, lang).split(' ')
+        r = rng.random()
+        if r < 0.3:
+            words = [words[0]] + [f'<00:00:{k % 60:02d}.{k * 37 % 1000:03d}><c> {w}</c>' for k, w in enumerate(words[1:])]
+        elif r < 0.4:
+            words.insert(0, '[Music]')
+        elif r < 0.5 and lang == 'th':
+            words = ['​'.join(words)]
+        pool.append('  '.join(words) if rng.random() < 0.2 else ' '.join(words))
+    return pd.Series([pool[rng.randrange(len(pool))] for _ in range(rows)], dtype=object)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized text cleaning benchmark')
+    parser.add_argument('--rows', type=int, default=3000000)
+    args = parser.parse_args()
+
+    col = make_column(args.rows)
+    cleaner = TextCleaner()
+    cases = [
+        ('legacy app .map(clean_text)', lambda: col.map(legacy_app_clean_text)),
+        ('legacy parallel .map(clean_text)', lambda: col.map(legacy_parallel_clean_text)),
+        ('TextCleaner engine=pandas', lambda: cleaner.clean_series(col, engine='pandas')),
+        ('TextCleaner engine=arrow', lambda: cleaner.clean_series(col, engine='arrow')),
+    ]
+    base = None
+    results = {}
+    for name, fn in cases:
+        out, wall = timed(fn)
+        results[name] = out
+        base = base or wall
+        print(f'{name:34s} {wall:7.2f}s  {args.rows / wall:12.0f} rows/s  {base / wall:5.2f}x')
+    # ผลของ engine ทั้งสองต้องตรงกับ clean ทีละแถว
+    sample = col.iloc[:20000]
+    expected = [cleaner.clean(t) for t in sample]
+    assert list(cleaner.clean_series(sample, engine='arrow')) == expected
+    assert list(cleaner.clean_series(sample, engine='pandas')) == expected
+
+
+if __name__ == '__main__':
+    main()
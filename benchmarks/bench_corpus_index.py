@@ -0,0 +1,86 @@
+"""เทียบการดึง cue ตามวิดีโอ/เวลาผ่าน corpus index (mmap) กับการสแกน dataset.csv
+
+    python benchmarks/bench_corpus_index.py --videos 400 --cues 500 --lookups 2000
+
+วัดเวลาเปิด index, จำนวน lookup ต่อวินาที (at / sample_pairs) และตรวจว่าผลตรงกับ dataset.csv
+"""
+import argparse
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import pandas as pd  # noqa: E402
+
+from app import export_all_vtt_to_datasets  # noqa: E402
+from corpus_index import CorpusIndex  # noqa: E402
+from vtt_parser import parse_ms  # noqa: E402
+
+
+def csv_lookup(csv_path, queries):
+    # วิธีเดิม: อ่าน dataset.csv ทั้งไฟล์แล้ว filter (dataset.csv ไม่มีคอลัมน์ภาษา จึงเทียบเฉพาะ video + เวลา)
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    start = df['start'].map(parse_ms)
+    end = df['end'].map(parse_ms)
+    found = 0
+    for vid, ms in queries:
+        hit = df[(df['video_id'] == vid) & (start <= ms) & (end > ms)]
+        found += len(hit) > 0
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark corpus index lookups against scanning dataset.csv')
+    parser.add_argument('--videos', type=int, default=200)
+    parser.add_argument('--cues', type=int, default=400)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--csv-lookups', type=int, default=50, help='queries answered by the CSV scan (it is slow)')
+    args = parser.parse_args()
+
+    from synth_corpus import generate_corpus
+    tmp = tempfile.mkdtemp(prefix='bench_corpus_index_')
+    try:
+        generate_corpus(tmp, args.videos, args.cues)
+        export_all_vtt_to_datasets(tmp, incremental=False)
+        size = sum(os.path.getsize(p) for p in glob.glob(f'{tmp}/corpus_index/*'))
+        rng = random.Random(0)
+        vids = sorted({os.path.basename(p).split('.')[0] for p in glob.glob(f'{tmp}/*.vtt')})
+        queries = [(rng.choice(vids), rng.randrange(0, args.cues * 2500)) for _ in range(args.lookups)]
+
+        t0 = time.perf_counter()
+        index = CorpusIndex(f'{tmp}/corpus_index')
+        open_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        results = [index.at(vid, 'en', ms) for vid, ms in queries]
+        at_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        pairs = index.sample_pairs(args.lookups, 'en', 'th', seed=0)
+        pairs_s = time.perf_counter() - t0
+        print(f'index: {len(index)} cues, {size / 1e6:.1f} MB, open {open_s * 1000:.2f} ms')
+        print(f'at():           {args.lookups / at_s:10.0f} lookups/s ({sum(r is not None for r in results)} found)')
+        print(f'sample_pairs(): {len(pairs) / pairs_s:10.0f} pairs/s')
+
+        # ตรวจกับ dataset.csv: cue ที่ได้ต้องมีอยู่จริงใน export
+        df = pd.read_csv(f'{tmp}/dataset.csv', dtype=str, keep_default_na=False)
+        rows = set(zip(df['video_id'], df['start'].map(parse_ms), df['text']))
+        bad = sum((r['video_id'], r['start_ms'], r['text']) not in rows for r in results if r is not None)
+        print(f'verified against dataset.csv: {"ok" if not bad else f"{bad} mismatches"}')
+
+        t0 = time.perf_counter()
+        csv_lookup(f'{tmp}/dataset.csv', queries[:args.csv_lookups])
+        csv_s = time.perf_counter() - t0
+        print(f'csv scan:       {args.csv_lookups / csv_s:10.0f} lookups/s (includes reading dataset.csv)')
+        index.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""เทียบการ dedup ข้อความแบบเดิม (list ทั้งไฟล์ / pandas drop_duplicates) กับ dedup.Deduper
+
+    python benchmarks/bench_dedup.py --rows 2000000
+
+สร้างไฟล์ข้อความที่มีทั้งบรรทัดซ้ำเป๊ะ (กระจายทั้งไฟล์ ไม่ได้อยู่ติดกัน) และบรรทัดที่ต่างกัน
+หนึ่งตัวอักษร แต่ละ implementation รันใน subprocess แยกเพื่อวัด peak RSS ของตัวเอง
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def write_corpus(path, rows, seed=0):
+    from synth_corpus import sentence
+    rng = random.Random(seed)
+    uniques = [sentence(rng, 'th' if i % 2 else 'en') for i in range(max(1, rows // 2))]
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(rows):
+            line = rng.choice(uniques)
+            if rng.random() < 0.1:
+                # variant หนึ่งตัวอักษร แบบที่เจอบ่อยใน sub (สะกดต่าง / วรรณยุกต์ / ตัวพิมพ์)
+                k = rng.randrange(len(line))
+                line = line[:k] + rng.choice('aeiouกขค่้') + line[k + 1:]
+            f.write(line + '\n')
+
+
+def legacy_adjacent(input_path, output_path):
+    # export_clean_text_dedup เดิม: โหลดทั้งไฟล์ ลบเฉพาะบรรทัดซ้ำที่อยู่ติดกัน
+    with open(input_path, encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    unique_lines = []
+    prev = None
+    for line in lines:
+        if line != prev:
+            unique_lines.append(line)
+        prev = line
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for line in unique_lines:
+            f.write(line + '\n')
+    return len(unique_lines)
+
+
+def legacy_pandas(input_path, output_path):
+    # แบบ dedup_parallel_dataset.py เดิม: drop_duplicates ทั้งคอลัมน์ใน memory
+    import pandas as pd
+    with open(input_path, encoding='utf-8') as f:
+        df = pd.DataFrame({'text': [line.strip() for line in f if line.strip()]})
+    df = df.drop_duplicates()
+    df.to_csv(output_path, index=False, header=False)
+    return len(df)
+
+
+def hashed(near):
+    def run(input_path, output_path):
+        from dedup import Deduper, dedup_text_file
+        return dedup_text_file(input_path, output_path, Deduper(near=near)).kept
+    return run
+
+
+IMPLS = {'legacy-adjacent': legacy_adjacent, 'legacy-pandas': legacy_pandas,
+         'hash-exact': hashed(False), 'hash-near': hashed(True)}
+
+
+def child(impl, input_path, out):
+    import numpy  # noqa: F401  โหลด library ก่อนวัด baseline ให้ทุกแบบเท่ากัน
+    import pandas  # noqa: F401
+    import pyarrow.compute  # noqa: F401
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    kept = IMPLS[impl](input_path, input_path + '.' + impl)
+    wall = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'impl': impl, 'kept': kept, 'wall_s': round(wall, 3),
+                      'rss_growth_mb': round((peak - base) / 1024, 1)}), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hash-based dedup vs legacy dedup')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--impls', default=','.join(IMPLS))
+    parser.add_argument('--child', nargs=2, metavar=('IMPL', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child, out=sys.stdout)
+        return
+
+    tmp = tempfile.mkdtemp(prefix='bench_dedup_')
+    try:
+        path = os.path.join(tmp, 'text.txt')
+        write_corpus(path, args.rows)
+        print(f'corpus: {args.rows} lines, {os.path.getsize(path) / 1e6:.1f} MB')
+        for impl in args.impls.split(','):
+            out = subprocess.run([sys.executable, __file__, '--child', impl, path],
+                                 check=True, capture_output=True, text=True).stdout
+            print(out.strip())
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark downloader แบบ offline ด้วย stub extractor
+
+    python benchmarks/bench_download.py --videos 200 --workers 8 --latency 0.05
+
+เทียบ loop แบบเดิม (serial + sleep 5 วินาทีทุก URL, คิดเวลา sleep แบบ virtual)
+กับ SubtitleDownloader แบบ concurrent, รันซ้ำเมื่อมีไฟล์ครบ (ต้องไม่ยิง network)
+รันซ้ำแบบมี MetadataCache (วิดีโอที่ไม่มีบางภาษาไม่ต้องเรียก extract_info ซ้ำ)
+และกรณี server จำกัด request/วินาทีเพื่อดูพฤติกรรม backoff เมื่อเจอ 429
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import SubtitleDownloader, available_langs  # noqa: E402
+from metadata_cache import MetadataCache  # noqa: E402
+from stub_extractor import StubServer, make_catalog  # noqa: E402
+
+
+def legacy_download(urls, sub_langs, output_dir, server, delay=5.0):
+    # จำลอง download_subtitles เดิม: extract_info แล้ว ydl.download([url]) ต่อภาษา + sleep ทุกรอบ
+    slept = 0.0
+    opts = {'writesubtitles': True, 'writeautomaticsub': True, 'subtitleslangs': sub_langs,
+            'outtmpl': f'{output_dir}/%(id)s.%(ext)s'}
+    ydl = server.factory(opts)
+    for url in urls:
+        try:
+            info = ydl.extract_info(url, download=False)
+            for lang in sub_langs:
+                path = os.path.join(output_dir, f"{info['id']}.{lang}.vtt")
+                if os.path.exists(path):
+                    continue
+                if lang in available_langs(info):
+                    ydl.extract_info(url, download=True)
+        except Exception:
+            pass
+        slept += delay
+    return slept
+
+
+def run_case(name, server, fn):
+    before = server.requests
+    t0 = time.perf_counter()
+    extra = fn() or 0.0
+    wall = time.perf_counter() - t0 + extra
+    return {'case': name, 'wall_s': round(wall, 3), 'requests': server.requests - before,
+            'throttled': server.throttled}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for the subtitle downloader')
+    parser.add_argument('--videos', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=50.0, help='client token bucket rate (req/s)')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated per-request latency (s)')
+    parser.add_argument('--server-rps', type=float, default=20.0, help='server-side limit for the 429 case')
+    args = parser.parse_args()
+
+    langs = ['en', 'th']
+    catalog = make_catalog(args.videos, langs)
+    urls = list(catalog)
+    rows = []
+    tmp = tempfile.mkdtemp(prefix='bench_download_')
+    try:
+        out = os.path.join(tmp, 'legacy')
+        os.makedirs(out)
+        server = StubServer(catalog, latency=args.latency)
+        rows.append(run_case('legacy serial (virtual 5s sleep)', server,
+                             lambda: legacy_download(urls, langs, out, server)))
+
+        out = os.path.join(tmp, 'concurrent')
+        server = StubServer(catalog, latency=args.latency)
+        dl = SubtitleDownloader(langs, out, workers=args.workers, rate=args.rate, burst=args.workers,
+                                ydl_factory=server.factory, log=None)
+        rows.append(run_case(f'concurrent cold ({args.workers} workers)', server, lambda: dl.run(urls) and 0))
+        rows.append(run_case('concurrent warm rerun', server, lambda: dl.run(urls) and 0))
+
+        out = os.path.join(tmp, 'cached')
+        server = StubServer(catalog, latency=args.latency)
+        for label in ('cold', 'warm rerun'):
+            cache = MetadataCache(os.path.join(out, 'metadata_cache.json'))
+            dl = SubtitleDownloader(langs, out, workers=args.workers, rate=args.rate, burst=args.workers,
+                                    ydl_factory=server.factory, log=None, cache=cache)
+            rows.append(run_case(f'metadata cache {label}', server, lambda: dl.run(urls) and 0))
+            stats = cache.stats()
+            rows[-1].update(cache_hits=stats['hits'], saved_s=round(stats['saved_s'], 3))
+
+        out = os.path.join(tmp, 'throttled')
+        server = StubServer(catalog, latency=args.latency, max_rps=args.server_rps)
+        dl = SubtitleDownloader(langs, out, workers=args.workers, rate=args.rate, burst=args.workers,
+                                backoff_base=0.5, backoff_max=5.0, ydl_factory=server.factory, log=None)
+        results = []
+        rows.append(run_case(f'concurrent vs server limit {args.server_rps:g} rps', server,
+                             lambda: results.extend(dl.run(urls)) or 0))
+        rows[-1]['retries'] = sum(r['retries'] for r in results)
+        rows[-1]['errors'] = sum(1 for r in results if r['error'])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for r in rows:
+        r['videos_per_s'] = round(args.videos / r['wall_s'], 1) if r['wall_s'] else None
+        print(r)
+
+
+if __name__ == '__main__':
+    main()
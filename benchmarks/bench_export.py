@@ -0,0 +1,115 @@
+"""เทียบ export_all_vtt_to_datasets แบบ streaming กับแบบเดิม (list ทั้งหมดใน memory)
+
+    python benchmarks/bench_export.py --videos 400 --cues 500
+
+แต่ละ implementation รันใน subprocess แยกเพื่อวัด peak RSS ของตัวเองจริงๆ
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def legacy_parse_vtt(vtt_path):
+    # parse_vtt ของ app.py ก่อนเปลี่ยนมาใช้ vtt_parser (re.match/re.findall ทีละบรรทัด)
+    entries = []
+    with open(vtt_path, encoding='utf-8') as infile:
+        start, end, text = None, None, ''
+        for line in infile:
+            line = line.strip()
+            if re.match(r'^\d{2}:\d{2}:\d{2}\.\d{3} -->', line):
+                if start and text:
+                    entries.append({'start': start, 'end': end, 'text': text.strip()})
+                times = re.findall(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
+                start, end = times[0], times[1]
+                text = ''
+            elif line and not line.startswith('WEBVTT') and not line.startswith('Kind:') and not line.startswith('Language:'):
+                text += line + ' '
+        if start and text:
+            entries.append({'start': start, 'end': end, 'text': text.strip()})
+    return entries
+
+
+def legacy_export(output_dir):
+    # export_all_vtt_to_datasets ของ app.py ก่อนเปลี่ยนเป็น streaming (list ทั้งหมดใน memory, pandas เขียน Parquet)
+    import pandas as pd
+    all_entries = []
+    for vtt in glob.glob(f'{output_dir}/*.vtt'):
+        entries = legacy_parse_vtt(vtt)
+        for e in entries:
+            e['video_id'] = os.path.splitext(os.path.basename(vtt))[0].split('.')[0]
+        all_entries.extend(entries)
+    with open(f'{output_dir}/dataset.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['video_id', 'start', 'end', 'text'])
+        writer.writeheader()
+        writer.writerows(all_entries)
+    with open(f'{output_dir}/dataset.json', 'w', encoding='utf-8') as f:
+        json.dump(all_entries, f, ensure_ascii=False, indent=2)
+    pd.DataFrame(all_entries).to_parquet(f'{output_dir}/dataset.parquet', index=False)
+    return len(all_entries)
+
+
+def streaming_export(output_dir):
+    from app import export_all_vtt_to_datasets
+    export_all_vtt_to_datasets(output_dir, incremental=False)
+    with open(f'{output_dir}/dataset.csv', encoding='utf-8') as f:
+        return sum(1 for _ in f) - 1
+
+
+def child(impl, output_dir, out):
+    import pandas  # noqa: F401  โหลด library ก่อนเริ่มจับเวลา/baseline ให้ทั้งสองแบบเท่ากัน
+    import pyarrow.parquet  # noqa: F401
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    rows = {'legacy': legacy_export, 'streaming': streaming_export}[impl](output_dir)
+    wall = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'impl': impl, 'rows': rows, 'wall_s': round(wall, 3),
+                      'rows_per_s': round(rows / wall), 'peak_rss_mb': round(peak / 1024, 1),
+                      'rss_growth_mb': round((peak - base) / 1024, 1)}), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming vs in-memory dataset export')
+    parser.add_argument('--videos', type=int, default=200)
+    parser.add_argument('--cues', type=int, default=400)
+    parser.add_argument('--child', nargs=2, metavar=('IMPL', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        # ปิด print ของ pipeline ให้เหลือแค่บรรทัดผลลัพธ์ JSON
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                child(*args.child, out=stdout)
+            finally:
+                sys.stdout = stdout
+        return
+
+    from synth_corpus import generate_corpus
+    tmp = tempfile.mkdtemp(prefix='bench_export_')
+    try:
+        files = generate_corpus(tmp, args.videos, args.cues)
+        size = sum(os.path.getsize(p) for p in glob.glob(f'{tmp}/*.vtt'))
+        print(f'corpus: {files} files, {size / 1e6:.1f} MB')
+        for impl in ('legacy', 'streaming'):
+            out = subprocess.run([sys.executable, __file__, '--child', impl, tmp],
+                                 check=True, capture_output=True, text=True).stdout
+            print(out.strip())
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""เทียบการสร้าง parallel dataset หลายคู่ภาษา: export_parallel_dataset ทีละคู่ กับ export_parallel_pairs รอบเดียว
+
+    python benchmarks/bench_pairs.py --videos 200 --cues 300 --langs en,th,ja,zh
+
+แบบทีละคู่ต้องสแกนโฟลเดอร์และ parse ไฟล์ซ้ำทุกคู่ (ไฟล์ละ จำนวนภาษา - 1 ครั้ง)
+แบบรอบเดียว parse ทุกไฟล์ครั้งเดียวแล้วส่งต่อให้ทุกคู่
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import metrics  # noqa: E402
+from app import export_parallel_dataset, export_parallel_pairs  # noqa: E402
+from synth_corpus import generate_corpus  # noqa: E402
+
+
+def parse_calls(log_path, stage):
+    import json
+    calls = 0
+    with open(log_path, encoding='utf-8') as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec['type'] == 'stage' and rec['stage'] == stage:
+                calls += rec['counters'].get('parse_calls', 0)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-pass multi-pair parallel export')
+    parser.add_argument('--videos', type=int, default=100)
+    parser.add_argument('--cues', type=int, default=300)
+    parser.add_argument('--langs', default='en,th,ja,zh')
+    args = parser.parse_args()
+
+    langs = args.langs.split(',')
+    pairs = [(a, b) for i, a in enumerate(langs) for b in langs[i + 1:]]
+    tmp = tempfile.mkdtemp(prefix='bench_pairs_')
+    try:
+        generate_corpus(tmp, args.videos, args.cues, langs, jitter=200)
+        log = os.path.join(tmp, 'metrics.jsonl')
+        metrics.configure(log)
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            for src, tgt in pairs:
+                export_parallel_dataset(tmp, src, tgt, incremental=False)
+            per_pair = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            export_parallel_pairs(tmp, pairs, incremental=False)
+            single = time.perf_counter() - t0
+        metrics.disable()
+        files = args.videos * len(langs)
+        print(f'{len(pairs)} pairs over {files} files')
+        print(f'per pair:    {per_pair:7.2f}s  ({parse_calls(log, "parallel")} parses)')
+        print(f'single pass: {single:7.2f}s  ({parse_calls(log, "parallel_pairs")} parses)')
+        print(f'speedup: {per_pair / single:.2f}x')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""วัดการ scale ของการ parse VTT ด้วย process pool จาก 1 ถึง N worker
+
+    python benchmarks/bench_parse_scaling.py --videos 1000 --cues 400 --max-workers 32
+
+รายงานทั้ง parse อย่างเดียว (parse_files) และ export_all_vtt_to_datasets ทั้งขั้นตอน
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from app import export_all_vtt_to_datasets  # noqa: E402
+from parse_pool import parse_files  # noqa: E402
+from synth_corpus import generate_corpus  # noqa: E402
+
+
+def worker_counts(max_workers):
+    n, counts = 1, []
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process-pool VTT parsing scaling benchmark')
+    parser.add_argument('--videos', type=int, default=500)
+    parser.add_argument('--cues', type=int, default=400)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_scaling_')
+    try:
+        generate_corpus(tmp, args.videos, args.cues)
+        paths = sorted(glob.glob(f'{tmp}/*.vtt'))
+        base = None
+        for workers in worker_counts(args.max_workers):
+            t0 = time.perf_counter()
+            rows = sum(len(columns) for _, columns in parse_files(paths, workers))
+            parse_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                export_all_vtt_to_datasets(tmp, incremental=False, workers=workers)
+            export_s = time.perf_counter() - t0
+            base = base or parse_s
+            print(f'workers={workers:3d}  parse {rows / parse_s:10.0f} rows/s  speedup {base / parse_s:5.2f}x'
+                  f'  |  export {export_s:7.2f}s')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
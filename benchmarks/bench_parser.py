@@ -0,0 +1,80 @@
+"""Micro-benchmark: parse_vtt เดิม (re.match/re.findall ทีละบรรทัด) เทียบกับ vtt_parser
+
+    python benchmarks/bench_parser.py --files 20 --cues 20000
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import vtt_parser  # noqa: E402
+from synth_corpus import generate_corpus  # noqa: E402
+
+
+def legacy_parse_vtt(vtt_path):
+    # parse_vtt ของ app.py ก่อนเปลี่ยนมาใช้ vtt_parser
+    entries = []
+    with open(vtt_path, encoding='utf-8') as infile:
+        start, end, text = None, None, ''
+        for line in infile:
+            line = line.strip()
+            if re.match(r'^\d{2}:\d{2}:\d{2}\.\d{3} -->', line):
+                if start and text:
+                    entries.append({'start': start, 'end': end, 'text': text.strip()})
+                times = re.findall(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
+                start, end = times[0], times[1]
+                text = ''
+            elif line and not line.startswith('WEBVTT') and not line.startswith('Kind:') and not line.startswith('Language:'):
+                text += line + ' '
+        if start and text:
+            entries.append({'start': start, 'end': end, 'text': text.strip()})
+    return entries
+
+
+CASES = {
+    'legacy parse_vtt': lambda p: len(legacy_parse_vtt(p)),
+    'vtt_parser.parse_vtt (dicts)': lambda p: len(vtt_parser.parse_vtt(p)),
+    'vtt_parser.iter_cues': lambda p: sum(1 for _ in vtt_parser.iter_cues(p)),
+    'vtt_parser.parse_columns': lambda p: len(vtt_parser.parse_columns(p)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VTT parser micro-benchmark')
+    parser.add_argument('--files', type=int, default=10, help='number of videos (x2 languages)')
+    parser.add_argument('--cues', type=int, default=20000, help='cues per file')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_parser_')
+    try:
+        generate_corpus(tmp, args.files, args.cues)
+        paths = sorted(os.path.join(tmp, f) for f in os.listdir(tmp))
+        size = sum(os.path.getsize(p) for p in paths)
+        # ผลต้องตรงกับ parser เดิมก่อนจะวัดความเร็ว
+        for p in paths[:2]:
+            assert vtt_parser.parse_vtt(p) == legacy_parse_vtt(p), p
+        print(f'{len(paths)} files, {size / 1e6:.1f} MB')
+        base = None
+        for name, fn in CASES.items():
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                rows = sum(fn(p) for p in paths)
+                wall = time.perf_counter() - t0
+                best = wall if best is None else min(best, wall)
+            base = base or best
+            print(f'{name:32s} {rows / best:12.0f} cues/s  {size / best / 1e6:7.1f} MB/s  {base / best:5.2f}x')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""เทียบการรันทีละคำสั่ง (app.py export / parallel / clean / dedup + สคริปต์แยก) กับ pipeline.Pipeline ที่รวม stage เป็น stream เดียว
+
+    python benchmarks/bench_pipeline.py --videos 200 --cues 400
+
+ทั้งสองแบบสร้าง output ชุดเดียวกันจาก corpus สังเคราะห์ (ไม่มี network) แล้วเทียบว่าไฟล์ตรงกัน
+"""
+import argparse
+import filecmp
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+TARGETS = ['export', 'parallel', 'text', 'text-dedup', 'parallel-clean', 'parallel-dedup', 'split', 'both']
+
+
+def legacy(d):
+    import app
+    from bucket_parallel_dataset import bucket_parallel_dataset
+    from clean_parallel_dataset import clean_parallel_dataset
+    from dedup_parallel_dataset import dedup_parallel_dataset
+    # ทีละคำสั่ง: แต่ละ stage หลัง export / parallel อ่านไฟล์ต้นทางของ chain ใหม่ทุกครั้ง
+    app.export_all_vtt_to_datasets(d, incremental=False)
+    app.export_parallel_dataset(d, incremental=False)
+    app.export_clean_text(d, incremental=False)
+    app.export_clean_text_dedup(d, incremental=False)
+    clean_parallel_dataset(d, incremental=False)
+    dedup_parallel_dataset(d, incremental=False)
+    bucket_parallel_dataset(d, incremental=False)
+    app.export_parallel_both_directions(d, incremental=False)
+
+
+def fused(d):
+    from pipeline import Pipeline
+    return Pipeline(d, incremental=False).run(TARGETS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fused pipeline runner against the step-by-step run')
+    parser.add_argument('--videos', type=int, default=100)
+    parser.add_argument('--cues', type=int, default=400)
+    args = parser.parse_args()
+
+    from synth_corpus import generate_corpus
+    tmp = tempfile.mkdtemp(prefix='bench_pipeline_')
+    try:
+        dirs = {}
+        for name in ('legacy', 'fused'):
+            dirs[name] = os.path.join(tmp, name)
+            generate_corpus(dirs[name], args.videos, args.cues)
+        walls = {}
+        for name, fn in (('legacy', legacy), ('fused', fused)):
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                t0 = time.perf_counter()
+                report = fn(dirs[name])
+                walls[name] = time.perf_counter() - t0
+            print(f'{name:8s} {walls[name]:7.2f}s')
+        for r in report:
+            print(f'  {r["stage"]:16s} {r["status"]:9s} {r["wall_s"]:7.2f}s {r["bytes_written"]:>12d} B')
+        print(f'speedup: {walls["legacy"] / walls["fused"]:.2f}x')
+        # dataset_parquet / dataset_buckets เป็นโฟลเดอร์ shard: เทียบทุกไฟล์ข้างใน
+        outputs = sorted(os.path.relpath(p, dirs['legacy']) for p in glob.glob(os.path.join(dirs['legacy'], 'dataset*'))
+                         + glob.glob(os.path.join(dirs['legacy'], 'dataset_*', '**', '*'), recursive=True)
+                         if os.path.isfile(p))
+        _, mismatch, errors = filecmp.cmpfiles(dirs['legacy'], dirs['fused'], outputs, shallow=False)
+        print('outputs identical' if not mismatch and not errors else f'outputs differ: {mismatch + errors}')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
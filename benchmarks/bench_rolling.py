@@ -0,0 +1,66 @@
+"""วัดผลการยุบ rolling auto caption ตอน parse: จำนวนแถวที่ลดลงและเวลาทั้ง pipeline
+
+    python benchmarks/bench_rolling.py --videos 200 --cues 300
+
+สร้าง corpus auto caption แบบ YouTube (ทั้ง en และ th) แล้วรัน export -> parallel -> clean -> dedup
+เทียบ collapse=False (แบบเดิม) กับ collapse='auto'
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import app  # noqa: E402
+from synth_corpus import generate_corpus  # noqa: E402
+
+
+def count_rows(path):
+    with open(path, encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+
+def run_pipeline(corpus, out_dir, collapse):
+    shutil.copytree(corpus, out_dir)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.export_all_vtt_to_datasets(out_dir, incremental=False, collapse=collapse)
+        app.export_parallel_dataset(out_dir, incremental=False, collapse=collapse)
+        app.export_clean_text(out_dir, incremental=False)
+        app.export_clean_text_dedup(out_dir, incremental=False)
+    wall = time.perf_counter() - t0
+    return {'collapse': collapse, 'wall_s': round(wall, 3),
+            'dataset_rows': count_rows(f'{out_dir}/dataset.csv') - 1,
+            'parallel_rows': count_rows(f'{out_dir}/dataset_parallel.csv') - 1,
+            'dedup_lines': count_rows(f'{out_dir}/dataset_text_only_dedup.txt')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling auto-caption collapse benchmark')
+    parser.add_argument('--videos', type=int, default=100)
+    parser.add_argument('--cues', type=int, default=300, help='spoken segments per video')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_rolling_')
+    try:
+        corpus = os.path.join(tmp, 'corpus')
+        generate_corpus(corpus, args.videos, args.cues, rolling=('en', 'th'))
+        before = run_pipeline(corpus, os.path.join(tmp, 'off'), False)
+        after = run_pipeline(corpus, os.path.join(tmp, 'auto'), 'auto')
+        print(before)
+        print(after)
+        print(f"dataset rows -{1 - after['dataset_rows'] / before['dataset_rows']:.0%}, "
+              f"pipeline speedup {before['wall_s'] / after['wall_s']:.2f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
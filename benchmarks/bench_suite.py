@@ -0,0 +1,215 @@
+"""ชุด benchmark ของทั้ง pipeline บน corpus สังเคราะห์ (offline, ใช้แต่ไฟล์ในเครื่อง)
+
+    python benchmarks/bench_suite.py --videos 200 --cues 400 --output bench_report.json
+    python benchmarks/bench_suite.py --baseline bench_report.json --threshold 0.25
+
+corpus เป็นคู่ en/th แบบ deterministic: en เป็น auto caption แบบ rolling, th มี tag เวลาราย word
+บางส่วนและขอบ cue ขยับแบบสุ่ม (jitter) เทียบกับ en
+
+แต่ละ stage รันต่อกันบนโฟลเดอร์เดียวกันแต่แยก subprocess เพื่อวัด peak RSS ของ stage นั้นจริงๆ:
+parse, export, align, clean, dedup, split, both
+วัด wall time, rows/s (จำนวนแถวที่ stage รับเข้า) และ peak memory แล้วเขียนเป็น JSON
+ถ้าให้ --baseline จะเทียบกับรายงานเก่าและ exit 1 เมื่อ stage ไหนช้าลง / ใช้ memory มากขึ้นเกิน threshold
+"""
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+STAGES = ['parse', 'export', 'align', 'clean', 'dedup', 'split', 'both']
+
+
+def csv_rows(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def stage_parse(d):
+    from vtt_parser import parse_columns
+    return sum(len(parse_columns(p)) for p in sorted(glob.glob(f'{d}/*.vtt')))
+
+
+def stage_export(d):
+    from app import export_all_vtt_to_datasets
+    export_all_vtt_to_datasets(d, incremental=False)
+    return csv_rows(f'{d}/dataset.csv')
+
+
+def stage_align(d):
+    from app import export_parallel_dataset
+    export_parallel_dataset(d, incremental=False)
+    return csv_rows(f'{d}/dataset.csv')
+
+
+def chain_stage(d, stage, rows_from):
+    # stage ที่อยู่ใน chain ของ parallel รันแบบเดียวกับคำสั่งที่รันทีละ stage (อ่าน dataset_parallel.csv แล้วทำ stage
+    # ก่อนหน้าใน memory) เวลาที่รายงานใช้ของ stage นั้นเองจาก Pipeline ไม่รวม stage ก่อนหน้าใน chain
+    from pipeline import Pipeline
+    pipeline = Pipeline(d, incremental=False)
+    pipeline.run([stage], upstream=False)
+    return csv_rows(f'{d}/{rows_from}'), pipeline.timings[stage]
+
+
+def stage_clean(d):
+    return chain_stage(d, 'parallel-clean', 'dataset_parallel.csv')
+
+
+def stage_dedup(d):
+    return chain_stage(d, 'parallel-dedup', 'dataset_parallel_clean.csv')
+
+
+def stage_split(d):
+    return chain_stage(d, 'split', 'dataset_parallel_clean_dedup.csv')
+
+
+def stage_both(d):
+    return chain_stage(d, 'both', 'dataset_parallel_clean_dedup.csv')
+
+
+def child(stage, d, out):
+    import numpy  # noqa: F401  โหลด library ก่อนวัด baseline ให้ทุก stage เท่ากัน
+    import pandas  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        rows = globals()[f'stage_{stage}'](d)
+        wall = time.perf_counter() - t0
+    if isinstance(rows, tuple):
+        rows, wall = rows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss เป็น KB บน Linux, byte บน macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    print(json.dumps({'stage': stage, 'rows': rows, 'wall_s': wall, 'peak_rss_mb': peak * unit / 1e6,
+                      'rss_growth_mb': (peak - base) * unit / 1e6}), file=out)
+
+
+def run_stage(stage, d):
+    out = subprocess.run([sys.executable, __file__, '--child', stage, d], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(corpus, stages, repeat, work_dir):
+    from synth_corpus import generate_corpus
+    results = {}
+    for r in range(repeat):
+        d = os.path.join(work_dir, f'run{r}')
+        generate_corpus(d, **corpus)
+        for stage in stages:
+            res = run_stage(stage, d)
+            best = results.get(stage)
+            # เวลาใช้ค่าที่ดีที่สุด (ลด noise), memory ใช้ค่าที่มากที่สุด
+            if best is None:
+                results[stage] = res
+            else:
+                best['wall_s'] = min(best['wall_s'], res['wall_s'])
+                best['peak_rss_mb'] = max(best['peak_rss_mb'], res['peak_rss_mb'])
+                best['rss_growth_mb'] = max(best['rss_growth_mb'], res['rss_growth_mb'])
+        shutil.rmtree(d, ignore_errors=True)
+    for res in results.values():
+        res['rows_per_s'] = round(res['rows'] / res['wall_s']) if res['wall_s'] else None
+        res['wall_s'] = round(res['wall_s'], 4)
+        res['peak_rss_mb'] = round(res['peak_rss_mb'], 1)
+        res['rss_growth_mb'] = round(res['rss_growth_mb'], 1)
+    return [results[s] for s in stages]
+
+
+def compare(report, baseline, threshold, mem_threshold):
+    """คืน list ของข้อความ regression (ว่าง = ผ่าน)"""
+    if baseline.get('corpus') != report['corpus']:
+        print('warning: baseline was measured on a different corpus; rows/s is compared anyway')
+    old = {r['stage']: r for r in baseline.get('stages', [])}
+    failures = []
+    for r in report['stages']:
+        b = old.get(r['stage'])
+        if b is None:
+            continue
+        if b.get('rows_per_s') and r['rows_per_s'] is not None and r['rows_per_s'] < b['rows_per_s'] * (1 - threshold):
+            failures.append(f"{r['stage']}: {r['rows_per_s']} rows/s vs baseline {b['rows_per_s']} "
+                            f"({r['rows_per_s'] / b['rows_per_s'] - 1:+.0%})")
+        if b.get('rss_growth_mb') and r['rss_growth_mb'] > max(b['rss_growth_mb'] * (1 + mem_threshold), b['rss_growth_mb'] + 5):
+            failures.append(f"{r['stage']}: memory growth {r['rss_growth_mb']} MB vs baseline {b['rss_growth_mb']} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for every pipeline stage')
+    parser.add_argument('--videos', type=int, default=100)
+    parser.add_argument('--cues', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tags', type=float, default=0.3, help='fraction of th cues with inline timing tags')
+    parser.add_argument('--jitter', type=int, default=200, help='random ms shift of th cue boundaries')
+    parser.add_argument('--rolling', default='en', help='languages written as rolling auto captions')
+    parser.add_argument('--stages', default=','.join(STAGES), help='comma-separated subset of ' + ','.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage (best wall time is kept)')
+    parser.add_argument('--output', default='bench_report.json', help='where to write the JSON report')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed rows/s drop vs baseline (0.25 = 25%%)')
+    parser.add_argument('--mem-threshold', type=float, default=0.25, help='allowed memory growth vs baseline')
+    parser.add_argument('--child', nargs=2, metavar=('STAGE', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child, out=sys.stdout)
+        return
+
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(unknown)}')
+    # stage ต้องรันตามลำดับเพราะใช้ output ของ stage ก่อนหน้า
+    stages = STAGES[:max(STAGES.index(s) for s in stages) + 1]
+    corpus = {'videos': args.videos, 'cues': args.cues, 'seed': args.seed, 'tags': args.tags,
+              'jitter': args.jitter, 'rolling': [lang for lang in args.rolling.split(',') if lang]}
+    tmp = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        results = run_suite(corpus, stages, max(1, args.repeat), tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    wanted = set(args.stages.split(','))
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': git_commit(),
+              'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+              'corpus': corpus, 'repeat': args.repeat, 'stages': [r for r in results if r['stage'] in wanted]}
+
+    print(f'{"stage":8s} {"rows":>9s} {"wall_s":>8s} {"rows/s":>10s} {"peak MB":>8s} {"+MB":>6s}')
+    for r in report['stages']:
+        print(f'{r["stage"]:8s} {r["rows"]:9d} {r["wall_s"]:8.3f} {r["rows_per_s"] or 0:10d} '
+              f'{r["peak_rss_mb"]:8.1f} {r["rss_growth_mb"]:6.1f}')
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures = compare(report, baseline, args.threshold, args.mem_threshold)
+        for msg in failures:
+            print('REGRESSION', msg)
+        if failures:
+            sys.exit(1)
+        print(f'No regressions vs {args.baseline} (threshold {args.threshold:.0%})')
+
+
+if __name__ == '__main__':
+    main()
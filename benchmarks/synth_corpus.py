@@ -0,0 +1,117 @@
+"""สร้าง corpus VTT สังเคราะห์แบบ deterministic สำหรับ benchmark
+
+    python benchmarks/synth_corpus.py /tmp/corpus --videos 500 --cues 400
+"""
+import argparse
+import os
+import random
+
+EN_WORDS = ('the a we you they time go know people really think good make look want way thing '
+            'right come back work year day take love tell life world need feel little here now').split()
+TH_WORDS = ('ผม คุณ เรา เขา ไป มา ได้ ที่ จะ ไม่ มี เป็น ว่า ก็ แล้ว ครับ ค่ะ นะ วันนี้ อยาก '
+            'รู้ ดี มาก คน เวลา ทำ งาน ชีวิต โลก รัก บ้าน').split()
+
+
+def ts(ms):
+    h, rem = divmod(ms, 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f'{h:02d}:{m:02d}:{s:02d}.{ms:03d}'
+
+
+def sentence(rng, lang, lo=3, hi=12):
+    words = TH_WORDS if lang == 'th' else EN_WORDS
+    sep = '' if lang == 'th' and rng.random() < 0.5 else ' '
+    return sep.join(rng.choice(words) for _ in range(rng.randint(lo, hi)))
+
+
+def write_vtt(path, cues, lang):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'WEBVTT\nKind: captions\nLanguage: {lang}\n\n')
+        for start, end, text in cues:
+            f.write(f'{ts(start)} --> {ts(end)}\n{text}\n\n')
+
+
+def write_rolling_vtt(path, cues, lang):
+    # รูปแบบ auto caption ของ YouTube: บรรทัดก่อนหน้าค้างบนจอ + บรรทัดใหม่มี tag เวลาราย word
+    # แล้วตามด้วย cue 10ms ที่มีแต่บรรทัดที่เพิ่งพูดจบ
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'WEBVTT\nKind: captions\nLanguage: {lang}\n\n')
+        prev = ' '
+        for start, end, text in cues:
+            words = text.split(' ')
+            step = max(1, (end - start - 10) // max(1, len(words)))
+            tagged = words[0] + ''.join(f'<{ts(start + k * step)}><c> {w}</c>' for k, w in enumerate(words[1:], 1))
+            f.write(f'{ts(start)} --> {ts(end - 10)} align:start position:0%\n{prev}\n{tagged}\n\n')
+            f.write(f'{ts(end - 10)} --> {ts(end)} align:start position:0%\n{text}\n \n\n')
+            prev = text
+
+
+def add_inline_tags(rng, text, start, end):
+    # tag เวลาราย word และ <c.colorXXXXXX> แบบที่เจอใน cue ปกติ (ไม่ใช่ rolling)
+    words = text.split(' ')
+    step = max(1, (end - start) // max(1, len(words)))
+    color = rng.choice(('<c>', '<c.colorE5E5E5>', '<c.colorCCCCCC>'))
+    return words[0] + ''.join(f'<{ts(start + k * step)}>{color} {w}</c>' for k, w in enumerate(words[1:], 1))
+
+
+def jitter_times(rng, times, jitter):
+    # ขยับขอบ cue ของอีกภาษาแบบสุ่ม ±jitter ms (แต่ยังเรียงตามเวลาและยาวอย่างน้อย 100ms)
+    out = []
+    prev_end = 0
+    for start, end in times:
+        start = max(prev_end, start + rng.randint(-jitter, jitter))
+        end = max(start + 100, end + rng.randint(-jitter, jitter))
+        out.append((start, end))
+        prev_end = end
+    return out
+
+
+def generate_corpus(out_dir, videos=100, cues=200, langs=('en', 'th'), seed=0, rolling=(), tags=0.0, jitter=0):
+    """เขียน {vid}.{lang}.vtt ลง out_dir คืนจำนวนไฟล์ที่สร้าง
+
+    rolling: ภาษาที่จะเขียนเป็น auto caption แบบ rolling ของ YouTube
+    tags: สัดส่วน cue (ที่ไม่ใช่ rolling) ที่มี tag เวลาราย word / <c.colorXXXXXX>
+    jitter: ms ที่ขยับขอบ cue ของภาษาที่ 2 เป็นต้นไปแบบสุ่ม (ทดสอบ aligner แบบช่วงเวลาทับกัน)
+    ค่าเริ่มต้น tags=0, jitter=0 ได้ corpus เดิมทุกไบต์
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    n = 0
+    for v in range(videos):
+        vid = f'syn{v:07d}'
+        times = []
+        t = rng.randint(0, 2000)
+        for _ in range(cues):
+            dur = rng.randint(800, 4000)
+            times.append((t, t + dur))
+            t += dur + (0 if rolling else rng.randint(0, 500))
+        for i, lang in enumerate(langs):
+            write = write_rolling_vtt if lang in rolling else write_vtt
+            lang_times = jitter_times(rng, times, jitter) if jitter and i else times
+            cue_list = [(s, e, sentence(rng, lang)) for s, e in lang_times]
+            if tags and lang not in rolling:
+                cue_list = [(s, e, add_inline_tags(rng, t, s, e) if rng.random() < tags else t) for s, e, t in cue_list]
+            write(os.path.join(out_dir, f'{vid}.{lang}.vtt'), cue_list, lang)
+            n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic VTT corpus')
+    parser.add_argument('out_dir')
+    parser.add_argument('--videos', type=int, default=100)
+    parser.add_argument('--cues', type=int, default=200)
+    parser.add_argument('--langs', default='en,th')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rolling', default='', help='languages written as YouTube rolling auto captions, e.g. en')
+    parser.add_argument('--tags', type=float, default=0.0, help='fraction of plain cues carrying inline timing/<c> tags')
+    parser.add_argument('--jitter', type=int, default=0, help='random ms shift of cue boundaries in the second and later languages')
+    args = parser.parse_args()
+    n = generate_corpus(args.out_dir, args.videos, args.cues, args.langs.split(','), args.seed,
+                        [lang for lang in args.rolling.split(',') if lang], args.tags, args.jitter)
+    print(f'Wrote {n} VTT files to {args.out_dir}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import argparse
+
+import metrics
+from app import run_stages
+from length_buckets import DEFAULT_BOUNDS, format_bounds, parse_bounds
+
+
+@metrics.timed('buckets')
+def bucket_parallel_dataset(output_dir='subtitles', incremental=True, bounds=DEFAULT_BOUNDS, shard_rows=100000, seed=0,
+                            near=False, threshold=0.7):
+    # แบ่งคู่แปลที่ clean/dedup แล้วตามความยาวจริง (แทนการแบ่ง long/short ด้วยบรรทัดคู่/คี่แบบเดิม) -> dataset_buckets/
+    # เป็น stage split ของ pipeline: อ่าน dataset_parallel.csv แล้ว clean/dedup ระหว่างทาง (manifest เดียวกับ export-both)
+    return run_stages(['split'], output_dir, incremental, buckets=bounds, bucket_rows=shard_rows, seed=seed,
+                      near=near, threshold=threshold)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Split the deduplicated parallel dataset into length buckets of shuffled training shards')
+    parser.add_argument('--buckets', default=format_bounds(DEFAULT_BOUNDS), help='Bucket upper bounds per unit, e.g. tokens:8,16,32/graphemes:32,64,128 (en tokens, th graphemes)')
+    parser.add_argument('--bucket-rows', type=int, default=100000, help='Max rows per shuffled shard')
+    parser.add_argument('--seed', type=int, default=0, help='Shuffle seed')
+    parser.add_argument('--full', action='store_true', help='Rebuild even if the manifest says the output is up to date')
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        bounds = parse_bounds(args.buckets)
+    except ValueError as e:
+        parser.error(str(e))
+    metrics.configure_from_args(args)
+    bucket_parallel_dataset(incremental=not args.full, bounds=bounds, shard_rows=args.bucket_rows, seed=args.seed)
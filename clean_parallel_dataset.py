@@ -1,18 +1,21 @@
-import pandas as pd
-import re
+import argparse
 
-def clean_text(text):
-    # ลบ <00:00:xx.xxx> และ <c>...</c>
-    text = re.sub(r'<\d{2}:\d{2}:\d{2}\.\d{3}>', '', str(text))
-    text = re.sub(r'<c>|</c>', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+import metrics
+from app import run_stages
+from text_cleaning import DEFAULT_RULES
 
-input_path = 'subtitles/dataset_parallel.csv'
-output_path = 'subtitles/dataset_parallel_clean.csv'
 
-df = pd.read_csv(input_path)
-df['text_original'] = df['text_original'].map(clean_text)
-df['text_thai'] = df['text_thai'].map(clean_text)
-df.to_csv(output_path, index=False, encoding='utf-8')
-print(f'Exported cleaned parallel dataset to {output_path}')
+@metrics.timed('clean_parallel')
+def clean_parallel_dataset(output_dir='subtitles', incremental=True, rules=DEFAULT_RULES):
+    # ลบ <00:00:xx.xxx>, <c>...</c>, [Music] ฯลฯ ทั้งคอลัมน์ในรอบเดียว (ใช้กฎชุดเดียวกับ app.export_clean_text)
+    # dataset_parallel.csv -> dataset_parallel_clean.csv เป็น stage parallel-clean ของ pipeline (manifest เดียวกับ export-both)
+    return run_stages(['parallel-clean'], output_dir, incremental, rules=rules)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clean the parallel dataset')
+    parser.add_argument('--full', action='store_true', help='Rebuild even if the manifest says the output is up to date')
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+    clean_parallel_dataset(incremental=not args.full)
@@ -0,0 +1,333 @@
+"""index แบบไบนารีของ cue ทั้ง corpus เปิดด้วย mmap เพื่อดึง cue ตามวิดีโอ/เวลาแบบสุ่มได้ทันที
+
+โครงสร้างโฟลเดอร์ (สร้างตอน export ที่ subtitles/corpus_index/):
+- text.bin         : ข้อความ UTF-8 ของทุก cue ต่อกันเป็นก้อนเดียว
+- offsets.npy      : int64 (cues + 1) ตำแหน่งไบต์เริ่มของแต่ละ cue ใน text.bin
+- start_ms.npy     : int32 เวลาเริ่มของแต่ละ cue (เรียงจากน้อยไปมากภายใน track เดียวกัน)
+- end_ms.npy       : int32 เวลาจบ
+- track_rows.npy   : int64 (tracks + 1) แถวแรกของแต่ละ track (track = วิดีโอ + ภาษา = ไฟล์ .vtt หนึ่งไฟล์)
+- track_video.npy  : int32 ลำดับวิดีโอของแต่ละ track
+- track_lang.npy   : int16 ลำดับภาษา (ใน meta.json) ของแต่ละ track
+- video_tracks.npy : int32 track ของแต่ละวิดีโอเรียงต่อกัน, video_track_start.npy : int64 (videos + 1)
+- video_ids.bin / video_offsets.npy : id ของวิดีโอต่อกันเป็นก้อนเดียว
+- video_hash.npy   : hash table แบบ open addressing (FNV-1a 64 บิต + linear probing) จาก video id -> ลำดับวิดีโอ
+- meta.json        : จำนวน cue/วิดีโอ/track และรายชื่อภาษา
+
+ตอนเปิดอ่านแค่ meta.json แล้ว mmap ไฟล์ที่เหลือ เวลาเปิดจึงไม่ขึ้นกับขนาด corpus
+หา video id ผ่าน hash table และหา cue ตามเวลาด้วย binary search ภายใน track
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import shutil
+from array import array
+
+import numpy as np
+
+from vtt_parser import format_ms, parse_ms, timestamps_to_ms
+
+VERSION = 1
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK64 = (1 << 64) - 1
+
+
+def video_hash(video_id):
+    """FNV-1a 64 บิตของ video id (UTF-8)"""
+    h = _FNV_OFFSET
+    for b in video_id.encode('utf-8'):
+        h = ((h ^ b) * _FNV_PRIME) & _MASK64
+    return h
+
+
+def _build_hash_table(video_ids):
+    size = 8
+    while size < 2 * len(video_ids):
+        size *= 2
+    table = np.full(size, -1, dtype=np.int32)
+    mask = size - 1
+    for i, vid in enumerate(video_ids):
+        slot = video_hash(vid) & mask
+        while table[slot] != -1:
+            slot = (slot + 1) & mask
+        table[slot] = i
+    return table
+
+
+class CorpusIndexWriter:
+    """สร้าง corpus index ทีละแถว (ใช้เป็น writer/tap ของ export ได้)
+
+    row ต้องมี video_id, lang, start, end ('HH:MM:SS.mmm') และ text
+    แถวของ track เดียวกันต้องมาติดกัน (export ส่งทีละไฟล์ .vtt อยู่แล้ว) จะถูกเรียงตามเวลาเริ่มก่อนเขียน
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        if os.path.isdir(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._text = open(os.path.join(self.tmp_path, 'text.bin'), 'wb')
+        self._pos = 0
+        self._offsets = array('q', [0])
+        self._start = array('i')
+        self._end = array('i')
+        self._track_rows = array('q', [0])
+        self._track_video = array('i')
+        self._track_lang = array('h')
+        self._videos = {}
+        self._langs = {}
+        self._key = None
+        self._buf = []
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=exc_type is not None)
+
+    def write(self, row):
+        key = (row['video_id'], row['lang'])
+        if key != self._key:
+            self._flush_track()
+            self._key = key
+        self._buf.append(row)
+
+    def _flush_track(self):
+        if not self._buf:
+            return
+        vid, lang = self._key
+        buf, self._buf = self._buf, []
+        starts = timestamps_to_ms([r['start'] for r in buf])
+        ends = timestamps_to_ms([r['end'] for r in buf])
+        order = np.argsort(starts, kind='stable')
+        encoded = [buf[i]['text'].encode('utf-8') for i in order]
+        self._text.write(b''.join(encoded))
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self._offsets.extend((np.cumsum(lengths) + self._pos).tolist())
+        self._pos += int(lengths.sum())
+        self._start.extend(starts[order].tolist())
+        self._end.extend(ends[order].tolist())
+        self.rows += len(buf)
+        self._track_rows.append(self.rows)
+        self._track_video.append(self._videos.setdefault(vid, len(self._videos)))
+        self._track_lang.append(self._langs.setdefault(lang, len(self._langs)))
+
+    def close(self, discard=False):
+        try:
+            if not discard:
+                self._flush_track()
+        finally:
+            self._text.close()
+        if discard:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            return
+        tmp = self.tmp_path
+        video_ids = list(self._videos)
+        track_video = np.frombuffer(self._track_video, dtype=np.int32)
+        video_tracks = np.argsort(track_video, kind='stable').astype(np.int32)
+        video_track_start = np.searchsorted(track_video[video_tracks], np.arange(len(video_ids) + 1)).astype(np.int64)
+        encoded = [vid.encode('utf-8') for vid in video_ids]
+        with open(os.path.join(tmp, 'video_ids.bin'), 'wb') as f:
+            f.write(b''.join(encoded))
+        arrays = {
+            'offsets': np.frombuffer(self._offsets, dtype=np.int64),
+            'start_ms': np.frombuffer(self._start, dtype=np.int32),
+            'end_ms': np.frombuffer(self._end, dtype=np.int32),
+            'track_rows': np.frombuffer(self._track_rows, dtype=np.int64),
+            'track_video': track_video,
+            'track_lang': np.frombuffer(self._track_lang, dtype=np.int16),
+            'video_tracks': video_tracks,
+            'video_track_start': video_track_start,
+            'video_offsets': np.concatenate([[0], np.cumsum([len(b) for b in encoded], dtype=np.int64)]).astype(np.int64),
+            'video_hash': _build_hash_table(video_ids),
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), values)
+        meta = {'version': VERSION, 'cues': self.rows, 'videos': len(video_ids),
+                'tracks': len(self._track_video), 'langs': list(self._langs)}
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.replace(tmp, self.path)
+
+
+class CorpusIndex:
+    """อ่าน corpus index ผ่าน mmap (ไม่โหลดข้อมูลเข้า memory จนกว่าจะเข้าถึง)
+
+    cue คืนเป็น dict: video_id, lang, start_ms, end_ms, text
+    """
+
+    def __init__(self, path='subtitles/corpus_index'):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != VERSION:
+            raise ValueError(f'Unsupported corpus index version in {path}: {self.meta.get("version")}')
+        self.langs = self.meta['langs']
+        self._lang_index = {lang: i for i, lang in enumerate(self.langs)}
+        for name in ('offsets', 'start_ms', 'end_ms', 'track_rows', 'track_video', 'track_lang',
+                     'video_tracks', 'video_track_start', 'video_offsets', 'video_hash'):
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        self._text_file, self._text = self._map('text.bin')
+        self._ids_file, self._ids = self._map('video_ids.bin')
+
+    def _map(self, name):
+        f = open(os.path.join(self.path, name), 'rb')
+        if os.fstat(f.fileno()).st_size == 0:
+            return f, b''  # mmap เปิดไฟล์ว่างไม่ได้
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for m in (self._text, self._ids):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        self._text_file.close()
+        self._ids_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.meta['cues']
+
+    def video_id(self, v):
+        return self._ids[int(self.video_offsets[v]):int(self.video_offsets[v + 1])].decode('utf-8')
+
+    def find_video(self, video_id):
+        """ลำดับของวิดีโอใน index หรือ None"""
+        mask = len(self.video_hash) - 1
+        slot = video_hash(video_id) & mask
+        while True:
+            v = int(self.video_hash[slot])
+            if v == -1:
+                return None
+            if self.video_id(v) == video_id:
+                return v
+            slot = (slot + 1) & mask
+
+    def tracks(self, video_id):
+        """{lang: (แถวแรก, แถวสุดท้าย + 1)} ของวิดีโอ"""
+        v = self.find_video(video_id)
+        if v is None:
+            return {}
+        out = {}
+        for t in self.video_tracks[int(self.video_track_start[v]):int(self.video_track_start[v + 1])]:
+            out[self.langs[self.track_lang[t]]] = (int(self.track_rows[t]), int(self.track_rows[t + 1]))
+        return out
+
+    def text(self, i):
+        return self._text[int(self.offsets[i]):int(self.offsets[i + 1])].decode('utf-8')
+
+    def cue(self, i):
+        t = int(np.searchsorted(self.track_rows, i, side='right')) - 1
+        return {'video_id': self.video_id(int(self.track_video[t])), 'lang': self.langs[self.track_lang[t]],
+                'start_ms': int(self.start_ms[i]), 'end_ms': int(self.end_ms[i]), 'text': self.text(i)}
+
+    def cues(self, video_id, lang):
+        a, b = self.tracks(video_id).get(lang, (0, 0))
+        return [self.cue(i) for i in range(a, b)]
+
+    def _at_row(self, a, b, ms):
+        # cue สุดท้ายที่เริ่มไม่เกิน ms และยังไม่จบ
+        i = a + int(np.searchsorted(self.start_ms[a:b], ms, side='right')) - 1
+        if i >= a and self.end_ms[i] > ms:
+            return i
+        return None
+
+    def at(self, video_id, lang, ms):
+        """cue ของวิดีโอ/ภาษาที่ครอบเวลา ms (รับ 'HH:MM:SS.mmm' ได้) หรือ None"""
+        if isinstance(ms, str):
+            ms = parse_ms(ms)
+        a, b = self.tracks(video_id).get(lang, (0, 0))
+        i = self._at_row(a, b, ms)
+        return None if i is None else self.cue(i)
+
+    def sample(self, k, lang=None, seed=None):
+        """สุ่ม cue k ตัว (เฉพาะภาษา lang ถ้าระบุ)"""
+        rng = np.random.default_rng(seed)
+        if lang is None:
+            return [self.cue(int(i)) for i in rng.integers(0, len(self), size=k)] if len(self) else []
+        tracks = np.flatnonzero(np.asarray(self.track_lang) == self._lang_index.get(lang, -1))
+        sizes = np.asarray(self.track_rows[tracks + 1] - self.track_rows[tracks])
+        if not sizes.sum():
+            return []
+        # สุ่มแถวจากทุก track ของภาษานี้โดยให้น้ำหนักตามจำนวน cue
+        ends = np.cumsum(sizes)
+        picks = rng.integers(0, ends[-1], size=k)
+        t = np.searchsorted(ends, picks, side='right')
+        rows = np.asarray(self.track_rows[tracks])[t] + picks - (ends[t] - sizes[t])
+        return [self.cue(int(i)) for i in rows]
+
+    def sample_pairs(self, k, src='en', tgt='th', seed=None, max_tries=10):
+        """สุ่มคู่ (cue src, cue tgt ที่ครอบจุดกึ่งกลางของ cue src) จากวิดีโอที่มีทั้งสองภาษา"""
+        rng = random.Random(seed)
+        s, g = self._lang_index.get(src), self._lang_index.get(tgt)
+        if s is None or g is None:
+            return []
+        track_lang = np.asarray(self.track_lang)
+        track_video = np.asarray(self.track_video)
+        tgt_of = np.full(self.meta['videos'], -1, dtype=np.int64)
+        tgt_tracks = np.flatnonzero(track_lang == g)
+        tgt_of[track_video[tgt_tracks]] = tgt_tracks
+        src_tracks = np.flatnonzero(track_lang == s)
+        both = [(int(a), int(b)) for a, b in zip(src_tracks, tgt_of[track_video[src_tracks]]) if b >= 0]
+        pairs = []
+        for _ in range(k * max_tries):
+            if len(pairs) >= k or not both:
+                break
+            ts, tg = rng.choice(both)
+            a, b = int(self.track_rows[ts]), int(self.track_rows[ts + 1])
+            if a == b:
+                continue
+            i = rng.randrange(a, b)
+            j = self._at_row(int(self.track_rows[tg]), int(self.track_rows[tg + 1]),
+                             (int(self.start_ms[i]) + int(self.end_ms[i])) // 2)
+            if j is not None:
+                pairs.append((self.cue(i), self.cue(j)))
+        return pairs
+
+
+def _print_cue(cue):
+    if cue is None:
+        print('(no cue)')
+        return
+    print(f"{cue['video_id']}\t{cue['lang']}\t{format_ms(cue['start_ms'])} --> {format_ms(cue['end_ms'])}\t{cue['text']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up or sample cues from a corpus index built by export')
+    parser.add_argument('--index', default='subtitles/corpus_index', help='Corpus index directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+    at = sub.add_parser('at', help='Cue of a video/language covering a timestamp')
+    at.add_argument('video_id')
+    at.add_argument('lang')
+    at.add_argument('time', help='HH:MM:SS.mmm or MM:SS.mmm')
+    sample = sub.add_parser('sample', help='Random cues, or aligned pairs with --pair')
+    sample.add_argument('-k', type=int, default=10)
+    sample.add_argument('--lang')
+    sample.add_argument('--pair', nargs=2, metavar=('SRC', 'TGT'))
+    sample.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    with CorpusIndex(args.index) as index:
+        if args.command == 'at':
+            _print_cue(index.at(args.video_id, args.lang, args.time))
+        elif args.pair:
+            for a, b in index.sample_pairs(args.k, *args.pair, seed=args.seed):
+                _print_cue(a)
+                _print_cue(b)
+                print()
+        else:
+            for cue in index.sample(args.k, args.lang, seed=args.seed):
+                _print_cue(cue)
+
+
+if __name__ == '__main__':
+    main()
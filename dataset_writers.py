@@ -0,0 +1,229 @@
+"""Writer แบบ streaming สำหรับ export dataset ทีละแถว (ใช้ memory คงที่)
+
+ทุก writer มี write(row) / close() และใช้เป็น context manager ได้
+row คือ dict ที่มี key ตาม fieldnames
+"""
+import csv
+import json
+import os
+import shutil
+
+from vtt_parser import timestamps_to_ms
+
+
+class _Writer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=exc_type is not None)
+
+    def _open(self, path):
+        # เขียนลงไฟล์ .tmp ก่อนแล้วค่อย rename ไม่ให้เหลือไฟล์ครึ่งๆ ถ้าล้มกลางทาง
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        return open(self.tmp_path, 'w', encoding='utf-8', newline='')
+
+    def _finish(self, discard):
+        if discard:
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.path)
+
+
+class CsvRowWriter(_Writer):
+    def __init__(self, path, fieldnames):
+        self._f = self._open(path)
+        self._writer = csv.DictWriter(self._f, fieldnames=fieldnames, extrasaction='ignore')
+        self._writer.writeheader()
+        self.rows = 0
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self, discard=False):
+        self._f.close()
+        self._finish(discard)
+
+
+class JsonlRowWriter(_Writer):
+    def __init__(self, path, fieldnames):
+        self._f = self._open(path)
+        self.fieldnames = fieldnames
+        self.rows = 0
+
+    def write(self, row):
+        self._f.write(json.dumps({k: row[k] for k in self.fieldnames}, ensure_ascii=False))
+        self._f.write('\n')
+        self.rows += 1
+
+    def close(self, discard=False):
+        self._f.close()
+        self._finish(discard)
+
+
+class JsonArrayWriter(_Writer):
+    """JSON array แบบ indent=2 หน้าตาเหมือน json.dump(..., indent=2) แต่เขียนทีละแถว"""
+
+    def __init__(self, path, fieldnames):
+        self._f = self._open(path)
+        self.fieldnames = fieldnames
+        self.rows = 0
+
+    def write(self, row):
+        self._f.write('[\n  ' if self.rows == 0 else ',\n  ')
+        obj = {k: row[k] for k in self.fieldnames}
+        self._f.write(json.dumps(obj, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        self.rows += 1
+
+    def close(self, discard=False):
+        self._f.write('[]' if self.rows == 0 else '\n]')
+        self._f.close()
+        self._finish(discard)
+
+
+class CsvFrameWriter(_Writer):
+    """เขียน DataFrame ทีละ chunk ต่อกันเป็น CSV ไฟล์เดียว หน้าตาเหมือน DataFrame.to_csv(index=False)
+
+    ถ้าให้ fieldnames จะเขียน header ทันที (ไฟล์ที่ไม่มีแถวเลยก็ยังมี header) ไม่งั้นใช้ header ของ chunk แรก
+    """
+
+    def __init__(self, path, fieldnames=None):
+        self._f = self._open(path)
+        self._header = fieldnames is None
+        if fieldnames is not None:
+            self._f.write(','.join(fieldnames) + '\n')
+        self.rows = 0
+
+    def write_frame(self, df):
+        df.to_csv(self._f, index=False, header=self._header)
+        self._header = False
+        self.rows += len(df)
+
+    def close(self, discard=False):
+        self._f.close()
+        self._finish(discard)
+
+
+class TextBlockWriter(_Writer):
+    """เขียนข้อความที่ต่อเป็นก้อนแล้ว (หลายบรรทัด) ต่อท้ายไฟล์"""
+
+    def __init__(self, path):
+        self._f = self._open(path)
+        self.rows = 0
+
+    def write_block(self, block, rows=0):
+        self._f.write(block)
+        self.rows += rows
+
+    def close(self, discard=False):
+        self._f.close()
+        self._finish(discard)
+
+
+class ShardedParquetWriter(_Writer):
+    """เขียน dataset เป็นโฟลเดอร์ Parquet แบ่ง partition ตามภาษา (hive: lang=en/part-00000.parquet)
+
+    - schema ชัดเจน: video_id เป็น dictionary, start_ms / end_ms เป็น int32, text เป็น string
+      (lang ไม่อยู่ในไฟล์ แต่ได้จากชื่อโฟลเดอร์ตอนอ่านด้วย partitioning='hive')
+    - แต่ละไฟล์มีไม่เกิน shard_rows แถว เขียนทีละ row group ขนาด row_group_size
+    - ตอนปิดเขียน _common_metadata (schema) และ _metadata (สถิติ row group ของทุก shard)
+      ให้ reader ตัด shard / row group ที่ไม่ต้องอ่านได้โดยไม่ต้องเปิดทุกไฟล์
+    - เขียนลงโฟลเดอร์ .tmp แล้วค่อยแทนที่โฟลเดอร์เดิมตอนปิด
+    row ต้องมี video_id, start, end ('HH:MM:SS.mmm'), text และ lang
+    """
+
+    def __init__(self, path, shard_rows=1000000, row_group_size=65536):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.shard_rows = max(1, int(shard_rows))
+        self.row_group_size = max(1, min(int(row_group_size), self.shard_rows))
+        self.schema = pa.schema([
+            ('video_id', pa.dictionary(pa.int32(), pa.string())),
+            ('start_ms', pa.int32()),
+            ('end_ms', pa.int32()),
+            ('text', pa.string()),
+        ])
+        if os.path.isdir(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._buffers = {}  # lang -> {'video_id': [...], 'start': [...], 'end': [...], 'text': [...]}
+        self._shards = {}  # lang -> [ParquetWriter, relpath, จำนวนแถว, ลำดับ shard]
+        self._files = []
+        self.rows = 0
+
+    def write(self, row):
+        buf = self._buffers.get(row['lang'])
+        if buf is None:
+            buf = self._buffers[row['lang']] = {'video_id': [], 'start': [], 'end': [], 'text': []}
+        buf['video_id'].append(row['video_id'])
+        buf['start'].append(row['start'])
+        buf['end'].append(row['end'])
+        buf['text'].append(row['text'])
+        self.rows += 1
+        if len(buf['text']) >= self.row_group_size:
+            self._flush(row['lang'])
+
+    def _flush(self, lang):
+        buf = self._buffers.pop(lang, None)
+        if not buf:
+            return
+        pa = self._pa
+        table = pa.Table.from_arrays([
+            pa.array(buf['video_id'], pa.string()).dictionary_encode(),
+            pa.array(timestamps_to_ms(buf['start']), pa.int32()),
+            pa.array(timestamps_to_ms(buf['end']), pa.int32()),
+            pa.array(buf['text'], pa.string()),
+        ], schema=self.schema)
+        offset = 0
+        while offset < len(table):
+            shard = self._shards.get(lang)
+            if shard is None or shard[2] >= self.shard_rows:
+                shard = self._open_shard(lang)
+            n = min(len(table) - offset, self.shard_rows - shard[2])
+            shard[0].write_table(table.slice(offset, n), row_group_size=self.row_group_size)
+            shard[2] += n
+            offset += n
+
+    def _open_shard(self, lang):
+        old = self._shards.get(lang)
+        if old is not None:
+            self._close_shard(old)
+        index = old[3] + 1 if old is not None else 0
+        relpath = f'lang={lang}/part-{index:05d}.parquet'
+        os.makedirs(os.path.join(self.tmp_path, f'lang={lang}'), exist_ok=True)
+        writer = self._pq.ParquetWriter(os.path.join(self.tmp_path, relpath), self.schema)
+        shard = self._shards[lang] = [writer, relpath, 0, index]
+        return shard
+
+    def _close_shard(self, shard):
+        shard[0].close()
+        self._files.append(shard[1])
+
+    def close(self, discard=False):
+        try:
+            if not discard:
+                for lang in sorted(self._buffers):
+                    self._flush(lang)
+        finally:
+            for lang in sorted(self._shards):
+                self._close_shard(self._shards[lang])
+            self._shards = {}
+        if discard:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            return
+        collected = []
+        for relpath in sorted(self._files):
+            md = self._pq.read_metadata(os.path.join(self.tmp_path, relpath))
+            md.set_file_path(relpath)
+            collected.append(md)
+        self._pq.write_metadata(self.schema, os.path.join(self.tmp_path, '_common_metadata'))
+        self._pq.write_metadata(self.schema, os.path.join(self.tmp_path, '_metadata'), metadata_collector=collected)
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
@@ -1,9 +1,23 @@
-import pandas as pd
+import argparse
 
-input_path = 'subtitles/dataset_parallel_clean.csv'
-output_path = 'subtitles/dataset_parallel_clean_dedup.csv'
+import metrics
+from app import run_stages
+from text_cleaning import DEFAULT_RULES
 
-df = pd.read_csv(input_path)
-df = df.drop_duplicates(subset=['video_id', 'text_original', 'text_thai'])
-df.to_csv(output_path, index=False, encoding='utf-8')
-print(f'Exported deduplicated parallel dataset to {output_path}')
+
+@metrics.timed('dedup_parallel')
+def dedup_parallel_dataset(output_dir='subtitles', incremental=True, near=False, threshold=0.7, rules=DEFAULT_RULES):
+    # ลบคู่ (text_original, text_thai) ซ้ำทั้งไฟล์ (ข้ามวิดีโอด้วย) แบบ streaming ทีละ chunk
+    # -> dataset_parallel_clean_dedup.csv เป็น stage parallel-dedup ของ pipeline (clean จาก dataset_parallel.csv ระหว่างทาง)
+    return run_stages(['parallel-dedup'], output_dir, incremental, rules=rules, near=near, threshold=threshold)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drop duplicate pairs from the cleaned parallel dataset')
+    parser.add_argument('--near-dup', action='store_true', help='Also drop near-duplicate pairs (MinHash/LSH)')
+    parser.add_argument('--near-threshold', type=float, default=0.7, help='Estimated character n-gram Jaccard similarity treated as a near duplicate')
+    parser.add_argument('--full', action='store_true', help='Rebuild even if the manifest says the output is up to date')
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+    dedup_parallel_dataset(incremental=not args.full, near=args.near_dup, threshold=args.near_threshold)
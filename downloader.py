@@ -0,0 +1,236 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from metadata_cache import entry_langs
+
+
+class TokenBucket:
+    """Token bucket ที่แชร์กันระหว่าง worker ทุกตัว (thread-safe)
+
+    rate คือจำนวน request ต่อวินาที (ต้องมากกว่า 0), capacity คือจำนวน request ที่ยิงติดกันได้
+    backoff() จะหยุดทุก worker ไว้จนกว่าจะพ้นช่วงเวลาที่กำหนด (ใช้ตอนโดน HTTP 429)
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        if not self.rate > 0:  # ครอบคลุม NaN ด้วย
+            raise ValueError(f'rate must be > 0 requests per second, got {rate!r}')
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                else:
+                    wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def backoff(self, delay):
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + delay)
+            self._tokens = 0.0
+            self._last = now
+
+
+def is_rate_limited(exc):
+    if getattr(exc, 'code', None) == 429 or getattr(exc, 'status', None) == 429:
+        return True
+    cause = getattr(exc, 'exc_info', None)
+    if cause and cause[1] is not None and cause[1] is not exc and is_rate_limited(cause[1]):
+        return True
+    msg = str(exc)
+    return 'HTTP Error 429' in msg or 'Too Many Requests' in msg
+
+
+def video_id_from_url(url):
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith('youtu.be'):
+        return parsed.path.lstrip('/').split('/')[0] or None
+    if 'youtube' in host:
+        if parsed.path == '/watch':
+            return parse_qs(parsed.query).get('v', [None])[0]
+        parts = parsed.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            return parts[1]
+    return None
+
+
+def available_langs(info):
+    return set(info.get('subtitles') or {}) | set(info.get('automatic_captions') or {})
+
+
+class SubtitleDownloader:
+    """ดาวน์โหลดซับไตเติลหลายวิดีโอพร้อมกันด้วย thread pool
+
+    - ดึง metadata ครั้งเดียวต่อวิดีโอ แล้วเขียนซับทุกภาษาที่ขาดจาก info dict เดิม
+    - ถ้ามีไฟล์ .vtt ครบทุกภาษาแล้วจะไม่ยิง network เลย
+    - ทุก request ผ่าน TokenBucket ตัวเดียวกัน และ backoff แบบ exponential เมื่อเจอ 429
+    - ถ้าให้ cache (MetadataCache) วิดีโอที่ cache บอกว่าไม่มีภาษาที่ยังขาดจะไม่ยิง network เลย
+      (refresh=True ไม่เชื่อ cache แต่ยังเขียนผล extract_info ใหม่ลง cache)
+    - extract_info ที่ error (ยกเว้น 429) ถูกแคชสั้นๆ (error_ttl ของ cache) รอบถัดไปจึงไม่ยิงซ้ำทันที
+    """
+
+    def __init__(self, sub_langs, output_dir='subtitles', workers=4, rate=1.0, burst=2,
+                 max_retries=5, backoff_base=5.0, backoff_max=300.0, ydl_factory=None, log=print, cache=None, refresh=False):
+        self.sub_langs = list(sub_langs)
+        self.output_dir = output_dir
+        self.workers = max(1, int(workers))
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ydl_factory = ydl_factory or _default_ydl_factory
+        self.log = log or (lambda *a, **k: None)
+        self.cache = cache
+        self.refresh = refresh
+        self._local = threading.local()
+        self._instances = []
+        self._instances_lock = threading.Lock()
+
+    @property
+    def ydl_opts(self):
+        return {
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': self.sub_langs,
+            'subtitlesformat': 'vtt',
+            'skip_download': True,
+            'overwrites': False,
+            'quiet': True,
+            'no_warnings': True,
+            'outtmpl': f'{self.output_dir}/%(id)s.%(ext)s',
+        }
+
+    def _ydl(self):
+        # YoutubeDL ไม่ thread-safe จึงสร้างแยกต่อ thread
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = self.ydl_factory(self.ydl_opts)
+            ydl.__enter__()
+            self._local.ydl = ydl
+            with self._instances_lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def vtt_path(self, vid, lang):
+        return os.path.join(self.output_dir, f'{vid}.{lang}.vtt')
+
+    def existing_langs(self, vid):
+        return [lang for lang in self.sub_langs if os.path.exists(self.vtt_path(vid, lang))]
+
+    def _call(self, fn, *args, tokens=1, **kwargs):
+        attempt = 0
+        while True:
+            self.bucket.acquire(tokens)
+            try:
+                return fn(*args, **kwargs), attempt
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    e.retries = attempt
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay *= random.uniform(0.8, 1.2)
+                self.log(f'  - HTTP 429, backing off {delay:.1f}s (retry {attempt + 1}/{self.max_retries})')
+                self.bucket.backoff(delay)
+                attempt += 1
+
+    def fetch(self, url):
+        result = {'video_id': video_id_from_url(url), 'url': url, 'subtitle_found': False,
+                  'langs': [], 'downloaded': [], 'cached': False, 'metadata': None, 'retries': 0, 'error': None}
+        vid = result['video_id']
+        if vid:
+            have = self.existing_langs(vid)
+            if len(have) == len(self.sub_langs):
+                self.log(f'Subtitles already exist for {url}')
+                result.update(subtitle_found=True, langs=have, cached=True)
+                return result
+            entry = self.cache.get(vid) if self.cache is not None and not self.refresh else None
+            if entry is not None and entry.get('status') == 'error':
+                # extract_info เพิ่ง error (เช่น 404) ไม่ยิงซ้ำจนกว่า entry error จะหมดอายุ
+                self.cache.record(hit=True)
+                self.log(f"Metadata cached for {url}: error {entry['error']}")
+                result.update(subtitle_found=bool(have), langs=have, metadata='hit', error=entry['error'])
+                return result
+            if entry is not None and not [lang for lang in self.sub_langs if lang not in have and lang in entry_langs(entry)]:
+                # cache ยืนยันว่าภาษาที่ยังขาดไม่มีให้ดาวน์โหลด ไม่ต้องเรียก extract_info
+                self.cache.record(hit=True)
+                self.log(f"Metadata cached for {url}: no {', '.join(lang for lang in self.sub_langs if lang not in have)} subtitles")
+                result.update(subtitle_found=bool(have), langs=have, metadata='hit')
+                return result
+        self.log(f'Downloading subtitles for {url}')
+        info = None
+        t0 = time.perf_counter()
+        try:
+            ydl = self._ydl()
+            info, retries = self._call(ydl.extract_info, url, download=False)
+            result['retries'] += retries
+            if self.cache is not None:
+                self.cache.record(hit=False)
+                self.cache.put(info, time.perf_counter() - t0)
+                result['metadata'] = 'miss'
+            vid = result['video_id'] = info.get('id') or vid
+            have = self.existing_langs(vid)
+            offered = available_langs(info)
+            missing = [lang for lang in self.sub_langs if lang not in have and lang in offered]
+            for lang in self.sub_langs:
+                if lang not in have and lang not in offered:
+                    self.log(f'  - No subtitle found for language: {lang}')
+            if missing:
+                self.log(f"  - Downloading subtitle: {', '.join(missing)}")
+                _, retries = self._call(ydl.process_ie_result, info, download=True, tokens=len(missing))
+                result['retries'] += retries
+            result['downloaded'] = [lang for lang in missing if os.path.exists(self.vtt_path(vid, lang))]
+            result['langs'] = self.existing_langs(vid)
+            result['subtitle_found'] = bool(result['langs'])
+        except Exception as e:
+            self.log(f'  - Error: {e}')
+            result['retries'] += getattr(e, 'retries', 0)
+            result['error'] = str(e)
+            if info is None and self.cache is not None and not is_rate_limited(e):
+                # 429 ที่ retry จนหมดเป็นปัญหาชั่วคราวของเรา ไม่ใช่ของวิดีโอ จึงไม่แคช
+                self.cache.record(hit=False)
+                if self.cache.put_error(vid, e, time.perf_counter() - t0) is not None:
+                    result['metadata'] = 'miss'
+        return result
+
+    def run(self, video_urls):
+        os.makedirs(self.output_dir, exist_ok=True)
+        try:
+            if self.workers == 1:
+                return [self.fetch(url) for url in video_urls]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(self.fetch, video_urls))
+        finally:
+            with self._instances_lock:
+                for ydl in self._instances:
+                    ydl.__exit__(None, None, None)
+                self._instances.clear()
+            self._local = threading.local()
+            if self.cache is not None:
+                self.cache.save()
+                self.log(self.cache.summary())
+
+
+def _default_ydl_factory(opts):
+    import yt_dlp
+    return yt_dlp.YoutubeDL(opts)
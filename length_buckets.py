@@ -0,0 +1,272 @@
+"""วัดความยาวประโยคตามภาษา แล้วแบ่งคู่แปลเป็น bucket ตามความยาวและเขียนเป็น shard สำหรับ train (สองทาง, สุ่มลำดับ)
+
+หน่วยความยาว (measure):
+- chars     : จำนวนตัวอักษร (code point) คำนวณทั้งคอลัมน์ด้วย pyarrow.compute
+- tokens    : จำนวนคำที่คั่นด้วยช่องว่าง (เหมาะกับภาษาอังกฤษ) คำนวณด้วย pyarrow.compute (RE2)
+- graphemes : จำนวน grapheme cluster (ตัวอักษรที่ผู้อ่านเห็นเป็นหนึ่งตัว) ตาม Unicode ด้วย `regex` (`\\X`)
+              "ที่" = 3 code point แต่นับเป็น 1, "กำลัง" นับเป็น 3 (เหมาะกับภาษาไทยที่ไม่มีช่องว่างระหว่างคำ)
+              ข้อความที่มีแต่ ASCII กับอักษรไทยนับทั้งคอลัมน์ด้วย RE2 ที่เหลือนับทีละข้อความ (RE2 ไม่มี `\\X`)
+ค่าเริ่มต้นต่อภาษาอยู่ใน DEFAULT_MEASURES ภาษาที่ไม่อยู่ในนั้นใช้ chars
+
+LengthBucketer
+- ขอบบนของ bucket กำหนดแยกตามหน่วย (bounds = {measure: ขอบบน}) เพราะ 8 token กับ 8 grapheme ยาวไม่เท่ากัน
+  หน่วยของทุกภาษาต้องมีจำนวนขอบเท่ากัน คู่หนึ่งอยู่ bucket แรกที่ทั้งสองด้านไม่เกินขอบของหน่วยตัวเอง
+  (batch ถูก pad ตามด้านที่ยาวกว่า) เช่น tokens (8, 16) กับ graphemes (32, 64): en 6 token + th 40 grapheme -> bucket ที่ 2
+- ชื่อ bucket ตั้งตามขอบของภาษาแรก (src) เช่น en tokens (8, 16, 32) -> le008, le016, le032, gt032
+  ขอบของทุกภาษาอยู่ใน stats.json
+- แต่ละคู่ถูกเขียนทั้งสองทาง (src->tgt และ tgt->src) ลง bucket เดียวกัน คู่ที่ข้อความสองด้านเหมือนกันเขียนทางเดียว
+  คู่ที่ด้านใดด้านหนึ่งว่างถูกข้าม
+- แต่ละ bucket พักแถวไว้ไม่เกิน shard_rows แถว ครบแล้ว shuffle แล้วเขียนเป็น <bucket>/part-NNNNN.csv
+  memory จึงไม่เกิน จำนวน bucket x shard_rows แถว ไม่ต้องโหลด corpus สองทางทั้งก้อน
+  การสุ่มขึ้นกับ seed, bucket และลำดับ shard เท่านั้น (ผลเหมือนกันไม่ว่าจะส่งแถวมาเป็น chunk ขนาดเท่าไร)
+- ตอนปิดเขียน stats.json: จำนวนคู่/แถว/shard ต่อ bucket, การกระจายความยาวของแต่ละภาษา (mean, p50, p95, max)
+  และ fill ของแต่ละภาษา (ความยาวเฉลี่ย / ความยาวสูงสุดใน bucket = สัดส่วนที่ไม่ใช่ padding ถ้า pad ถึงแถวที่ยาวที่สุด)
+- เขียนลงโฟลเดอร์ .tmp แล้วค่อยแทนที่โฟลเดอร์เดิมตอนปิด
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+MEASURES = ('chars', 'tokens', 'graphemes')
+DEFAULT_MEASURES = {'en': 'tokens', 'th': 'graphemes'}
+DEFAULT_BOUNDS = {'tokens': (8, 16, 32, 64, 128), 'graphemes': (32, 64, 128, 256, 512), 'chars': (32, 64, 128, 256, 512)}
+SHARD_FIELDS = ['src', 'tgt', 'src_lang', 'tgt_lang', 'src_len', 'tgt_len']
+
+
+def measure_lengths(texts, measure):
+    """list/Series ของ str -> numpy int64 array ของความยาวตาม measure"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if measure not in MEASURES:
+        raise ValueError(f'Unknown length measure: {measure!r} (expected one of {", ".join(MEASURES)})')
+    if isinstance(texts, pd.Series):
+        texts = texts.fillna('').astype(str)
+    array = pa.array(texts, type=pa.large_string())
+    if measure == 'chars':
+        lengths = pc.utf8_length(array)
+    elif measure == 'tokens':
+        lengths = pc.count_substring_regex(array, r'\S+')
+    else:
+        return _count_graphemes(array)
+    return lengths.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+# ในข้อความที่มีแต่ ASCII กับอักษรไทย กฎ grapheme ของ Unicode (UAX #29) เหลือแค่: สระบน/ล่าง วรรณยุกต์ (Extend)
+# และสระอำ (SpacingMark) ต่อท้ายตัวก่อนหน้าเสมอ ยกเว้นเมื่ออยู่ต้นข้อความหรือหลัง control และ \r\n นับเป็นหนึ่ง
+# จึงนับทั้งคอลัมน์ด้วย RE2 ได้ ข้อความอื่นใช้ \X ของ `regex`
+_THAI_ASCII_RE = r'^[\x00-\x7f\x{0E00}-\x{0E7F}]*$'
+_THAI_MARK_RE = r'[\x{0E31}\x{0E33}-\x{0E3A}\x{0E47}-\x{0E4E}]'
+
+
+def _count_graphemes(array):
+    import pyarrow.compute as pc
+    lengths = pc.subtract(pc.utf8_length(array), pc.count_substring_regex(array, _THAI_MARK_RE))
+    lengths = pc.add(lengths, pc.count_substring_regex(array, r'[\x00-\x1f\x7f]' + _THAI_MARK_RE))
+    # count_substring_regex เริ่ม ^ ใหม่ทุกตำแหน่งที่ค้นต่อ จึงเช็ค mark ต้นข้อความแยก
+    lengths = pc.add(lengths, pc.cast(pc.match_substring_regex(array, '^' + _THAI_MARK_RE), 'int64'))
+    lengths = pc.subtract(lengths, pc.count_substring(array, '\r\n')).fill_null(0)
+    lengths = lengths.to_numpy(zero_copy_only=False).astype(np.int64)
+    other = np.flatnonzero(~pc.match_substring_regex(array, _THAI_ASCII_RE).fill_null(True).to_numpy(zero_copy_only=False))
+    if len(other):
+        import regex
+        grapheme = regex.compile(r'\X')
+        lengths[other] = [len(grapheme.findall(t)) for t in array.take(other).to_pylist()]
+    return lengths
+
+
+def parse_bounds(spec):
+    """'tokens:8,16,32/graphemes:32,64,128' -> {'tokens': (8, 16, 32), 'graphemes': (32, 64, 128), 'chars': ...}
+
+    หน่วยที่ไม่ระบุใช้ DEFAULT_BOUNDS ขอบต้องเป็นจำนวนเต็มบวกเรียงจากน้อยไปมาก และหน่วยที่ใช้กับ en/th
+    (DEFAULT_MEASURES) ต้องมีจำนวนขอบเท่ากัน
+    """
+    bounds = dict(DEFAULT_BOUNDS)
+    for item in str(spec).split('/'):
+        measure, sep, values = item.strip().rpartition(':')
+        if not sep or measure not in MEASURES:
+            raise ValueError(f'Invalid bucket bounds: {item!r} (expected e.g. tokens:8,16,32,64/graphemes:32,64,128,256)')
+        try:
+            bounds[measure] = tuple(int(x) for x in values.split(',') if x.strip())
+        except ValueError:
+            raise ValueError(f'Invalid bucket bounds: {item!r} (expected e.g. tokens:8,16,32,64)') from None
+    bounds = check_bounds(bounds)
+    check_bucket_count(bounds, set(DEFAULT_MEASURES.values()))
+    return bounds
+
+
+def check_bucket_count(bounds, measures):
+    if len({len(bounds[measure]) for measure in measures}) > 1:
+        raise ValueError('Every length measure in use needs the same number of bucket bounds: '
+                         + format_bounds({measure: bounds[measure] for measure in sorted(measures)}))
+
+
+def check_bounds(bounds):
+    bounds = {measure: tuple(b) for measure, b in bounds.items()}
+    for measure, b in bounds.items():
+        if measure not in MEASURES:
+            raise ValueError(f'Unknown length measure: {measure!r} (expected one of {", ".join(MEASURES)})')
+        if not b or b[0] < 1 or any(x >= y for x, y in zip(b, b[1:])):
+            raise ValueError(f'Bucket bounds must be increasing positive integers: {measure}:{",".join(map(str, b))}')
+    return bounds
+
+
+def format_bounds(bounds):
+    return '/'.join(f'{measure}:{",".join(map(str, b))}' for measure, b in bounds.items())
+
+
+def bucket_names(bounds):
+    width = len(str(bounds[-1]))
+    return [f'le{b:0{width}d}' for b in bounds] + [f'gt{bounds[-1]:0{width}d}']
+
+
+class _Histogram:
+    """นับความถี่ของความยาว (เก็บเป็น bincount) ให้หา percentile ได้โดยไม่ต้องเก็บทุกค่า"""
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, values):
+        if len(values):
+            counts = np.bincount(values)
+            if len(counts) > len(self.counts):
+                self.counts = np.pad(self.counts, (0, len(counts) - len(self.counts)))
+            self.counts[:len(counts)] += counts
+
+    def summary(self):
+        n = int(self.counts.sum())
+        if not n:
+            return {'mean': None, 'p50': None, 'p95': None, 'max': None}
+        cum = np.cumsum(self.counts)
+        lengths = np.arange(len(self.counts))
+        return {'mean': round(float((lengths * self.counts).sum() / n), 2),
+                'p50': int(np.searchsorted(cum, 0.5 * n)), 'p95': int(np.searchsorted(cum, 0.95 * n)),
+                'max': int(np.flatnonzero(self.counts)[-1])}
+
+
+class LengthBucketer:
+    """รับ DataFrame ของคู่แปลทีละ chunk (write_frame) แล้วเขียน bucket/shard ลงโฟลเดอร์ path
+
+    columns = ชื่อคอลัมน์ (src, tgt) ใน DataFrame ที่ส่งเข้ามา, langs = ภาษาของสองคอลัมน์นั้น
+    """
+
+    def __init__(self, path, columns=('text_original', 'text_thai'), langs=('en', 'th'), bounds=DEFAULT_BOUNDS,
+                 measures=None, shard_rows=100000, seed=0):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.columns = tuple(columns)
+        self.langs = tuple(langs)
+        measures = dict(DEFAULT_MEASURES, **(measures or {}))
+        self.measures = {lang: measures.get(lang, 'chars') for lang in self.langs}
+        for measure in self.measures.values():
+            if measure not in MEASURES:
+                raise ValueError(f'Unknown length measure: {measure!r} (expected one of {", ".join(MEASURES)})')
+        bounds = check_bounds(dict(DEFAULT_BOUNDS, **bounds))
+        check_bucket_count(bounds, set(self.measures.values()))
+        self.bounds = {lang: bounds[self.measures[lang]] for lang in self.langs}
+        self.names = bucket_names(self.bounds[self.langs[0]])
+        self.shard_rows = max(1, int(shard_rows))
+        self.seed = seed
+        if os.path.isdir(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._buffers = [[] for _ in self.names]  # bucket -> list ของ DataFrame ที่ยังไม่ได้เขียน
+        self._buffered = [0] * len(self.names)
+        self._shards = [0] * len(self.names)
+        self._pairs = [0] * len(self.names)
+        self._rows = [0] * len(self.names)
+        self._hists = [{lang: _Histogram() for lang in self.langs} for _ in self.names]
+        self.pairs_in = 0
+        self.skipped_empty = 0
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=exc_type is not None)
+
+    def write_frame(self, df):
+        src_col, tgt_col = self.columns
+        src_lang, tgt_lang = self.langs
+        src = df[src_col].fillna('').astype(str).to_numpy(dtype=object)
+        tgt = df[tgt_col].fillna('').astype(str).to_numpy(dtype=object)
+        self.pairs_in += len(src)
+        src_len = measure_lengths(src, self.measures[src_lang])
+        tgt_len = measure_lengths(tgt, self.measures[tgt_lang])
+        keep = (src_len > 0) & (tgt_len > 0)
+        self.skipped_empty += int((~keep).sum())
+        src, tgt, src_len, tgt_len = src[keep], tgt[keep], src_len[keep], tgt_len[keep]
+        # bucket แรกที่ทั้งสองด้านไม่เกินขอบของหน่วยตัวเอง
+        buckets = np.maximum(np.searchsorted(self.bounds[src_lang], src_len, side='left'),
+                             np.searchsorted(self.bounds[tgt_lang], tgt_len, side='left'))
+        same = src == tgt
+        for b in np.unique(buckets):
+            m = buckets == b
+            self._pairs[b] += int(m.sum())
+            self._hists[b][src_lang].add(src_len[m])
+            self._hists[b][tgt_lang].add(tgt_len[m])
+            r = m & ~same
+            # สองทางสลับกันทีละคู่ (src->tgt แล้ว tgt->src) ก่อน shuffle
+            n, nr = int(m.sum()), int(r.sum())
+            forward = pd.DataFrame({'src': src[m], 'tgt': tgt[m], 'src_lang': src_lang, 'tgt_lang': tgt_lang,
+                                    'src_len': src_len[m], 'tgt_len': tgt_len[m]}, index=np.flatnonzero(m) * 2)
+            reverse = pd.DataFrame({'src': tgt[r], 'tgt': src[r], 'src_lang': tgt_lang, 'tgt_lang': src_lang,
+                                    'src_len': tgt_len[r], 'tgt_len': src_len[r]}, index=np.flatnonzero(r) * 2 + 1)
+            rows = pd.concat([forward, reverse]).sort_index(kind='stable').reset_index(drop=True)
+            self._buffers[b].append(rows)
+            self._buffered[b] += n + nr
+            while self._buffered[b] >= self.shard_rows:
+                self._flush(b, self.shard_rows)
+
+    def _flush(self, b, n):
+        buf = pd.concat(self._buffers[b], ignore_index=True) if len(self._buffers[b]) > 1 else self._buffers[b][0]
+        shard, rest = buf.iloc[:n], buf.iloc[n:]
+        self._buffers[b] = [rest] if len(rest) else []
+        self._buffered[b] = len(rest)
+        index = self._shards[b]
+        rng = np.random.default_rng([self.seed, b, index])
+        shard = shard.iloc[rng.permutation(len(shard))]
+        os.makedirs(os.path.join(self.tmp_path, self.names[b]), exist_ok=True)
+        shard.to_csv(os.path.join(self.tmp_path, self.names[b], f'part-{index:05d}.csv'), index=False, encoding='utf-8')
+        self._shards[b] += 1
+        self._rows[b] += len(shard)
+        self.rows += len(shard)
+
+    def stats(self):
+        buckets = []
+        for b, name in enumerate(self.names):
+            lengths = {}
+            for lang in self.langs:
+                summary = self._hists[b][lang].summary()
+                bounds = self.bounds[lang]
+                lengths[lang] = dict(measure=self.measures[lang], max_len=bounds[b] if b < len(bounds) else None, **summary,
+                                     fill=round(summary['mean'] / summary['max'], 3) if summary['max'] else None)
+            buckets.append({'bucket': name, 'pairs': self._pairs[b], 'rows': self._rows[b], 'shards': self._shards[b],
+                            'lengths': lengths})
+        return {'langs': list(self.langs), 'measures': self.measures,
+                'bounds': {lang: list(b) for lang, b in self.bounds.items()},
+                'shard_rows': self.shard_rows, 'seed': self.seed, 'pairs_in': self.pairs_in,
+                'skipped_empty': self.skipped_empty, 'rows': self.rows, 'buckets': buckets}
+
+    def counters(self):
+        return {'rows_in': self.pairs_in, 'rows_out': self.rows, 'skipped_empty': self.skipped_empty,
+                'pairs': sum(self._pairs), 'shards': sum(self._shards)}
+
+    def summary(self):
+        return ', '.join(f'{name}: {pairs} pairs' for name, pairs in zip(self.names, self._pairs) if pairs) or 'no pairs'
+
+    def close(self, discard=False):
+        if discard:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            return
+        for b in range(len(self.names)):
+            if self._buffered[b]:
+                self._flush(b, self._buffered[b])
+        with open(os.path.join(self.tmp_path, 'stats.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.stats(), f, ensure_ascii=False, indent=2)
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
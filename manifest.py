@@ -0,0 +1,209 @@
+"""Manifest แบบ append-only (JSONL) สำหรับ pipeline แบบ incremental
+
+ไฟล์ `subtitles/manifest.jsonl` เก็บ record ทีละบรรทัด อ่านแล้ว record หลังสุดชนะ:
+
+- ``video``  : สถานะการดาวน์โหลดของแต่ละวิดีโอ (มาจากผลลัพธ์ของ download_subtitles)
+- ``file``   : size / mtime / sha1 / จำนวนแถวที่ parse ได้ และ dataset ที่ไฟล์นั้นป้อนข้อมูลให้
+- ``output`` : dataset แต่ละไฟล์สร้างจาก input อะไร (sha1 ตอนสร้าง) และลำดับแถวของแต่ละ source
+
+ถ้า size/mtime ของไฟล์ไม่เปลี่ยนจะใช้ sha1 เดิมโดยไม่ต้องอ่านไฟล์ใหม่
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+
+
+class Manifest:
+    def __init__(self, output_dir='subtitles', filename='manifest.jsonl'):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, filename)
+        self.videos = {}
+        self.files = {}
+        self.outputs = {}
+        self._by_url = {}
+        self._lines = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # บรรทัดสุดท้ายอาจเขียนไม่จบถ้า process ถูก kill
+                self._apply(rec)
+                self._lines += 1
+
+    def _apply(self, rec):
+        kind = rec.get('type')
+        if kind == 'video':
+            self.videos[rec['video_id'] or rec['url']] = rec
+            self._by_url[rec['url']] = rec
+        elif kind == 'file':
+            self.files[rec['path']] = rec
+        elif kind == 'output':
+            self.outputs[rec['path']] = rec
+
+    def _append(self, records):
+        if not records:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+                self._apply(rec)
+        self._lines += len(records)
+        live = len(self.videos) + len(self.files) + len(self.outputs)
+        if self._lines > 1000 and self._lines > 4 * live:
+            self.compact()
+
+    def compact(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for table in (self.videos, self.files, self.outputs):
+                for rec in table.values():
+                    f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.path)
+        self._lines = len(self.videos) + len(self.files) + len(self.outputs)
+
+    def key(self, path):
+        return os.path.relpath(path, self.output_dir).replace(os.sep, '/')
+
+    # --- download -------------------------------------------------------
+
+    def record_downloads(self, results, sub_langs):
+        now = time.time()
+        records = []
+        for r in results:
+            if r.get('error'):
+                status = 'error'
+            elif r.get('subtitle_found'):
+                status = 'ok'
+            else:
+                status = 'missing'
+            records.append({'type': 'video', 'video_id': r.get('video_id'), 'url': r.get('url'),
+                            'status': status, 'requested': list(sub_langs), 'langs': r.get('langs', []),
+                            'error': r.get('error'),
+                            'ts': now})
+        self._append(records)
+
+    def settled(self, url, sub_langs):
+        """ผลดาวน์โหลดครั้งก่อนของ url นี้ ถ้าได้ครบทุกภาษาใน sub_langs และไฟล์ .vtt ยังอยู่ครบ
+
+        วิดีโอที่ได้ไม่ครบ (หรือไม่มีซับเลย) ไม่ถือว่าเสร็จ: ภาษาที่ขาดอาจมีทีหลัง (เช่น auto caption)
+        จึงส่งต่อให้ downloader ซึ่งใช้ metadata cache ตัดสินว่าจะเช็คซ้ำเมื่อไร (ตาม TTL)
+        """
+        rec = self._by_url.get(url)
+        if not rec or rec['status'] != 'ok' or not rec['video_id']:
+            return None
+        if not set(sub_langs) <= set(rec['langs']):
+            return None
+        if not all(os.path.exists(os.path.join(self.output_dir, f"{rec['video_id']}.{lang}.vtt")) for lang in rec['langs']):
+            return None
+        return {'video_id': rec['video_id'], 'url': url, 'subtitle_found': True,
+                'langs': rec['langs'], 'downloaded': [], 'cached': True, 'retries': 0, 'error': None}
+
+    # --- files ----------------------------------------------------------
+
+    def fingerprint(self, path):
+        st = os.stat(path)
+        rec = self.files.get(self.key(path))
+        if rec and rec['size'] == st.st_size and rec['mtime_ns'] == st.st_mtime_ns:
+            return rec['sha1']
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        sha1 = h.hexdigest()
+        rec = dict(rec or {}, type='file', path=self.key(path), size=st.st_size,
+                   mtime_ns=st.st_mtime_ns, sha1=sha1)
+        rec.setdefault('rows', None)
+        rec.setdefault('outputs', [])
+        self._append([rec])
+        return sha1
+
+    def fingerprints(self, paths):
+        return {self.key(p): self.fingerprint(p) for p in paths}
+
+    # --- outputs --------------------------------------------------------
+
+    def is_fresh(self, outputs, inputs, params=None):
+        """True ถ้า output ทุกไฟล์มีอยู่และสร้างจาก input (และ option) ชุดเดียวกับตอนนี้"""
+        current = self.fingerprints(inputs)
+        for out in outputs:
+            rec = self.outputs.get(self.key(out))
+            if not rec or not os.path.exists(out) or rec['inputs'] != current or rec.get('params') != params:
+                return False
+        return True
+
+    def unchanged_sources(self, output, source_inputs, params=None):
+        """คืน set ของ source key ที่ input ทุกไฟล์ตรงกับตอนสร้าง output ครั้งก่อน
+
+        source_inputs: {source_key: [input paths]}
+        """
+        rec = self.outputs.get(self.key(output))
+        if not rec or not os.path.exists(output) or rec.get('params') != params:
+            return set()
+        old = rec['inputs']
+        return {src for src, paths in source_inputs.items()
+                if all(old.get(self.key(p)) == self.fingerprint(p) for p in paths)}
+
+    def layout(self, output):
+        rec = self.outputs.get(self.key(output))
+        return rec['layout'] if rec else []
+
+    def record_output(self, output, inputs, layout=None, rows_by_file=None, params=None):
+        records = [{'type': 'output', 'path': self.key(output), 'inputs': self.fingerprints(inputs),
+                    'layout': layout or [], 'params': params, 'ts': time.time()}]
+        out_key = self.key(output)
+        for path in inputs:
+            old = self.files[self.key(path)]
+            rec = dict(old)
+            if rows_by_file and self.key(path) in rows_by_file:
+                rec['rows'] = rows_by_file[self.key(path)]
+            if out_key not in rec['outputs']:
+                rec['outputs'] = rec['outputs'] + [out_key]
+            if rec != old:
+                records.append(rec)
+        self._append(records)
+
+
+class LayoutReader:
+    """อ่านแถวของ output เดิมทีละ source ตาม layout ที่บันทึกไว้ใน manifest
+
+    ใช้ merge แถวของ source ที่ไม่เปลี่ยนเข้ากับ output ใหม่โดยไม่ต้อง parse ใหม่
+    ต้องเรียก take() ตามลำดับ key เดียวกับ layout (เรียงตามชื่อ)
+    """
+
+    def __init__(self, csv_path, layout):
+        self._f = open(csv_path, encoding='utf-8', newline='')
+        self._reader = csv.DictReader(self._f)
+        self._layout = layout
+        self._i = 0
+
+    def take(self, key):
+        while self._i < len(self._layout) and self._layout[self._i][0] < key:
+            for _ in range(self._layout[self._i][1]):
+                next(self._reader)
+            self._i += 1
+        if self._i < len(self._layout) and self._layout[self._i][0] == key:
+            n = self._layout[self._i][1]
+            self._i += 1
+            return [next(self._reader) for _ in range(n)]
+        return None
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,169 @@
+"""แคช metadata ของวิดีโอ (ผลย่อของ yt-dlp extract_info) ลงดิสก์ โดยใช้ video id เป็น key
+
+เก็บเฉพาะ field ที่ pipeline ใช้: id, title, duration และรายชื่อภาษาใน subtitles /
+automatic_captions (ไม่เก็บ info dict ทั้งก้อนที่ใหญ่หลายร้อย KB) ทำให้ตอบได้ว่า
+"วิดีโอนี้มีภาษาที่ยังขาดไหม" และ "วิดีโอไหนมี en+th" (videos_with) โดยไม่ต้องยิง network
+และส่งเฉพาะวิดีโอที่ cache miss ไปให้ yt-dlp
+
+- entry ที่เก่ากว่า ttl วินาทีถือว่าหมดอายุ (ภาษาที่มีอาจเปลี่ยน เช่น auto caption มาทีหลัง)
+- วิดีโอที่ extract_info error (เช่น 404, วิดีโอ private) เก็บเป็น entry status 'error' อายุสั้นกว่า
+  (error_ttl) รอบถัดไปจึงไม่ยิงซ้ำทุกครั้ง แต่ยังได้ลองใหม่เมื่อหมดอายุ
+- เก็บไม่เกิน max_entries ตัว เกินแล้วทิ้งตัวที่ไม่ได้ใช้นานที่สุด (LRU)
+- ไฟล์เป็น JSON ก้อนเดียว โหลดทั้งหมดตอนเปิดและเขียนทับแบบ atomic (.tmp + rename) ตอน save
+- นับ hit/miss และเวลา extract_info เฉลี่ยของ miss เพื่อประมาณเวลาที่ประหยัดได้
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_ERROR_TTL = 3600
+
+
+def summarize_info(info):
+    """info dict ของ yt-dlp -> entry ที่เก็บใน cache"""
+    return {
+        'id': info.get('id'),
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'subtitles': sorted(info.get('subtitles') or {}),
+        'automatic_captions': sorted(info.get('automatic_captions') or {}),
+    }
+
+
+def entry_langs(entry):
+    return set(entry.get('subtitles', ())) | set(entry.get('automatic_captions', ()))
+
+
+class MetadataCache:
+    def __init__(self, path='subtitles/metadata_cache.json', ttl=DEFAULT_TTL, max_entries=50000, clock=time.time,
+                 error_ttl=DEFAULT_ERROR_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.error_ttl = min(error_ttl, ttl)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # เรียงจากใช้ล่าสุดเก่าสุด -> ใหม่สุด
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._miss_time = 0.0
+        self._timed_misses = 0
+        self._avg_lookup_s = None  # ค่าเฉลี่ยจากรอบก่อนๆ (เก็บในไฟล์)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            return  # ไฟล์เสีย: เริ่ม cache ใหม่
+        self._avg_lookup_s = data.get('avg_lookup_s')
+        for entry in sorted(data.get('entries', []), key=lambda e: e.get('used_at', 0)):
+            self._entries[entry['id']] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry):
+        ttl = self.error_ttl if entry.get('status') == 'error' else self.ttl
+        return self._clock() - entry['fetched_at'] > ttl
+
+    def peek(self, vid):
+        """entry ที่ยังไม่หมดอายุ (ไม่นับเป็น hit/miss และไม่ขยับลำดับ LRU)"""
+        entry = self._entries.get(vid)
+        if entry is None or self._expired(entry):
+            return None
+        return entry
+
+    def get(self, vid):
+        with self._lock:
+            entry = self._entries.get(vid)
+            if entry is not None and self._expired(entry):
+                del self._entries[vid]
+                self._dirty = True
+                self.expired += 1
+                entry = None
+            if entry is None:
+                return None
+            entry['used_at'] = self._clock()
+            self._entries.move_to_end(vid)
+            self._dirty = True
+            return entry
+
+    def put(self, info, lookup_s=None):
+        """เก็บผล extract_info (lookup_s = เวลาที่ใช้ดึง ใช้คำนวณเวลาที่ประหยัดได้)"""
+        entry = summarize_info(info)
+        if not entry['id']:
+            return None
+        return self._store(entry, lookup_s)
+
+    def put_error(self, vid, error, lookup_s=None):
+        """เก็บว่า extract_info ของวิดีโอนี้ error (อายุ error_ttl)"""
+        if not vid or self.error_ttl <= 0:
+            return None
+        return self._store({'id': vid, 'status': 'error', 'error': str(error)}, lookup_s)
+
+    def _store(self, entry, lookup_s):
+        now = self._clock()
+        entry['fetched_at'] = entry['used_at'] = now
+        with self._lock:
+            self._entries[entry['id']] = entry
+            self._entries.move_to_end(entry['id'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if lookup_s is not None:
+                self._miss_time += lookup_s
+                self._timed_misses += 1
+            self._dirty = True
+        return entry
+
+    def record(self, hit):
+        """นับผลการ lookup หนึ่งครั้ง: hit = ตอบได้จาก cache โดยไม่ต้องเรียก extract_info"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def avg_lookup_s(self):
+        if self._timed_misses:
+            return self._miss_time / self._timed_misses
+        return self._avg_lookup_s or 0.0
+
+    def videos_with(self, langs):
+        """video id ใน cache (ที่ยังไม่หมดอายุและไม่ใช่ error) ที่มีทุกภาษาใน langs"""
+        langs = set(langs)
+        with self._lock:
+            entries = list(self._entries.values())
+        return [e['id'] for e in entries
+                if e.get('status') != 'error' and not self._expired(e) and langs <= entry_langs(e)]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'lookups': lookups, 'hits': self.hits, 'misses': self.misses, 'expired': self.expired,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'saved_s': self.hits * self.avg_lookup_s, 'entries': len(self._entries)}
+
+    def summary(self):
+        s = self.stats()
+        return (f'Metadata cache: {s["hits"]}/{s["lookups"]} hits ({s["hit_rate"]:.0%}), '
+                f'~{s["saved_s"]:.1f}s of extract_info saved, {s["entries"]} entries')
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'avg_lookup_s': self.avg_lookup_s or None, 'entries': list(self._entries.values())}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(self.path + '.tmp', self.path)
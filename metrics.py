@@ -0,0 +1,243 @@
+"""เก็บ metrics ของแต่ละขั้นตอน (เวลา, counter, peak memory) ลง log แบบ JSONL และ profile ด้วย cProfile
+
+ปิดอยู่เป็นค่าเริ่มต้น: stage() / timed() / add() / event() แค่เช็คตัวแปร global ตัวเดียวแล้วคืนทันที
+เปิดด้วย configure(log_path, profile_dir) (หรือ --metrics / --profile ใน CLI)
+
+- stage(name) : context manager หนึ่งขั้นตอน ตอนจบเขียนหนึ่งบรรทัด {"type": "stage", ...} ลง log
+                มี wall_s, cpu_s, peak_rss_mb (ของทั้ง process ถึงตอนนั้น), rss_growth_mb และ counters
+                stage ซ้อนกันได้ counter ของ stage ลูกจะบวกเข้า stage แม่ด้วย
+- timed(name) : decorator ครอบทั้งฟังก์ชันเป็น stage
+- accumulate(name) : decorator สำหรับฟังก์ชันที่ถูกเรียกบ่อย (เช่น parse ทีละไฟล์) บวกเวลา/จำนวนครั้ง
+                เข้า counter ของ stage ปัจจุบันแทนการเขียน log ทุกครั้ง
+- add(**counters) : บวก counter เข้า stage ปัจจุบัน (thread-safe)
+- event(kind, **fields) : เขียน record อิสระ เช่นผลต่อวิดีโอ
+- record(name, wall_s, **counters) : เขียน record แบบ stage ลูกของ stage ปัจจุบันโดยไม่จับเวลาเอง และไม่บวก counter
+                เข้า stage แม่ (ใช้กับ stage ที่รันรวมใน stream เดียวกัน เช่น chain ของ pipeline ที่วัดเวลาแยกไว้แล้ว)
+- profile_dir : dump cProfile ของ stage นอกสุดเป็น <profile_dir>/<stage>.pstats (อ่านด้วย pstats / snakeviz)
+"""
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+_active = None
+# ru_maxrss เป็น KB บน Linux, byte บน macOS
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT / 1e6
+
+
+class _Recorder:
+    def __init__(self, log_path=None, profile_dir=None):
+        self.log_path = log_path
+        self.profile_dir = profile_dir
+        self.lock = threading.Lock()
+        self.stack = []
+        self.profiling = False
+        self.profile_names = {}
+        self._log = None
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            self._log = open(log_path, 'a', encoding='utf-8')
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        self.run_id = f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}'
+
+    def write(self, record):
+        if self._log is None:
+            return
+        record = dict(record, run=self.run_id, ts=round(time.time(), 3))
+        with self.lock:
+            self._log.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            self._log.flush()
+
+    def profile_path(self, name):
+        n = self.profile_names.get(name, 0)
+        self.profile_names[name] = n + 1
+        return os.path.join(self.profile_dir, f'{name}.pstats' if not n else f'{name}-{n}.pstats')
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class _Stage:
+    def __init__(self, recorder, name, fields):
+        self.recorder = recorder
+        self.name = name
+        self.fields = fields
+        self.counters = {}
+        self.profiler = None
+
+    def __enter__(self):
+        rec = self.recorder
+        with rec.lock:
+            self.parent = rec.stack[-1] if rec.stack else None
+            rec.stack.append(self)
+            if rec.profile_dir and not rec.profiling:
+                rec.profiling = True
+                self.profiler = cProfile.Profile()
+        self.rss0 = _peak_rss_mb()
+        self.cpu0 = time.process_time()
+        self.t0 = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler is not None:
+            self.profiler.disable()
+        wall = time.perf_counter() - self.t0
+        cpu = time.process_time() - self.cpu0
+        rec = self.recorder
+        with rec.lock:
+            if self in rec.stack:
+                rec.stack.remove(self)
+            if self.parent is not None:
+                for k, v in self.counters.items():
+                    self.parent.counters[k] = self.parent.counters.get(k, 0) + v
+        profile = None
+        if self.profiler is not None:
+            profile = rec.profile_path(self.name)
+            self.profiler.dump_stats(profile)
+            rec.profiling = False
+        peak = _peak_rss_mb()
+        record = {'type': 'stage', 'stage': self.name, 'parent': self.parent.name if self.parent else None,
+                  'status': 'error' if exc_type else 'ok', 'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4),
+                  'peak_rss_mb': round(peak, 1), 'rss_growth_mb': round(peak - self.rss0, 1),
+                  'counters': {k: round(v, 4) if isinstance(v, float) else v for k, v in self.counters.items()}}
+        if self.fields:
+            record['fields'] = self.fields
+        if exc_type:
+            record['error'] = f'{exc_type.__name__}: {exc}'
+        if profile:
+            record['profile'] = profile
+        rec.write(record)
+        return False
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def configure(log_path=None, profile_dir=None):
+    """เปิดเก็บ metrics (log_path = ไฟล์ JSONL, profile_dir = โฟลเดอร์เก็บ .pstats) ถ้าไม่ให้ทั้งคู่จะปิด"""
+    global _active
+    disable()
+    if log_path or profile_dir:
+        _active = _Recorder(log_path, profile_dir)
+    return _active
+
+
+def disable():
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def enabled():
+    return _active is not None
+
+
+def stage(name, **fields):
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name, fields)
+
+
+def timed(name=None):
+    def decorate(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with _Stage(_active, stage_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def accumulate(name=None):
+    def decorate(fn):
+        prefix = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                add(**{f'{prefix}_s': time.perf_counter() - t0, f'{prefix}_calls': 1})
+        return wrapper
+    return decorate
+
+
+def add(**counters):
+    rec = _active
+    if rec is None or not rec.stack:
+        return
+    with rec.lock:
+        target = rec.stack[-1].counters
+        for k, v in counters.items():
+            target[k] = target.get(k, 0) + v
+
+
+def event(kind, **fields):
+    if _active is None:
+        return
+    stage = _active.stack[-1].name if _active.stack else None
+    _active.write(dict(fields, type=kind, stage=stage))
+
+
+def record(name, wall_s=0.0, fields=None, **counters):
+    if _active is None:
+        return
+    parent = _active.stack[-1].name if _active.stack else None
+    rec = {'type': 'stage', 'stage': name, 'parent': parent, 'status': 'ok', 'wall_s': round(wall_s, 4),
+           'counters': {k: round(v, 4) if isinstance(v, float) else v for k, v in counters.items()}}
+    if fields:
+        rec['fields'] = fields
+    _active.write(rec)
+
+
+def path_size(path):
+    """ขนาดไฟล์ หรือผลรวมขนาดไฟล์ในโฟลเดอร์ (0 ถ้าไม่มี)"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, n)) for root, _, names in os.walk(path) for n in names)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def add_arguments(parser):
+    parser.add_argument('--metrics', nargs='?', const='subtitles/metrics.jsonl', metavar='PATH',
+                        help='Append per-stage timings, counters and peak memory as JSONL (default path: subtitles/metrics.jsonl)')
+    parser.add_argument('--profile', nargs='?', const='subtitles/profiles', metavar='DIR',
+                        help='Write a cProfile .pstats dump per top-level stage (default dir: subtitles/profiles)')
+
+
+def configure_from_args(args):
+    recorder = configure(args.metrics, args.profile)
+    if recorder is not None:
+        if args.metrics:
+            print(f'Metrics: appending to {args.metrics} (run {recorder.run_id})')
+        if args.profile:
+            print(f'Profiles: writing .pstats files to {args.profile}')
+    return recorder
@@ -0,0 +1,32 @@
+"""Parse ไฟล์ VTT หลายไฟล์พร้อมกันด้วย process pool โดยผลลัพธ์ยังเรียงตามลำดับ input
+
+worker ส่งผลกลับเป็น CueColumns (numpy array + string ก้อนเดียวต่อคอลัมน์) แทน list ของ
+dict ต่อ cue เพื่อให้ค่า pickle ระหว่าง process ต่ำ
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from vtt_parser import parse_columns
+
+
+def map_ordered(fn, items, workers=1, window=None):
+    """เหมือน map(fn, items) แต่รันใน process pool; เก็บงานค้างไม่เกิน window ชิ้น"""
+    if workers is None or workers <= 1:
+        yield from map(fn, items)
+        return
+    window = window or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_files(paths, workers=1, parse=parse_columns):
+    """yield (path, CueColumns) ตามลำดับของ paths"""
+    paths = list(paths)
+    workers = min(workers or 1, max(1, len(paths)))
+    yield from zip(paths, map_ordered(parse, paths, workers))
@@ -0,0 +1,409 @@
+"""รันทุกขั้นตอนของ pipeline เป็น DAG ของ stage แทนการเรียกฟังก์ชัน/สคริปต์ทีละตัว
+
+stage ที่มี (ชื่อ: ขึ้นกับ -> output):
+- download        :                  -> ไฟล์ .vtt
+- export          : download         -> dataset.csv, dataset.jsonl (หรือ .json), dataset_parquet/, corpus_index/
+- text            : export           -> dataset_text_only.txt
+- text-dedup      : text             -> dataset_text_only_dedup.txt
+- parallel        : download         -> dataset_parallel.csv
+- parallel-clean  : parallel         -> dataset_parallel_clean.csv        (เดิม clean_parallel_dataset.py)
+- parallel-dedup  : parallel-clean   -> dataset_parallel_clean_dedup.csv  (เดิม dedup_parallel_dataset.py)
+- split           : parallel-dedup   -> dataset_buckets/ (shard สองทางแยกตามความยาว + stats.json, เดิม split_long_short_parallel.py)
+- both            : parallel-dedup   -> dataset_parallel_both_directions.csv
+
+stage ที่อยู่ถัดจาก export / parallel ถูกรวม (fuse) เป็น chain เดียวที่รับแถวเป็น batch:
+ถ้า export/parallel ต้องสร้างใหม่ chain จะรับแถวจาก stream เดียวกับที่เขียน dataset.csv /
+dataset_parallel.csv (ผ่าน taps) ถ้าไม่ต้องสร้างใหม่จะอ่านไฟล์นั้นทีละ chunk ครั้งเดียว
+ไฟล์กลางทางเขียนเฉพาะ stage ที่อยู่ใน targets และ chain ที่ output ทุกไฟล์ยังใหม่อยู่ตาม manifest
+(input และ params ไม่เปลี่ยน) จะถูกข้ามทั้ง chain
+
+output ของแต่ละ stage บันทึกใน manifest แบบเดียว: input = ไฟล์ต้นทางของ chain (dataset.csv / dataset_parallel.csv)
+และ params สะสมตาม chain (ดู Pipeline.params) คำสั่งที่รันทีละ stage (app.py clean / dedup, clean_parallel_dataset.py ฯลฯ)
+เรียก Pipeline.run(..., upstream=False) จึงใช้โค้ดและ manifest ชุดเดียวกัน ไม่สร้าง output ที่อีกทางสร้างไว้แล้วซ้ำ
+"""
+import os
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+import metrics
+from app import download_subtitles, export_all_vtt_to_datasets, export_parallel_dataset
+from dataset_writers import CsvFrameWriter, TextBlockWriter
+from dedup import Deduper
+from length_buckets import DEFAULT_BOUNDS, LengthBucketer, check_bounds
+from manifest import Manifest
+from text_cleaning import DEFAULT_RULES, TextCleaner
+
+Stage = namedtuple('Stage', ['name', 'deps', 'chain'])
+
+STAGES = {s.name: s for s in [
+    Stage('download', [], None),
+    Stage('export', ['download'], None),
+    Stage('text', ['export'], 'export'),
+    Stage('text-dedup', ['text'], 'export'),
+    Stage('parallel', ['download'], None),
+    Stage('parallel-clean', ['parallel'], 'parallel'),
+    Stage('parallel-dedup', ['parallel-clean'], 'parallel'),
+    Stage('split', ['parallel-dedup'], 'parallel'),
+    Stage('both', ['parallel-dedup'], 'parallel'),
+]}
+
+# output ของ python app.py all แบบเดิม + shard สำหรับ train แยกตามความยาว
+DEFAULT_TARGETS = ('download', 'export', 'parallel', 'text', 'text-dedup', 'split', 'both')
+
+PARALLEL_FIELDS = ['video_id', 'text_original', 'text_thai']
+
+
+def resolve(targets):
+    """targets + stage ที่ต้องรันก่อน เรียงตามลำดับใน STAGES (ซึ่งเป็น topological order อยู่แล้ว)"""
+    unknown = set(targets) - set(STAGES)
+    if unknown:
+        raise ValueError(f'Unknown pipeline stages: {sorted(unknown)}')
+    needed = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(STAGES[name].deps)
+    return [name for name in STAGES if name in needed]
+
+
+class _Chain:
+    """stage ที่ต่อกันเป็น stream เดียว; มี write(row) / close() แบบเดียวกับ writer ใน dataset_writers
+    จึงใช้เป็น tap ของ export ได้ และรับ DataFrame ทั้ง chunk ผ่าน write_frame ตอนอ่านจากไฟล์"""
+
+    def __init__(self, pipeline, compute, write, fields):
+        self.pipeline = pipeline
+        self.compute = compute
+        self.fields = fields
+        self.writers = {}
+        self._buf = []
+        self.closed = False
+        self.rows = 0
+        self.counts = {}  # stage -> counter ที่บันทึกลง metrics ตอนปิด chain
+        self.dedupers = {}  # stage -> Deduper (counter rows_in/rows_out/exact_dups/near_dups)
+
+    def _count(self, stage, **counters):
+        target = self.counts.setdefault(stage, {})
+        for k, v in counters.items():
+            target[k] = target.get(k, 0) + v
+
+    def _timed(self, stage, t0):
+        t1 = time.perf_counter()
+        self.pipeline.timings[stage] = self.pipeline.timings.get(stage, 0.0) + t1 - t0
+        return t1
+
+    def write(self, row):
+        self._buf.append(row)
+        if len(self._buf) >= self.pipeline.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buf:
+            df = pd.DataFrame(self._buf, columns=self.fields)
+            self._buf = []
+            self.write_frame(df)
+
+    def write_frame(self, df):
+        self.rows += len(df)
+        self.process(df.reset_index(drop=True))
+
+    def close(self, discard=False):
+        try:
+            if not discard:
+                self._flush()
+                self.finish()
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            for w in self.writers.values():
+                w.close(discard=discard)
+            self.closed = True
+        if not discard:
+            self.report_counters()
+
+    def finish(self):
+        pass
+
+    def stage_counters(self, stage):
+        counters = dict(self.counts.get(stage, {}))
+        deduper = self.dedupers.get(stage)
+        if deduper is not None and deduper.rows:
+            counters.update(deduper.counters())
+        if stage == 'split' and 'split' in self.writers:
+            counters.update(self.writers['split'].counters())
+        return counters
+
+    def report_counters(self):
+        # stage ใน chain รันรวมกันใน stream เดียว จึงเขียน record แยกต่อ stage (เวลาจาก self.pipeline.timings)
+        for stage in self.compute:
+            counters = self.stage_counters(stage)
+            if not counters:
+                continue
+            if stage in self.dedupers:
+                print(f'Dedup ({stage}): {self.dedupers[stage].summary()}')
+            written = self.pipeline.bytes_written(stage) if stage in self.writers else 0
+            metrics.record(stage, self.pipeline.timings.get(stage, 0.0), {'written': stage in self.writers},
+                           bytes_written=written, **counters)
+
+
+class TextChain(_Chain):
+    """dataset.csv -> clean -> dataset_text_only.txt -> dedup -> dataset_text_only_dedup.txt"""
+
+    def __init__(self, pipeline, compute, write):
+        super().__init__(pipeline, compute, write, ['video_id', 'start', 'end', 'text'])
+        self.cleaner = TextCleaner(pipeline.rules)
+        self.deduper = Deduper(near=pipeline.near, threshold=pipeline.threshold)
+        self.dedupers = {'text-dedup': self.deduper}
+        self.writers = {stage: TextBlockWriter(pipeline.outputs(stage)[0]) for stage in write}
+
+    def process(self, df):
+        t0 = time.perf_counter()
+        # เหมือน export_clean_text: to_csv ทีละบรรทัด (ข้อความที่มี , หรือ " ถูก quote)
+        block = self.cleaner.clean_series(df['text']).to_csv(index=False, header=False)
+        if 'text' in self.writers:
+            self.writers['text'].write_block(block, len(df))
+        self._count('text', rows_in=len(df), rows_out=len(df))
+        t0 = self._timed('text', t0)
+        if 'text-dedup' in self.compute:
+            # เหมือน export_clean_text_dedup ที่อ่าน dataset_text_only.txt กลับมา: strip และข้ามบรรทัดว่าง
+            lines = [line for line in map(str.strip, block.split('\n')) if line]
+            if lines:
+                keep = self.deduper.keep_mask(lines).tolist()
+                kept = [line for line, k in zip(lines, keep) if k]
+                if 'text-dedup' in self.writers:
+                    self.writers['text-dedup'].write_block(''.join(line + '\n' for line in kept), len(kept))
+            self._count('text-dedup', skipped_empty=len(df) - len(lines))
+            self._timed('text-dedup', t0)
+
+
+class ParallelChain(_Chain):
+    """dataset_parallel.csv -> clean -> dedup -> (split เป็น bucket ตามความยาว, both directions)"""
+
+    def __init__(self, pipeline, compute, write):
+        super().__init__(pipeline, compute, write, PARALLEL_FIELDS)
+        self.cleaner = TextCleaner(pipeline.rules)
+        self.deduper = Deduper(near=pipeline.near, threshold=pipeline.threshold)
+        self.both_deduper = Deduper(near=pipeline.near, threshold=pipeline.threshold)
+        self.dedupers = {'parallel-dedup': self.deduper, 'both': self.both_deduper}
+        self.writers = {}
+        for stage in write:
+            paths = pipeline.outputs(stage)
+            if stage == 'split':
+                self.writers['split'] = LengthBucketer(paths[0], bounds=pipeline.buckets, shard_rows=pipeline.bucket_rows,
+                                                       seed=pipeline.seed)
+            elif stage == 'both':
+                self.writers['both'] = CsvFrameWriter(paths[0], ['src', 'tgt'])
+            else:
+                self.writers[stage] = CsvFrameWriter(paths[0], PARALLEL_FIELDS)
+        # TH→EN ต้องต่อท้าย EN→TH ทั้งหมด จึงพักไว้ในไฟล์ชั่วคราวก่อน
+        self._reverse = CsvFrameWriter(pipeline.outputs('both')[0] + '.reverse', ['src', 'tgt']) if 'both' in compute else None
+
+    def process(self, df):
+        t0 = time.perf_counter()
+        df = df.assign(text_original=self.cleaner.clean_series(df['text_original']),
+                       text_thai=self.cleaner.clean_series(df['text_thai']))
+        if 'parallel-clean' in self.writers:
+            self.writers['parallel-clean'].write_frame(df)
+        self._count('parallel-clean', rows_in=len(df), rows_out=len(df))
+        t0 = self._timed('parallel-clean', t0)
+        if 'parallel-dedup' not in self.compute:
+            return
+        df = df[self.deduper.keep_mask(df['text_original'], df['text_thai'])]
+        if 'parallel-dedup' in self.writers:
+            self.writers['parallel-dedup'].write_frame(df)
+        t0 = self._timed('parallel-dedup', t0)
+        if 'split' in self.writers:
+            self.writers['split'].write_frame(df)
+            t0 = self._timed('split', t0)
+        if 'both' not in self.compute:
+            return
+        self._write_both(pd.DataFrame({'src': df['text_original'], 'tgt': df['text_thai']}))
+        self._reverse.write_frame(pd.DataFrame({'src': df['text_thai'], 'tgt': df['text_original']}))
+        self._timed('both', t0)
+
+    def _write_both(self, df):
+        df = df[self.both_deduper.keep_mask(df['src'], df['tgt'])]
+        if 'both' in self.writers:
+            self.writers['both'].write_frame(df)
+
+    def finish(self):
+        if self._reverse is None:
+            return
+        t0 = time.perf_counter()
+        self._reverse.close()
+        try:
+            for df in pd.read_csv(self._reverse.path, dtype=str, keep_default_na=False, chunksize=self.pipeline.batch_size):
+                self._write_both(df)
+        finally:
+            os.remove(self._reverse.path)
+            self._reverse = None
+        self._timed('both', t0)
+
+    def close(self, discard=False):
+        if discard and self._reverse is not None:
+            self._reverse.close(discard=True)
+            self._reverse = None
+        super().close(discard)
+
+
+CHAINS = {'export': TextChain, 'parallel': ParallelChain}
+
+
+class Pipeline:
+    def __init__(self, output_dir='subtitles', incremental=True, workers=1, collapse='auto', json_array=False,
+                 aligner='overlap', min_overlap=0.5, tolerance_ms=200, rules=DEFAULT_RULES,
+                 near=False, threshold=0.7, batch_size=65536, shard_rows=1000000, buckets=DEFAULT_BOUNDS,
+                 bucket_rows=100000, seed=0):
+        self.output_dir = output_dir
+        self.incremental = incremental
+        self.workers = workers
+        self.collapse = collapse
+        self.json_array = json_array
+        self.aligner = aligner
+        self.min_overlap = min_overlap
+        self.tolerance_ms = tolerance_ms
+        self.rules = tuple(rules)
+        self.near = near
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.shard_rows = shard_rows
+        self.buckets = check_bounds(dict(DEFAULT_BOUNDS, **buckets))
+        self.bucket_rows = bucket_rows
+        self.seed = seed
+        self.timings = {}
+        self.report = []
+
+    def outputs(self, stage):
+        d = self.output_dir
+        return {
+            'download': [],
+            'export': [f'{d}/dataset.csv', f'{d}/dataset.json' if self.json_array else f'{d}/dataset.jsonl', f'{d}/dataset_parquet',
+                       f'{d}/corpus_index'],
+            'text': [f'{d}/dataset_text_only.txt'],
+            'text-dedup': [f'{d}/dataset_text_only_dedup.txt'],
+            'parallel': [f'{d}/dataset_parallel.csv'],
+            'parallel-clean': [f'{d}/dataset_parallel_clean.csv'],
+            'parallel-dedup': [f'{d}/dataset_parallel_clean_dedup.csv'],
+            'split': [f'{d}/dataset_buckets'],
+            'both': [f'{d}/dataset_parallel_both_directions.csv'],
+        }[stage]
+
+    def params(self, stage):
+        # params สะสมตาม chain: เปลี่ยนกฎ clean แล้ว stage ถัดไปทุกตัวต้องสร้างใหม่
+        params = {'rules': list(self.rules)}
+        if stage in ('text-dedup', 'parallel-dedup', 'split', 'both'):
+            params.update(near=self.near, threshold=self.threshold if self.near else None)
+        if stage == 'split':
+            params.update(buckets={measure: list(b) for measure, b in self.buckets.items()}, bucket_rows=self.bucket_rows, seed=self.seed)
+        return params
+
+    def run(self, targets=DEFAULT_TARGETS, video_urls=None, sub_langs=('en', 'th'), download_workers=4, rate=1.0, refresh=False,
+            ydl_factory=None, cache_ttl=168.0, cache_size=50000, upstream=True):
+        """รัน targets (และ stage ที่ต้องมาก่อน) คืน list ของ dict สรุปเวลา/ขนาดไฟล์ต่อ stage
+
+        upstream=False ไม่รัน download / export / parallel ที่อยู่ก่อน targets แต่ใช้ dataset.csv / dataset_parallel.csv
+        ที่มีอยู่แล้วเป็น input ของ chain (แบบคำสั่งที่รันทีละ stage)
+        """
+        plan = resolve(targets)
+        if video_urls is None and 'download' in plan:
+            plan.remove('download')
+        if not upstream:
+            plan = [s for s in plan if s in targets or STAGES[s].chain is not None]
+        self.timings, self.report = {}, []
+        if 'download' in plan:
+            t0 = time.perf_counter()
+            download_subtitles(video_urls, list(sub_langs), self.output_dir, workers=download_workers, rate=rate,
+                               refresh=refresh, ydl_factory=ydl_factory, cache_ttl=cache_ttl, cache_size=cache_size)
+            self._report('download', 'ran', time.perf_counter() - t0, 0)
+        for root, export in (('export', self._export), ('parallel', self._parallel)):
+            compute = [s for s in plan if STAGES[s].chain == root]
+            if root not in plan and not compute:
+                continue
+            write = [s for s in compute if s in targets]
+            tap = None
+            if root in plan:
+                tap = CHAINS[root](self, compute, write) if write else None
+                before = self._stat(root)
+                t0 = time.perf_counter()
+                try:
+                    export(taps=[tap] if tap else [])
+                except BaseException:
+                    if tap and not tap.closed:
+                        tap.close(discard=True)
+                    raise
+                wall = time.perf_counter() - t0 - sum(self.timings.get(s, 0.0) for s in compute)
+                ran = self._stat(root) != before
+                self._report(root, 'ran' if ran else 'fresh', wall, self.bytes_written(root) if ran else 0)
+                if tap is None:
+                    continue
+            manifest = Manifest(self.output_dir)  # โหลดใหม่หลัง export บันทึก output ของตัวเองแล้ว
+            if tap is not None and tap.closed:
+                # export สร้างไฟล์ใหม่และส่งแถวเข้า chain ไปพร้อมกันแล้ว
+                done, status = write, 'fused'
+            else:
+                if tap is not None:
+                    tap.close(discard=True)
+                source = self.outputs(root)[0]
+                if not os.path.exists(source):
+                    raise FileNotFoundError(f'{source} not found; run the {root} stage first')
+                done = [s for s in write if not (self.incremental and manifest.is_fresh(self.outputs(s), [source], self.params(s)))]
+                status = 'ran'
+                if done:
+                    # source ไม่เปลี่ยนแต่ stage ปลายทางเก่า: อ่าน source ครั้งเดียวแล้วไหลผ่านทั้ง chain
+                    # เขียนเฉพาะ output ที่เก่า
+                    with metrics.stage(f'{root}-chain', stages=done):
+                        chain = CHAINS[root](self, compute, done)
+                        try:
+                            for df in pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=self.batch_size):
+                                chain.write_frame(df)
+                        except BaseException:
+                            chain.close(discard=True)
+                            raise
+                        chain.close()
+                        metrics.add(rows_in=chain.rows, bytes_read=metrics.path_size(source))
+            for s in compute:
+                for path in self.outputs(s) if s in done else []:
+                    manifest.record_output(path, [self.outputs(root)[0]], params=self.params(s))
+                if s in done:
+                    self._report(s, status, self.timings.get(s, 0.0), self.bytes_written(s))
+                elif s in write or not done:
+                    self._report(s, 'fresh', 0.0, 0)
+                else:
+                    self._report(s, 'streamed', self.timings.get(s, 0.0), 0)
+        self.print_report()
+        metrics.event('pipeline', targets=list(targets), stages=self.report)
+        return self.report
+
+    def _export(self, taps):
+        export_all_vtt_to_datasets(self.output_dir, incremental=self.incremental, json_array=self.json_array,
+                                   workers=self.workers, collapse=self.collapse, shard_rows=self.shard_rows, taps=taps)
+
+    def _parallel(self, taps):
+        export_parallel_dataset(self.output_dir, incremental=self.incremental, workers=self.workers,
+                                aligner=self.aligner, min_overlap=self.min_overlap,
+                                tolerance_ms=self.tolerance_ms, collapse=self.collapse, taps=taps)
+
+    def _stat(self, stage):
+        return [(os.stat(p).st_mtime_ns, os.stat(p).st_size) if os.path.exists(p) else None for p in self.outputs(stage)]
+
+    def bytes_written(self, stage):
+        return sum(metrics.path_size(p) for p in self.outputs(stage))
+
+    def _report(self, stage, status, wall, written):
+        self.report.append({'stage': stage, 'status': status, 'wall_s': round(wall, 3), 'bytes_written': written})
+
+    def print_report(self):
+        print(f'{"stage":16s} {"status":9s} {"wall_s":>8s} {"written":>12s}')
+        for r in self.report:
+            print(f'{r["stage"]:16s} {r["status"]:9s} {r["wall_s"]:8.2f} {_size(r["bytes_written"]):>12s}')
+
+
+def _size(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f'{n:.0f} {unit}' if unit == 'B' else f'{n:.1f} {unit}'
+        n /= 1024
@@ -0,0 +1,134 @@
+"""Fake yt-dlp extractor สำหรับ benchmark / ทดสอบ downloader แบบ offline
+
+StubServer เก็บ info dict สำเร็จรูปและจำลอง latency กับ rate limit ฝั่ง server
+(เกินโควต้าจะโยน HTTP 429 แบบเดียวกับ yt-dlp) ส่วน StubYoutubeDL มี API
+ชุดเดียวกับที่ SubtitleDownloader เรียกใช้: extract_info / process_ie_result
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from downloader import video_id_from_url
+
+
+class StubHTTPError(Exception):
+    def __init__(self, code, msg):
+        super().__init__(f'HTTP Error {code}: {msg}')
+        self.code = code
+
+
+def make_vtt(vid, lang, cues=20, cue_ms=2500):
+    lines = ['WEBVTT', 'Kind: captions', f'Language: {lang}', '']
+    for i in range(cues):
+        start, end = i * cue_ms, (i + 1) * cue_ms
+        lines.append(f'{_ts(start)} --> {_ts(end)}')
+        lines.append(f'{vid} {lang} line {i}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def _ts(ms):
+    h, rem = divmod(ms, 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f'{h:02d}:{m:02d}:{s:02d}.{ms:03d}'
+
+
+def make_catalog(n, langs=('en', 'th'), auto_rate=0.5, missing_rate=0.2, seed=0):
+    """สร้าง {url: info} จำนวน n วิดีโอ บางภาษาเป็น auto caption บางภาษาไม่มี"""
+    rng = random.Random(seed)
+    catalog = {}
+    for i in range(n):
+        vid = f'stub{i:07d}'
+        info = {'id': vid, 'title': f'Stub video {i}', 'duration': 60 + i % 600,
+                'subtitles': {}, 'automatic_captions': {}}
+        for lang in langs:
+            r = rng.random()
+            if r < missing_rate:
+                continue
+            key = 'automatic_captions' if r < missing_rate + auto_rate * (1 - missing_rate) else 'subtitles'
+            info[key][lang] = [{'ext': 'vtt', 'url': f'stub://{vid}.{lang}.vtt'}]
+        catalog[f'https://www.youtube.com/watch?v={vid}'] = info
+    return catalog
+
+
+class StubServer:
+    def __init__(self, catalog, latency=0.05, max_rps=None, window=1.0, sleep=time.sleep):
+        self.catalog = catalog
+        self.latency = latency
+        self.max_rps = max_rps
+        self.window = window
+        self.sleep = sleep
+        self.requests = 0
+        self.throttled = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.requests += 1
+            if self.max_rps is not None:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > self.window:
+                    self._recent.popleft()
+                if len(self._recent) >= self.max_rps * self.window:
+                    self.throttled += 1
+                    raise StubHTTPError(429, 'Too Many Requests')
+                self._recent.append(now)
+        if self.latency:
+            self.sleep(self.latency)
+
+    def lookup(self, url):
+        info = self.catalog.get(url)
+        if info is None:
+            vid = video_id_from_url(url)
+            info = next((i for i in self.catalog.values() if i['id'] == vid), None)
+        if info is None:
+            raise StubHTTPError(404, 'Not Found')
+        return info
+
+    def factory(self, params):
+        return StubYoutubeDL(params, self)
+
+
+class StubYoutubeDL:
+    def __init__(self, params, server):
+        self.params = params
+        self.server = server
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def extract_info(self, url, download=True):
+        self.server.hit()
+        info = dict(self.server.lookup(url))
+        wanted = self.params.get('subtitleslangs') or []
+        requested = {}
+        for lang in wanted:
+            if self.params.get('writesubtitles') and lang in info['subtitles']:
+                requested[lang] = info['subtitles'][lang][0]
+            elif self.params.get('writeautomaticsub') and lang in info['automatic_captions']:
+                requested[lang] = info['automatic_captions'][lang][0]
+        info['requested_subtitles'] = requested
+        if download:
+            self.process_ie_result(info, download=True)
+        return info
+
+    def process_ie_result(self, info, download=True):
+        if not download:
+            return info
+        outtmpl = self.params.get('outtmpl', '%(id)s.%(ext)s')
+        base = os.path.splitext(outtmpl % {'id': info['id'], 'ext': 'x'})[0]
+        for lang, sub in (info.get('requested_subtitles') or {}).items():
+            path = f"{base}.{lang}.{sub['ext']}"
+            if os.path.exists(path):
+                continue
+            self.server.hit()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(make_vtt(info['id'], lang))
+        return info
@@ -0,0 +1,25 @@
+from aligner import align_overlap
+
+
+def short_cues(n, start=0, step=1000):
+    return [(start + k * step, start + (k + 1) * step, f'b{k}') for k in range(n)]
+
+
+def test_merge_within_cap():
+    # cue ยาวหนึ่ง cue ครอบ cue สั้นสามตัว (= max_merge) รวมเป็นคู่เดียว
+    pairs = align_overlap([(0, 3000, 'long')], short_cues(3))
+    assert [(p.src, p.tgt, p.n_src, p.n_tgt) for p in pairs] == [('long', 'b0 b1 b2', 1, 3)]
+
+
+def test_group_capped_by_max_merge_is_rejected():
+    # cue ยาว 10 วินาทีกับ cue สั้น 10 ตัว: ตัดที่ 3 cue จะได้คำแปลขาดท้าย จึงต้องไม่มีคู่ของ 'long'
+    long_cue = [(0, 10000, 'long')]
+    assert align_overlap(long_cue, short_cues(10)) == []
+    assert align_overlap(short_cues(10), long_cue) == []
+
+
+def test_capped_group_does_not_swallow_following_pairs():
+    a = [(0, 10000, 'long'), (10000, 11000, 'next')]
+    b = short_cues(10) + [(10000, 11000, 'b-next')]
+    pairs = align_overlap(a, b)
+    assert [(p.src, p.tgt) for p in pairs] == [('next', 'b-next')]
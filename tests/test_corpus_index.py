@@ -0,0 +1,64 @@
+import contextlib
+import csv
+import io
+
+import app
+from corpus_index import CorpusIndex
+from vtt_parser import parse_ms
+
+
+def write_vtt(d, vid, lang, n, step):
+    # ภาษาต่างกันใช้ความยาว cue ต่างกัน จะได้มี cue ที่ครอบเวลาไม่ตรงกันพอดี
+    with open(d / f'{vid}.{lang}.vtt', 'w', encoding='utf-8') as f:
+        f.write('WEBVTT\n\n')
+        for k in range(n):
+            f.write(f'00:{k * step // 60:02d}:{k * step % 60:02d}.000 --> 00:{(k + 1) * step // 60:02d}:{(k + 1) * step % 60:02d}.000\n')
+            f.write(f'{vid} {lang} cue {k}\n\n')
+
+
+def build(tmp_path):
+    for v in range(5):
+        write_vtt(tmp_path, f'vid{v}', 'en', 12, 2)
+        if v != 4:
+            write_vtt(tmp_path, f'vid{v}', 'th', 8, 3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.export_all_vtt_to_datasets(str(tmp_path), incremental=False)
+    with open(tmp_path / 'dataset.csv', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row['lang'] = row['text'].split()[1]
+    return rows
+
+
+def test_index_matches_the_csv(tmp_path):
+    rows = build(tmp_path)
+    with CorpusIndex(str(tmp_path / 'corpus_index')) as index:
+        assert len(index) == len(rows)
+        for i, row in enumerate(rows):
+            assert index.cue(i) == {'video_id': row['video_id'], 'lang': row['lang'], 'start_ms': parse_ms(row['start']),
+                                    'end_ms': parse_ms(row['end']), 'text': row['text']}
+        # at(): cue ที่ครอบเวลา ms ตรงกับแถวใน CSV ที่ start <= ms < end
+        for vid in ('vid0', 'vid4'):
+            for lang in ('en', 'th'):
+                for ms in range(0, 26000, 700):
+                    expected = [r['text'] for r in rows if r['video_id'] == vid and r['lang'] == lang
+                                and parse_ms(r['start']) <= ms < parse_ms(r['end'])]
+                    cue = index.at(vid, lang, ms)
+                    assert (cue['text'] if cue else None) == (expected[0] if expected else None)
+        assert index.at('missing', 'en', 0) is None
+
+
+def test_sample_pairs_come_from_aligned_csv_rows(tmp_path):
+    rows = build(tmp_path)
+    by_text = {r['text']: r for r in rows}
+    with CorpusIndex(str(tmp_path / 'corpus_index')) as index:
+        pairs = index.sample_pairs(50, 'en', 'th', seed=0)
+        assert len(pairs) == 50
+        assert pairs == index.sample_pairs(50, 'en', 'th', seed=0)
+        for src, tgt in pairs:
+            s, t = by_text[src['text']], by_text[tgt['text']]
+            assert s['lang'] == 'en' and t['lang'] == 'th' and s['video_id'] == t['video_id'] != 'vid4'
+            # cue th ครอบจุดกึ่งกลางของ cue en
+            mid = (parse_ms(s['start']) + parse_ms(s['end'])) // 2
+            assert parse_ms(t['start']) <= mid < parse_ms(t['end'])
+        assert index.sample_pairs(5, 'en', 'ja') == []
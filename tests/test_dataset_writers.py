@@ -0,0 +1,59 @@
+import os
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from dataset_writers import ShardedParquetWriter
+from vtt_parser import format_ms
+
+
+def make_rows():
+    rows = []
+    for v in range(4):
+        for lang in ('en', 'th'):
+            for k in range(6):
+                rows.append({'video_id': f'vid{v}', 'lang': lang, 'start': format_ms(k * 1000),
+                             'end': format_ms(k * 1000 + 900), 'text': f'{lang} {v} {k}'})
+    return rows
+
+
+def test_sharded_parquet_round_trip(tmp_path):
+    path = str(tmp_path / 'dataset_parquet')
+    rows = make_rows()
+    writer = ShardedParquetWriter(path, shard_rows=5, row_group_size=2)
+    for row in rows:
+        writer.write(row)
+    writer.close()
+
+    # partition ตามภาษา แต่ละ shard ไม่เกิน shard_rows และมี _common_metadata / _metadata
+    shards = sorted(os.path.relpath(os.path.join(root, n), path) for root, _, names in os.walk(path)
+                    for n in names if n.endswith('.parquet'))
+    assert shards[0] == os.path.join('lang=en', 'part-00000.parquet') and len(shards) == 10
+    assert all(pq.read_metadata(os.path.join(path, s)).num_rows <= 5 for s in shards)
+    assert pq.read_schema(os.path.join(path, '_common_metadata')).equals(writer.schema)
+    assert pq.read_metadata(os.path.join(path, '_metadata')).num_rows == len(rows)
+    assert not os.path.exists(path + '.tmp')
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    assert dataset.schema.field('video_id').type == pa.dictionary(pa.int32(), pa.string())
+    assert dataset.schema.field('start_ms').type == pa.int32()
+    for lang in ('en', 'th'):
+        table = dataset.to_table(filter=ds.field('lang') == lang)
+        expected = [r for r in rows if r['lang'] == lang]
+        assert table.column('text').to_pylist() == [r['text'] for r in expected]
+        assert table.column('video_id').to_pylist() == [r['video_id'] for r in expected]
+        assert table.column('start_ms').to_pylist() == [int(r['start'][6:8]) * 1000 for r in expected]
+        assert table.column('end_ms').to_pylist() == [int(r['start'][6:8]) * 1000 + 900 for r in expected]
+
+
+def test_discarded_writer_leaves_the_previous_dataset(tmp_path):
+    path = str(tmp_path / 'dataset_parquet')
+    writer = ShardedParquetWriter(path)
+    writer.write(make_rows()[0])
+    writer.close()
+    writer = ShardedParquetWriter(path)
+    writer.write(make_rows()[1])
+    writer.close(discard=True)
+    assert pq.read_table(path).column('text').to_pylist() == ['en 0 0']
+    assert not os.path.exists(path + '.tmp')
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from dedup import Deduper, HashIndex
+
+A = 'the quick brown fox jumps over the lazy dog near the river bank today'
+B = 'the quick brown fox jumps over the lazy cat near the river bank today'  # 3-gram Jaccard ~0.84
+
+
+def test_hash_index_merges_runs_and_finds_every_key():
+    index = HashIndex()
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 2 ** 63, 5000, dtype=np.uint64)
+    for start in range(0, len(keys), 37):
+        index.insert(keys[start:start + 37])
+    # merge แบบ LSM: จำนวนก้อนไม่เกิน ~log2(n)
+    assert 1 < len(index.runs) <= int(np.log2(len(keys))) + 1
+    assert len(index) == len(np.unique(keys))
+    found, _ = index.lookup(keys)
+    assert found.all()
+    found, _ = index.lookup(rng.integers(0, 2 ** 63, 1000, dtype=np.uint64))
+    assert not found.any()
+
+
+def test_exact_duplicates_are_dropped_across_batches():
+    rng = np.random.default_rng(1)
+    texts = [f'line {k}' for k in rng.integers(0, 800, 4000)]
+    deduper = Deduper(normalize=False)
+    kept = []
+    # batch เล็กทำให้ index มีหลายก้อน แถวซ้ำกับ batch ก่อนๆ ต้องถูกตัดทุกครั้ง
+    for start in range(0, len(texts), 50):
+        batch = texts[start:start + 50]
+        kept.extend(t for t, keep in zip(batch, deduper.keep_mask(batch)) if keep)
+    assert len(deduper.index.runs) > 1
+    assert kept == pd.Series(texts).drop_duplicates().tolist()
+    assert deduper.counters() == {'rows_in': 4000, 'rows_out': len(kept), 'exact_dups': 4000 - len(kept), 'near_dups': 0}
+
+
+def test_exact_dedup_normalizes_case_and_whitespace():
+    deduper = Deduper()
+    assert deduper.keep_mask(['Hello  World', 'hello world', ' HELLO WORLD ']).tolist() == [True, False, False]
+    # คู่ src/tgt: ลำดับคอลัมน์มีผล
+    deduper = Deduper()
+    assert deduper.keep_mask(['a', 'b', 'a'], ['b', 'a', 'b']).tolist() == [True, True, False]
+
+
+def test_near_duplicate_threshold():
+    for threshold, dup in ((0.7, True), (0.99, False)):
+        deduper = Deduper(near=True, threshold=threshold)
+        deduper.keep_mask([A])
+        # near-duplicate กับแถวใน batch ก่อนหน้า
+        assert deduper.keep_mask([B]).tolist() == [not dup]
+        assert deduper.near_dups == int(dup)
+    # ภายใน batch เดียวกัน และข้อความที่ต่างกันชัดเจนไม่ถูกตัด
+    deduper = Deduper(near=True, threshold=0.7)
+    assert deduper.keep_mask([A, B, 'something entirely different here']).tolist() == [True, False, True]
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import time
+
+from app import cached_videos, download_subtitles
+from metadata_cache import DEFAULT_ERROR_TTL, MetadataCache
+from stub_extractor import StubServer
+
+URL = 'https://www.youtube.com/watch?v=vid0000001'
+
+
+def make_server(langs):
+    info = {'id': 'vid0000001', 'title': 'Video', 'duration': 60, 'subtitles': {},
+            'automatic_captions': {lang: [{'ext': 'vtt', 'url': f'stub://{lang}'}] for lang in langs}}
+    return StubServer({URL: info}, latency=0)
+
+
+def download(server, d, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return download_subtitles([URL], ['en', 'th'], str(d), rate=1000, ydl_factory=server.factory, **kwargs)[0]
+
+
+def test_complete_video_is_settled(tmp_path):
+    server = make_server(['en', 'th'])
+    download(server, tmp_path)
+    requests = server.requests
+    assert download(server, tmp_path)['langs'] == ['en', 'th']
+    assert server.requests == requests
+
+
+def test_partial_video_is_rechecked_through_the_metadata_cache(tmp_path):
+    server = make_server(['en'])
+    assert download(server, tmp_path)['langs'] == ['en']
+    requests = server.requests
+    # cache ยังไม่หมดอายุ: ตอบได้ว่าไม่มี th โดยไม่ยิง extract_info
+    assert download(server, tmp_path)['metadata'] == 'hit'
+    assert server.requests == requests
+    # th มีทีหลัง: --refresh ไม่เชื่อ cache จึงได้ th
+    server.catalog[URL]['automatic_captions']['th'] = [{'ext': 'vtt', 'url': 'stub://th'}]
+    assert download(server, tmp_path, refresh=True)['langs'] == ['en', 'th']
+
+
+def test_partial_video_is_rechecked_when_the_cache_is_disabled(tmp_path):
+    server = make_server(['en'])
+    download(server, tmp_path, cache_ttl=0)
+    server.catalog[URL]['automatic_captions']['th'] = [{'ext': 'vtt', 'url': 'stub://th'}]
+    assert download(server, tmp_path, cache_ttl=0)['langs'] == ['en', 'th']
+
+
+def test_extract_info_errors_are_cached_briefly(tmp_path):
+    server = make_server(['en', 'th'])
+    del server.catalog[URL]
+    assert download(server, tmp_path)['error']
+    requests = server.requests
+    # error อยู่ใน cache: รันซ้ำไม่ยิง extract_info
+    result = download(server, tmp_path)
+    assert result['error'] and result['metadata'] == 'hit'
+    assert server.requests == requests
+    # entry error หมดอายุเร็วกว่า entry ปกติ
+    cache = MetadataCache(str(tmp_path / 'metadata_cache.json'), clock=lambda: time.time() + DEFAULT_ERROR_TTL + 1)
+    assert cache.get('vid0000001') is None
+
+
+def test_cached_videos_answers_offline(tmp_path):
+    download(make_server(['en', 'th']), tmp_path)
+    download_subtitles(['https://www.youtube.com/watch?v=vid0000002'], ['en', 'th'], str(tmp_path), rate=1000,
+                       ydl_factory=StubServer({'https://www.youtube.com/watch?v=vid0000002': {
+                           'id': 'vid0000002', 'subtitles': {}, 'automatic_captions': {
+                               'en': [{'ext': 'vtt', 'url': 'stub://en'}]}}}, latency=0).factory)
+    assert cached_videos(['en', 'th'], str(tmp_path)) == ['vid0000001']
+    assert sorted(cached_videos(['en'], str(tmp_path))) == ['vid0000001', 'vid0000002']
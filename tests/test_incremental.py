@@ -0,0 +1,63 @@
+import contextlib
+import io
+import os
+import shutil
+
+import pyarrow.parquet as pq
+
+import app
+
+OUTPUTS = ['dataset.csv', 'dataset.jsonl', 'dataset_parallel.csv']
+
+
+def write_vtt(d, vid, lang, words, offset=0):
+    with open(d / f'{vid}.{lang}.vtt', 'w', encoding='utf-8') as f:
+        f.write('WEBVTT\n\n')
+        for k, word in enumerate(words):
+            s = offset + k
+            f.write(f'00:00:{s:02d}.000 --> 00:00:{s + 1:02d}.000\n{word} {lang}\n\n')
+
+
+def build(d, incremental):
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.export_all_vtt_to_datasets(str(d), incremental=incremental)
+        app.export_parallel_dataset(str(d), incremental=incremental)
+
+
+def test_incremental_rebuild_matches_full_rebuild(tmp_path, monkeypatch):
+    inc, full = tmp_path / 'inc', tmp_path / 'full'
+    inc.mkdir()
+    for vid in ('vid0', 'vid1', 'vid2'):
+        for lang in ('en', 'th'):
+            write_vtt(inc, vid, lang, [f'{vid} one', f'{vid} two', f'{vid} three'])
+    build(inc, incremental=True)
+
+    # แก้หนึ่งไฟล์ (ขนาดเปลี่ยน), เพิ่มวิดีโอใหม่, ลบหนึ่งไฟล์
+    write_vtt(inc, 'vid1', 'th', ['changed', 'lines', 'here', 'and one more'], offset=1)
+    write_vtt(inc, 'vid3', 'en', ['new one', 'new two'])
+    write_vtt(inc, 'vid3', 'th', ['new one', 'new two'])
+    os.remove(inc / 'vid2.en.vtt')
+
+    parsed = []
+    parse_files = app.parse_files
+
+    def spy(paths, *args):
+        paths = list(paths)
+        parsed.extend(os.path.basename(p) for p in paths)
+        return parse_files(paths, *args)
+
+    monkeypatch.setattr(app, 'parse_files', spy)
+    build(inc, incremental=True)
+    # ไฟล์ที่ไม่เปลี่ยนต้องไม่ถูก parse ใหม่ (ใช้แถวเดิมจาก output ผ่าน layout ใน manifest)
+    assert 'vid0.en.vtt' not in parsed and 'vid0.th.vtt' not in parsed
+    assert 'vid1.th.vtt' in parsed and 'vid3.en.vtt' in parsed
+
+    full.mkdir()
+    for path in inc.glob('*.vtt'):
+        shutil.copy(path, full / path.name)
+    build(full, incremental=False)
+
+    for name in OUTPUTS:
+        assert (inc / name).read_bytes() == (full / name).read_bytes(), name
+    assert pq.read_table(inc / 'dataset_parquet').equals(pq.read_table(full / 'dataset_parquet'))
+    assert 'vid2' not in (inc / 'dataset_parallel.csv').read_text(encoding='utf-8')
@@ -0,0 +1,33 @@
+import json
+
+import pandas as pd
+import pytest
+
+from length_buckets import LengthBucketer, measure_lengths, parse_bounds
+
+
+def test_graphemes_count_clusters():
+    # สระอำ (U+0E33) เป็น SpacingMark: ต่อท้ายตัวก่อนหน้า ไม่นับแยก
+    texts = ['กำลัง', 'ที่', 'น้ำ', 'hello', 'a\r\nb', 'ำา', '🇹🇭 é', None]
+    assert measure_lengths(texts, 'graphemes').tolist() == [3, 1, 1, 5, 3, 2, 3, 0]
+
+
+def test_bounds_are_per_unit():
+    bounds = parse_bounds('tokens:4,8/graphemes:16,32')
+    assert bounds['tokens'] == (4, 8) and bounds['graphemes'] == (16, 32)
+    for spec in ('4,8', 'tokens:4,8', 'tokens:8,4/graphemes:16,32'):
+        with pytest.raises(ValueError):
+            parse_bounds(spec)
+
+
+def test_each_side_is_bucketed_in_its_own_unit(tmp_path):
+    path = str(tmp_path / 'buckets')
+    df = pd.DataFrame({'text_original': ['one two three', 'one two three', 'a b c d e f'],
+                       'text_thai': ['กำลังมา', 'กำลังมา' * 4, 'สวัสดี']})
+    with LengthBucketer(path, bounds={'tokens': (4, 8), 'graphemes': (8, 16)}) as bucketer:
+        bucketer.write_frame(df)
+    with open(f'{path}/stats.json', encoding='utf-8') as f:
+        stats = json.load(f)
+    # 3 token / 5 grapheme -> le4, 3 token / 20 grapheme -> gt8 (th เกินขอบของตัวเอง), 6 token / 4 grapheme -> le8
+    assert [b['pairs'] for b in stats['buckets']] == [1, 1, 1]
+    assert stats['bounds'] == {'en': [4, 8], 'th': [8, 16]}
@@ -0,0 +1,15 @@
+import pytest
+
+from app import parallel_pair_path, parse_lang_pairs
+
+
+def test_lang_pairs_keep_hyphenated_codes():
+    assert parse_lang_pairs('en:zh-Hans, pt-BR:th,en:zh-Hans') == [('en', 'zh-Hans'), ('pt-BR', 'th')]
+    assert parse_lang_pairs('all') == 'all'
+    assert parallel_pair_path('out', 'en', 'zh-Hans') != parallel_pair_path('out', 'en-zh', 'Hans')
+
+
+@pytest.mark.parametrize('spec', ['en-th', 'en:', 'en:th:ja', 'th:th'])
+def test_invalid_lang_pairs(spec):
+    with pytest.raises(ValueError):
+        parse_lang_pairs(spec)
@@ -0,0 +1,61 @@
+import contextlib
+import io
+
+import app
+from pipeline import Pipeline
+
+
+def write_corpus(d):
+    for lang, words in (('en', ['hello', 'world', 'hello']), ('th', ['สวัสดี', 'โลก', 'สวัสดี'])):
+        with open(d / f'vid0.{lang}.vtt', 'w', encoding='utf-8') as f:
+            f.write('WEBVTT\n\n')
+            for k, word in enumerate(words):
+                f.write(f'00:00:0{k}.000 --> 00:00:0{k + 1}.000\n{word}\n\n')
+
+
+def statuses(report):
+    return {r['stage']: r['status'] for r in report}
+
+
+def test_single_stage_commands_share_the_pipeline_manifest(tmp_path):
+    write_corpus(tmp_path)
+    d = str(tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Pipeline(d).run(['export', 'parallel'])
+        # สร้างด้วย pipeline แล้วคำสั่งที่รันทีละ stage ต้องไม่สร้างซ้ำ
+        assert statuses(Pipeline(d).run(['text-dedup', 'both']))['text-dedup'] == 'ran'
+        assert statuses(app.export_clean_text_dedup(d))['text-dedup'] == 'fresh'
+        assert statuses(app.export_parallel_both_directions(d))['both'] == 'fresh'
+        # และกลับกัน
+        assert statuses(app.export_clean_text(d))['text'] == 'ran'
+        assert statuses(Pipeline(d).run(['text']))['text'] == 'fresh'
+    assert (tmp_path / 'dataset_text_only_dedup.txt').read_text(encoding='utf-8') == 'hello\nworld\nสวัสดี\nโลก\n'
+
+
+def test_chain_stages_report_their_own_counters(tmp_path):
+    import json
+
+    import metrics
+
+    write_corpus(tmp_path)
+    log = tmp_path / 'metrics.jsonl'
+    metrics.configure(str(log))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Pipeline(str(tmp_path)).run(['text-dedup', 'both', 'split'])
+    finally:
+        metrics.disable()
+    records = {}
+    for line in log.read_text(encoding='utf-8').splitlines():
+        rec = json.loads(line)
+        if rec['type'] == 'stage':
+            records[rec['stage']] = rec['counters']
+    # chain รันหลาย stage ใน stream เดียว แต่ละ stage ต้องมี counter ของตัวเอง
+    assert records['text-dedup']['rows_in'] == 6
+    assert records['text-dedup']['exact_dups'] == 2
+    assert records['text-dedup']['rows_out'] == 4
+    assert records['text-dedup']['bytes_written'] == (tmp_path / 'dataset_text_only_dedup.txt').stat().st_size
+    assert records['parallel-dedup']['exact_dups'] == 1
+    assert records['both']['rows_out'] == 4
+    assert records['split']['pairs'] == 2 and records['split']['rows_out'] == 4 and records['split']['shards'] >= 1
+    assert records['split']['bytes_written'] > 0
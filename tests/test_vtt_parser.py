@@ -0,0 +1,33 @@
+from vtt_parser import parse_columns_text
+
+
+def vtt(*cues):
+    return 'WEBVTT\n\n' + '\n\n'.join(f'{s} --> {e}\n{body}' for s, e, body in cues) + '\n'
+
+
+def test_rolling_auto_caption_is_collapsed():
+    # รูปแบบของ YouTube: บรรทัดก่อนหน้าค้างอยู่บรรทัดแรก + cue ค้างจอ 10ms
+    text = vtt(('00:00:01.000', '00:00:02.990', 'hello<00:00:01.500><c> world</c>'),
+               ('00:00:02.990', '00:00:03.000', 'hello world\n '),
+               ('00:00:03.000', '00:00:04.990', 'hello world\nhow<00:00:03.500><c> are</c><00:00:04.000><c> you</c>'),
+               ('00:00:04.990', '00:00:05.000', 'how are you\n '))
+    assert [e['text'] for e in parse_columns_text(text).entries()] == ['hello world', 'how are you']
+
+
+def test_tagged_file_without_rolling_structure_is_not_collapsed():
+    text = vtt(('00:00:01.000', '00:00:03.000', 'line one<00:00:02.000><c> word</c>\nsecond line'),
+               ('00:00:03.000', '00:00:05.000', 'Hello'),
+               ('00:00:05.000', '00:00:07.000', 'Hello'))
+    assert parse_columns_text(text).entries() == parse_columns_text(text, collapse=False).entries()
+    assert len(parse_columns_text(text).texts) == 3
+
+
+def test_out_of_range_minutes_and_seconds_are_rejected():
+    # fast path แบบ vectorized ต้องทิ้ง cue เดียวกับ TIMING_RE ([0-5]\d) ไม่ใช่แปลงเป็น ms ที่เกินช่วง
+    text = vtt(('00:00:01.000', '00:00:02.000', 'ok'),
+               ('00:99:01.000', '00:99:02.000', 'bad minutes'),
+               ('00:00:03.000', '00:00:61.000', 'bad seconds'),
+               ('00:59:59.000', '01:00:00.000', 'edge'))
+    cols = parse_columns_text(text, collapse=False)
+    assert cols.texts == ['ok', 'edge']
+    assert cols.start_ms.tolist() == [1000, 3599000]
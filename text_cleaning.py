@@ -0,0 +1,86 @@
+"""ทำความสะอาดข้อความซับไตเติลแบบ vectorized ทั้งคอลัมน์
+
+กฎทั้งหมดที่ใช้ลบข้อความถูกรวมเป็น regex เดียว (alternation) แล้วรันทีเดียวทั้งคอลัมน์
+ผ่าน pyarrow.compute.replace_substring_regex (C++/RE2) หรือ Series.str.replace ของ pandas
+จากนั้นยุบ whitespace อีกหนึ่งรอบ แทนการเรียก re.sub หลายครั้งต่อแถวผ่าน Series.map
+
+กฎที่มี (เลือกได้ผ่าน rules):
+- timing_tags : tag เวลาราย word ของ VTT เช่น <00:00:01.234>
+- c_tags      : <c> </c> <c.colorE5E5E5>
+- tags        : tag ทุกชนิด <...> (ครอบคลุมสองข้อบน)
+- annotations : คำอธิบายเสียงในวงเล็บเหลี่ยม เช่น [Music] [Applause] [เสียงหัวเราะ]
+- zero_width  : อักขระความกว้างศูนย์ที่พบบ่อยในข้อความภาษาไทย (ZWSP, ZWNJ, ZWJ, WJ, BOM)
+- whitespace  : ยุบช่องว่าง/tab/NBSP ให้เหลือช่องว่างเดียวและตัดหัวท้าย
+"""
+import re
+
+# (pattern สำหรับ Python re, pattern สำหรับ RE2 ของ pyarrow)
+RULES = {
+    'timing_tags': (r'<(?:\d+:)?\d{2}:\d{2}\.\d{3}>', r'<(?:\d+:)?\d{2}:\d{2}\.\d{3}>'),
+    'c_tags': (r'</?c(?:\.[\w.]+)?>', r'</?c(?:\.[\w.]+)?>'),
+    'tags': (r'<[^>]*>', r'<[^>]*>'),
+    'annotations': (r'\[[^\]]*\]', r'\[[^\]]*\]'),
+    'zero_width': (r'[\u200b\u200c\u200d\u2060\ufeff]', r'[\x{200B}\x{200C}\x{200D}\x{2060}\x{FEFF}]'),
+}
+_WHITESPACE = (r'[\s\u00a0\u2000-\u200a\u3000]+', r'[\s\x{00A0}\x{2000}-\x{200A}\x{3000}]+')
+
+DEFAULT_RULES = ('tags', 'annotations', 'zero_width', 'whitespace')
+
+
+class TextCleaner:
+    def __init__(self, rules=DEFAULT_RULES):
+        unknown = set(rules) - set(RULES) - {'whitespace'}
+        if unknown:
+            raise ValueError(f'Unknown cleaning rules: {sorted(unknown)}')
+        self.rules = tuple(rules)
+        removals = [RULES[name] for name in self.rules if name != 'whitespace']
+        self.whitespace = 'whitespace' in self.rules
+        self.py_pattern = '|'.join(p for p, _ in removals) or None
+        self.re2_pattern = '|'.join(p for _, p in removals) or None
+        self._remove = re.compile(self.py_pattern) if self.py_pattern else None
+        self._space = re.compile(_WHITESPACE[0])
+
+    def clean(self, text):
+        """ทำความสะอาดข้อความเดียว (ใช้กับ stream ทีละแถว)"""
+        text = '' if text is None or text != text else str(text)  # None / NaN -> ''
+        if self._remove:
+            text = self._remove.sub('', text)
+        if self.whitespace:
+            text = self._space.sub(' ', text).strip()
+        return text
+
+    def clean_arrow(self, array):
+        import pyarrow.compute as pc
+        if self.re2_pattern:
+            array = pc.replace_substring_regex(array, self.re2_pattern, '')
+        if self.whitespace:
+            array = pc.utf8_trim_whitespace(pc.replace_substring_regex(array, _WHITESPACE[1], ' '))
+        return array
+
+    def clean_series(self, series, engine='arrow'):
+        """ทำความสะอาดทั้ง Series; engine='arrow' ใช้ pyarrow.compute, 'pandas' ใช้ Series.str"""
+        import pandas as pd
+        if engine == 'arrow':
+            import pyarrow as pa
+            array = pa.array(series.fillna('').astype(str), type=pa.large_string())
+            return pd.Series(pd.arrays.ArrowExtensionArray(self.clean_arrow(array)), index=series.index, name=series.name)
+        series = series.fillna('').astype(str)
+        if self.py_pattern:
+            series = series.str.replace(self._remove, '', regex=True)
+        if self.whitespace:
+            series = series.str.replace(self._space, ' ', regex=True).str.strip()
+        return series
+
+
+def clean_text(text, rules=DEFAULT_RULES):
+    return _cleaner(rules).clean(text)
+
+
+_CLEANERS = {}
+
+
+def _cleaner(rules):
+    rules = tuple(rules)
+    if rules not in _CLEANERS:
+        _CLEANERS[rules] = TextCleaner(rules)
+    return _CLEANERS[rules]
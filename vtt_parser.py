@@ -0,0 +1,315 @@
+"""Parser ไฟล์ WebVTT แบบเร็ว
+
+อ่านทั้งไฟล์ครั้งเดียว แบ่งเป็น block ด้วยบรรทัดว่าง (บรรทัดที่มี '-->' เริ่ม cue ใหม่เสมอตาม WebVTT
+จึงรองรับ cue ที่คั่นด้วยบรรทัดที่มีแต่ space/tab หรือไม่มีบรรทัดคั่นเลย) แล้วแปลงเวลาของทุก cue เป็น
+มิลลิวินาทีแบบ vectorized (numpy) ทีเดียวทั้งไฟล์ แทนการเรียก re.match / re.findall ทุกบรรทัด
+string 'HH:MM:SS.mmm' ของแต่ละ cue (normalize แล้ว) เก็บเป็นก้อนเดียวความกว้างคงที่ ใช้ตอนเขียน output
+
+รองรับ:
+- เวลาแบบ MM:SS.mmm (ไม่มีชั่วโมง), ทศนิยมแบบ ',' , ชั่วโมงตั้งแต่ 100 ขึ้นไป และ cue settings หลังเวลาจบ
+- cue identifier และ block NOTE / STYLE / REGION (ถูกข้าม ไม่ปนเข้าไปใน text)
+- auto caption ของ YouTube แบบ rolling (บรรทัดเดิมซ้ำใน 2-3 cue ติดกัน + tag เวลาราย word
+  <00:00:01.234><c>) ถูกยุบให้เหลือหนึ่งแถวต่อหนึ่งช่วงพูด พร้อมช่วงเวลาที่รวมแล้ว
+  (collapse='auto' ทำเฉพาะไฟล์ที่มี tag เวลาราย word และมีโครงสร้าง rolling จริง ดู is_rolling
+  ไฟล์ที่มี tag แต่ไม่ใช่ rolling ถูก parse แบบปกติ)
+
+API:
+- iter_cues(path, collapse='auto')      -> generator ของ Cue(start_ms, end_ms, text)
+- parse_columns(path, collapse='auto')  -> CueColumns (numpy int32 start/end + list ของ text)
+- parse_vtt(path, collapse='auto')      -> list ของ dict {'start', 'end', 'text'} แบบเดียวกับ parse_vtt เดิม
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+
+Cue = namedtuple('Cue', ['start_ms', 'end_ms', 'text'])
+
+TS_WIDTH = 12  # len('HH:MM:SS.mmm')
+# น้ำหนักของแต่ละตัวอักษรใน 'HH:MM:SS.mmm' (ตำแหน่ง ':' และ '.' เป็น 0)
+_TS_WEIGHTS = np.array([36000000, 3600000, 0, 600000, 60000, 0, 10000, 1000, 0, 100, 10, 1], dtype=np.int64)
+_TS_DIGITS = _TS_WEIGHTS != 0
+# หลักสิบของนาทีและวินาที ต้องไม่เกิน 5 เหมือน [0-5]\d ใน TIMING_RE
+_TS_TENS = [3, 6]
+_TS_PART = r'(?:(\d+):)?([0-5]\d):([0-5]\d)[.,](\d{3})'
+TIMING_RE = re.compile(r'^\s*' + _TS_PART + r'[ \t]+-->[ \t]+' + _TS_PART)
+# tag เวลาราย word และ <c>/<c.colorXXXX></c> ที่ YouTube ใส่ใน auto caption
+INLINE_TAG_RE = re.compile(r'<(?:\d+:)?\d{2}:\d{2}\.\d{3}>|</?c(?:\.[\w.]+)?>')
+# cue ที่ยาวไม่เกินนี้ (ms) และมีแต่บรรทัดที่เพิ่งพูดจบคือ cue ค้างจอของ rolling caption (YouTube ใช้ 10ms)
+ROLLING_REPEAT_MS = 50
+# สัดส่วน cue ที่ต้องต่อบรรทัดจาก cue ก่อนหน้าถึงจะนับว่าไฟล์เป็น rolling
+ROLLING_MIN_RATIO = 0.3
+
+
+def format_ms(ms):
+    h, rem = divmod(int(ms), 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f'{h:02d}:{m:02d}:{s:02d}.{ms:03d}'
+
+
+def parse_ms(ts):
+    """'HH:MM:SS.mmm' หรือ 'MM:SS.mmm' -> มิลลิวินาที"""
+    *hm, s = ts.split(':')
+    sec, _, ms = s.replace(',', '.').partition('.')
+    h = int(hm[0]) if len(hm) == 2 else 0
+    return ((h * 60 + int(hm[-1])) * 60 + int(sec)) * 1000 + int(ms or 0)
+
+
+def _ts_to_ms(blob, n):
+    if not n:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=bool)
+    digits = np.frombuffer(blob.encode('ascii'), dtype=np.uint8).reshape(n, TS_WIDTH) - 48
+    valid = (digits[:, _TS_DIGITS] <= 9).all(axis=1) & (digits[:, _TS_TENS] <= 5).all(axis=1)
+    return (digits.astype(np.int64) @ _TS_WEIGHTS).astype(np.int32), valid
+
+
+def timestamps_to_ms(values):
+    """list ของ 'HH:MM:SS.mmm' -> numpy int32 มิลลิวินาที (รูปแบบอื่นใช้ parse_ms ทีละตัว)"""
+    n = len(values)
+    blob = ''.join(values)
+    if len(blob) == n * TS_WIDTH and blob.isascii():
+        ms, valid = _ts_to_ms(blob, n)
+        if valid.all():
+            return ms
+    return np.array([parse_ms(v) for v in values], dtype=np.int32)
+
+
+def _slow_timing(line):
+    # เวลาที่ไม่ใช่รูป HH:MM:SS.mmm มาตรฐาน (ไม่มีชั่วโมง, ใช้ ',', ชั่วโมง 3 หลัก) -> string ที่ normalize แล้ว
+    m = TIMING_RE.match(line)
+    if not m:
+        return None
+    h1, m1, s1, f1, h2, m2, s2, f2 = m.groups()
+    start = ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(f1)
+    end = ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(f2)
+    return format_ms(start), format_ms(end)
+
+
+def read_vtt(path):
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class CueColumns:
+    """ผล parse แบบคอลัมน์
+
+    start_ms / end_ms เป็น numpy int32, texts เป็น list ของ str และ start/end แบบ string
+    เก็บเป็นก้อนเดียวความกว้างคงที่ (TS_WIDTH ตัวอักษรต่อ cue) จึง pickle ได้ถูกเมื่อส่งข้าม process
+    ถ้ามีเวลาที่เกิน 99 ชั่วโมง (กว้างเกิน TS_WIDTH) blob เป็น None และสร้าง string จาก ms ตอนเรียกใช้
+    """
+    __slots__ = ('start_ms', 'end_ms', 'texts', 'start_blob', 'end_blob')
+
+    def __init__(self, start_ms, end_ms, texts, start_blob, end_blob):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.texts = texts
+        self.start_blob = start_blob
+        self.end_blob = end_blob
+
+    @classmethod
+    def from_cues(cls, cues):
+        cues = list(cues)
+        return cls(np.array([c[0] for c in cues], dtype=np.int32),
+                   np.array([c[1] for c in cues], dtype=np.int32),
+                   [c[2] for c in cues],
+                   _blob([format_ms(c[0]) for c in cues]),
+                   _blob([format_ms(c[1]) for c in cues]))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return map(Cue, self.start_ms.tolist(), self.end_ms.tolist(), self.texts)
+
+    def starts(self):
+        return _split_blob(self.start_blob, self.start_ms)
+
+    def ends(self):
+        return _split_blob(self.end_blob, self.end_ms)
+
+    def entries(self):
+        return [{'start': s, 'end': e, 'text': t} for s, e, t in zip(self.starts(), self.ends(), self.texts)]
+
+    def rows(self, video_id):
+        return [{'video_id': video_id, 'start': s, 'end': e, 'text': t}
+                for s, e, t in zip(self.starts(), self.ends(), self.texts)]
+
+    def __reduce__(self):
+        # text ไม่มี newline (join บรรทัดด้วยช่องว่างแล้ว) จึงต่อเป็น string เดียวด้วย '\n' ได้
+        return (_unpack_columns, (self.start_ms, self.end_ms, '\n'.join(self.texts), self.start_blob, self.end_blob))
+
+
+def _unpack_columns(start_ms, end_ms, texts, start_blob, end_blob):
+    return CueColumns(start_ms, end_ms, texts.split('\n') if len(start_ms) else [], start_blob, end_blob)
+
+
+def _blob(values):
+    blob = ''.join(values)
+    return blob if len(blob) == len(values) * TS_WIDTH else None
+
+
+def _split_blob(blob, ms):
+    if blob is None:
+        return [format_ms(v) for v in ms.tolist()]
+    return [blob[i:i + TS_WIDTH] for i in range(0, len(blob), TS_WIDTH)]
+
+
+def collapse_rolling(cues):
+    """ยุบ cue แบบ rolling ให้เหลือหนึ่ง Cue ต่อหนึ่งช่วงพูด
+
+    cues: iterable ของ (start_ms, end_ms, lines) โดย lines คือ list ของ (text ที่ลบ tag แล้ว, fresh)
+    fresh = บรรทัดนั้นมี tag เวลาราย word (เป็นบรรทัดที่กำลังพูดใหม่ ไม่ใช่บรรทัดที่ค้างบนจอ)
+    บรรทัดที่ไม่ fresh และซ้ำกับช่วงพูดก่อนหน้าถูกทิ้ง และ cue ที่มีแต่บรรทัดซ้ำจะขยายเวลาจบ
+    ของช่วงพูดปัจจุบัน ประโยคที่พูดซ้ำจริงๆ (บรรทัด fresh) จึงไม่ถูกยุบทิ้ง
+    """
+    out = []
+    cur = None  # [start, end, text]
+    prev_text = None
+    for start, end, lines in cues:
+        new = [(line, fresh) for line, fresh in lines if line]
+        while new and cur and not new[0][1] and new[0][0] in (cur[2], prev_text):
+            new.pop(0)
+        if not new:
+            if cur:
+                cur[1] = max(cur[1], end)
+            continue
+        for line, _ in new:
+            if cur:
+                out.append(Cue(*cur))
+                prev_text = cur[2]
+            cur = [start, end, line]
+    if cur:
+        out.append(Cue(*cur))
+    return out
+
+
+def is_rolling(cues):
+    """cues แบบเดียวกับ collapse_rolling เป็น auto caption แบบ rolling ของ YouTube ไหม
+
+    นับ cue ที่บรรทัดแรกคือบรรทัดสุดท้ายของ cue ก่อนหน้า โดย cue นั้นมีบรรทัดใหม่ต่อท้าย
+    (บรรทัดที่ค้างบนจอ) หรือยาวไม่เกิน ROLLING_REPEAT_MS (cue ค้างจอ ~10ms) ต้องมีอย่างน้อย
+    ROLLING_MIN_RATIO ของจำนวน cue ไฟล์ที่แค่มี tag หรือมีประโยคซ้ำบ้างจึงไม่ถูกยุบ
+    """
+    carried = 0
+    prev_last = None
+    for start, end, lines in cues:
+        texts = [line for line, _ in lines if line]
+        if texts and texts[0] == prev_last and (len(texts) > 1 or end - start <= ROLLING_REPEAT_MS):
+            carried += 1
+        if texts:
+            prev_last = texts[-1]
+    return len(cues) > 1 and carried >= ROLLING_MIN_RATIO * (len(cues) - 1)
+
+
+def _join_lines(body):
+    return ' '.join(filter(None, [part.strip() for part in body.split('\n')]))
+
+
+def _rolling_lines(body):
+    lines = []
+    for line in body.split('\n'):
+        text, tags = INLINE_TAG_RE.subn('', line)
+        lines.append((' '.join(text.split()), tags > 0))
+    return lines
+
+
+def parse_columns_text(text, collapse='auto'):
+    if collapse == 'auto':
+        # ไฟล์ที่ไม่มี tag เวลาราย word ไม่ใช่ rolling แน่นอน (ไม่ต้องเก็บบรรทัดแยกไว้ตรวจ)
+        collapse = 'auto' if INLINE_TAG_RE.search(text) is not None and '<c>' in text else False
+    starts, ends, texts = [], [], []
+    blocks = text.split('\n\n')
+    for i, block in enumerate(blocks):
+        nl = block.find('\n')
+        line = block if nl < 0 else block[:nl]
+        if '-->' not in line:
+            # บรรทัดแรกเป็น cue identifier ได้ นอกนั้น (WEBVTT header, NOTE, STYLE, REGION) ข้าม
+            if nl < 0 or line.startswith(('NOTE', 'STYLE', 'REGION', 'WEBVTT')):
+                continue
+            nl2 = block.find('\n', nl + 1)
+            if nl2 < 0 or '-->' not in block[nl + 1:nl2]:
+                continue
+            line = block[nl + 1:nl2]
+            nl = nl2
+        if nl < 0:
+            continue
+        body = block[nl + 1:]
+        if '-->' in body:
+            # cue ถัดไปไม่มีบรรทัดว่างจริงคั่น (ไม่มีเลย หรือเป็นบรรทัดที่มีแต่ space/tab): บรรทัดที่มี '-->'
+            # เริ่ม cue ใหม่ (เหมือน parser เดิมและ WebVTT) ถ้ามีบรรทัด whitespace ก่อนหน้า cue ใหม่เริ่มหลังบรรทัดนั้น
+            # (เก็บ cue identifier ไว้กับ cue ของมัน) แล้วแทรกเป็น block ถัดไปให้ loop นี้ parse ต่อ
+            lines = body.split('\n')
+            cut = next(k for k, part in enumerate(lines) if '-->' in part)
+            blank = next((k for k in range(cut - 1, -1, -1) if not lines[k].strip()), None)
+            blocks.insert(i + 1, '\n'.join(lines[cut if blank is None else blank + 1:]))
+            body = '\n'.join(lines[:cut if blank is None else blank])
+        if collapse:
+            # เก็บบรรทัดไว้แยกกัน ยุบทีหลังเมื่อได้เวลาเป็นตัวเลขแล้ว
+            if not body.strip():
+                continue
+        elif '\n' in body:
+            body = _join_lines(body)
+        else:
+            body = body.strip()
+        if not body:
+            continue
+        # ตรวจตัวคั่นทุกตำแหน่งของทั้งสองเวลา ('HH:MM:SS.mmm --> HH:MM:SS.mmm') ตัวเลขตรวจทีหลังแบบ vectorized
+        # นอกนั้น (ไม่มีชั่วโมง, ',' , ชั่วโมง 3 หลัก) ไป _slow_timing ซึ่งคืน string ที่ normalize แล้ว
+        if line[2:9:3] == '::.' and line[12:17] == ' --> ' and line[19:26:3] == '::.':
+            starts.append(line[:12])
+            ends.append(line[17:29])
+        else:
+            timing = _slow_timing(line)
+            if timing is None:
+                continue
+            starts.append(timing[0])
+            ends.append(timing[1])
+        texts.append(body)
+    start_blob, end_blob = ''.join(starts), ''.join(ends)
+    n = len(texts)
+    if len(start_blob) != n * TS_WIDTH or len(end_blob) != n * TS_WIDTH or not start_blob.isascii() or not end_blob.isascii():
+        # เวลากว้างไม่เท่ากัน (เช่นชั่วโมง 3 หลัก) หรือมีตัวอักษรแปลก
+        cols = _filter_columns(starts, ends, texts)
+    else:
+        start_ms, valid_start = _ts_to_ms(start_blob, n)
+        end_ms, valid_end = _ts_to_ms(end_blob, n)
+        if not (valid_start.all() and valid_end.all()):
+            cols = _filter_columns(starts, ends, texts)
+        else:
+            cols = CueColumns(start_ms, end_ms, texts, start_blob, end_blob)
+    if collapse:
+        cues = [(s, e, _rolling_lines(t)) for s, e, t in zip(cols.start_ms.tolist(), cols.end_ms.tolist(), cols.texts)]
+        if collapse != 'auto' or is_rolling(cues):
+            return CueColumns.from_cues(collapse_rolling(cues))
+        # มี tag แต่ไม่ใช่ rolling: รวมบรรทัดของแต่ละ cue เหมือน collapse=False
+        cols.texts = [_join_lines(t) for t in cols.texts]
+    return cols
+
+
+def _filter_columns(starts, ends, texts):
+    # fallback เมื่อมี cue ที่รูปแบบเวลาเสีย: ตรวจทีละ cue แล้วทิ้งตัวที่ใช้ไม่ได้
+    cues = []
+    for s, e, t in zip(starts, ends, texts):
+        timing = _slow_timing(f'{s} --> {e}')
+        if timing is not None:
+            cues.append((parse_ms(timing[0]), parse_ms(timing[1]), t))
+    return CueColumns.from_cues(cues)
+
+
+@metrics.accumulate('parse')
+def parse_columns(path, collapse='auto'):
+    return parse_columns_text(read_vtt(path), collapse)
+
+
+def iter_cues(path, collapse='auto'):
+    yield from parse_columns(path, collapse)
+
+
+def parse_vtt(path, collapse='auto'):
+    return parse_columns(path, collapse).entries()